@@ -1,212 +1,309 @@
-from config import model
+import asyncio
+import time
+from config import (
+    get_model, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_DB_PATH, CACHE_DB_TTL_SECONDS,
+    LLM_TIMEOUT_SECONDS, LLM_RETRIES, LLM_HEDGE_AFTER_SECONDS, LLM_MAX_CALL_THREADS, LLM_STREAM_TIMEOUT_SECONDS, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS,
+    LOCAL_ADVICE_FAST_PATH, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_DIR
+)
+from cache import ResponseCache, SingleFlight, prompt_key
+from semantic_cache import SemanticCache
+from resilience import ResilientCaller, CircuitBreaker, CircuitOpenError, DeadlineExceeded
+from tracing import span, tracer
+from prompts import build_advice_prompt, build_goal_plan_prompt, build_chat_prompt, build_profile_block
+from local_advice import build_local_advice, is_simple_profile
+
+# Model override (e.g. a fake model in benchmarks); None means the lazily configured Gemini client
+model = None
+
+
+def _get_model():
+    return model if model is not None else get_model()
+
+
+def _require_model():
+    current = _get_model()
+    if current is None:
+        raise RuntimeError("Gemini model not configured. Set GEMINI_API_KEY to use AI responses.")
+    return current
+
+
+# Shared response cache keyed on model name + rendered prompt
+response_cache = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    db_path=CACHE_DB_PATH,
+    db_ttl_seconds=CACHE_DB_TTL_SECONDS
+)
+
+
+# Identical prompts in flight at the same time (across Streamlit sessions) share one upstream call
+inflight = SingleFlight()
+
+
+def coalescing_stats():
+    return inflight.stats()
+
+
+# Chatbot answers reused for near-duplicate questions about the same profile (keyed on the profile block)
+semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, path=SEMANTIC_CACHE_DIR)
+
+
+# Every Gemini call goes through one deadline / retry / hedging / circuit breaker layer
+caller = ResilientCaller(
+    timeout=LLM_TIMEOUT_SECONDS,
+    retries=LLM_RETRIES,
+    hedge_after=LLM_HEDGE_AFTER_SECONDS,
+    breaker=CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS),
+    max_threads=LLM_MAX_CALL_THREADS
+)
+
+
+def resilience_stats():
+    return caller.stats()
+
+
+# Local fallback: deterministic text shown instead of an error when Gemini is slow, failing or not configured
+FALLBACK_NOTICE = "AI advice is temporarily unavailable"
+
+
+def _fallback_reason(error):
+    if _get_model() is None:
+        return "Gemini model not configured, set GEMINI_API_KEY"
+    if isinstance(error, CircuitOpenError):
+        return "too many recent failures, retrying shortly"
+    if isinstance(error, TimeoutError):
+        return "the request timed out"
+    return f"Gemini API Error: {error}"
+
+
+def local_fallback(user_data, analysis_data, error):
+    notice = f"{FALLBACK_NOTICE} ({_fallback_reason(error)})."
+    if analysis_data is None:
+        return notice
+    return f"{notice} Your figures in the meantime:\n{build_profile_block(user_data, analysis_data)}"
+
+
+# Advice fallback: the rule-based plan, so the page still shows full advice sections
+def advice_fallback(user_data, analysis_data, error):
+    return f"{FALLBACK_NOTICE} ({_fallback_reason(error)}). Showing a plan computed from your numbers.\n" \
+           f"{build_local_advice(user_data, analysis_data)}"
+
+
+def use_local_advice(user_data):
+    return LOCAL_ADVICE_FAST_PATH and is_simple_profile(user_data)
+
+
+def is_fallback(text):
+    return FALLBACK_NOTICE in text
+
+
+# Gemini call with response caching and request coalescing (llm_caller replaces the shared caller, e.g. in batch runs)
+def _generate(prompt, llm_caller=None):
+    model = _require_model()
+    llm_caller = llm_caller or caller
+    key = prompt_key(getattr(model, "model_name", ""), prompt)
+    with span("llm.generate", prompt_chars=len(prompt)) as current:
+        cached = response_cache.get(key)
+        current.set("cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+
+        def call():
+            # The SDK's own timeout ends the request at the deadline, so its call thread is freed too
+            text = llm_caller.call(
+                lambda: model.generate_content(prompt, request_options={"timeout": llm_caller.timeout})
+            ).text.strip()
+            response_cache.set(key, text)
+            return text
+
+        # Followers give up at the same deadline the leader's call has
+        text = inflight.do(key, call, llm_caller.timeout)
+        current.set("response_chars", len(text))
+        return text
+
+
+# Streaming Gemini call: yields text chunks as they arrive, cached or coalesced responses in one piece
+def _stream(prompt):
+    model = _require_model()
+    key = prompt_key(getattr(model, "model_name", ""), prompt)
+    current = tracer.start("llm.stream", prompt_chars=len(prompt))
+    cached = response_cache.get(key)
+    current.set("cache_hit", cached is not None)
+    if cached is not None:
+        tracer.end(current)
+        yield cached
+        return
+    flight, leader = inflight.begin(key)
+    current.set("coalesced", not leader)
+    # Followers wait no longer than the leader is allowed to stream
+    if not leader:
+        try:
+            text = inflight.wait(flight, LLM_STREAM_TIMEOUT_SECONDS)
+        finally:
+            tracer.end(current)
+        yield text
+        return
+    parts = []
+    error = RuntimeError("Streaming request was abandoned")
+    deadline = time.monotonic() + LLM_STREAM_TIMEOUT_SECONDS
+    try:
+        for chunk in caller.stream(lambda: model.generate_content(prompt, stream=True)):
+            if time.monotonic() > deadline:
+                raise DeadlineExceeded(f"LLM stream exceeded its {LLM_STREAM_TIMEOUT_SECONDS:g}s deadline")
+            text = chunk.text
+            if not parts:
+                text = text.lstrip()
+                if not text:
+                    continue
+                current.set("first_chunk_ms", round((time.time_ns() - current.start_ns) / 1e6, 3))
+            parts.append(text)
+            yield text
+        error = None
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        text = "".join(parts).strip() if error is None else None
+        if text is not None:
+            response_cache.set(key, text)
+        inflight.finish(key, flight, text, error)
+        current.set("response_chars", sum(len(part) for part in parts))
+        tracer.end(current, None if error is None else f"{type(error).__name__}: {error}")
+
 
 # AI Reasoning Module
 def generate_financial_advice(user_data, analysis_data):
-    if user_data['profile'] == "Student":
-        profile_prompt = """
-You are advising a student with limited income as pocket money.
-Start the response with a "Current Financial Health:" section summarizing income, expenses, savings, existing savings, and debt in 2-3 sentences.
-Then provide a clear, professional, and structured personal finance plan.
-Output must be in sections with headers.
-Each section should have short, actionable bullet points.
-Sections to include: Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Goal Guidance, Budgeting & Expense Optimization, Risk Management.
-Start with: "Here is your personalized financial plan as a student."
-"""
-    elif user_data['profile'] == "Professional":
-        profile_prompt = """
-You are advising a working professional managing salary, expenses, savings, and investments.
-Start the response with a "Current Financial Health:" section summarizing income, expenses, savings, existing savings, and debt in 5-7 sentences.
-Then provide a clear, professional, and structured personal finance plan.
-Output must be in sections with headers.
-Each section should have short, actionable bullet points.
-Sections to include: Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Investment Allocation, Goal Guidance, Budgeting & Expense Optimization, Risk Management.
-Start with: "Here is your personalized financial plan as a professional."
-"""
-    else:
-        profile_prompt = """
-You are advising a retiree relying on pension or passive income.
-Start the response with a "Current Financial Health:" section summarizing income, expenses, savings, existing savings, and debt in 5-7 sentences.
-Then provide a clear, professional, and structured personal finance plan.
-Output must be in sections with headers.
-Each section should have short, actionable bullet points.
-Sections to include: Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Investment Allocation, Goal Guidance, Budgeting & Expense Optimization, Risk Management.
-Start with: "Here is your personalized financial plan as a retiree."
-"""
-
-    prompt = f"""
-You are an expert financial advisor. Generate a sectioned, structured, and actionable personal finance plan.
-
-{profile_prompt}
-
-User Data:
-- Profile Type: {user_data['profile']}
-- Monthly Income: ₹{user_data['income']}
-- Monthly Expenses: ₹{user_data['expenses']}
-- Total Debts: ₹{user_data['debts']}
-- Existing Savings & Investments: ₹{user_data['existing_savings']}
-- Estimated Monthly Savings: ₹{analysis_data['savings']}
-- Total Net Worth: ₹{analysis_data['total_net_worth']}
-- Debt-to-Income Ratio: {analysis_data['debt_to_income_ratio']*100:.1f}%
-- Savings Ratio: {analysis_data['savings_ratio']*100:.2f}%
-- Financial Goals: {', '.join(user_data['goals'])}
-- Risk Tolerance: {user_data['risk_tolerance']}
-- Recommended Investment Allocation : {analysis_data['recommended_investment_allocation']}
-
-Important: The user already has ₹{user_data['existing_savings']} in existing savings and investments. 
-Consider how to best utilize these existing funds alongside new monthly savings.
-
-Instructions:
-- Use sections with clear headers and : (e.g., Existing Savings Utilization:, Monthly Savings Strategy:, Debt Plan:, Investment Advice:, Goal Guidance:, Budgeting & Expense Optimization:, Risk Management:)
-- Include specific advice on how to utilize existing savings
-- Consider if existing savings should be used for debt repayment, emergency fund completion, or goal acceleration
-- Include short, actionable bullet points in each section
-- Tailor advice to the user's profile and risk tolerance
-- Keep tone professional and easy to follow
-- Avoid long paragraphs and executive summaries
-- Do not use markdown, tables, or bold formatting
-
-Output:
-- Ready-to-read actionable plan that incorporates existing savings
-"""
+    if use_local_advice(user_data):
+        return build_local_advice(user_data, analysis_data)
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return _generate(build_advice_prompt(user_data, analysis_data))
     except Exception as e:
-        return f"Gemini API Error: {e}"
-    
+        return advice_fallback(user_data, analysis_data, e)
+
 
 # Advanced Goal Oriented plan with User Instructions
-def generate_goal_plan(user_data, analysis_data, user_instructions=""):
-    prompt = f"""
-You are a highly experienced and practical financial advisor. Generate a structured, actionable, and goal-specific financial plan that PRIORITIZES and STRICTLY FOLLOWS the user's specific instructions above all other considerations.
-
-USER'S SPECIFIC INSTRUCTIONS (MUST FOLLOW STRICTLY):
-{user_instructions}
-
-CRITICAL: The user's instructions above are NON-NEGOTIABLE and must be the PRIMARY FOCUS of this plan. All other financial advice must work AROUND these instructions.
-
-User Goal: {', '.join(user_data['goals'])}
-Profile Type: {user_data['profile']}
-Monthly Income: ₹{user_data['income']}
-Monthly Expenses: ₹{user_data['expenses']}
-Total Debts: ₹{user_data['debts']}
-Existing Savings & Investments: ₹{user_data['existing_savings']}
-Estimated Monthly Savings: ₹{analysis_data['savings']}
-Total Net Worth: ₹{analysis_data['total_net_worth']}
-Debt-to-Income Ratio: {analysis_data['debt_to_income_ratio']*100:.1f}%
-Savings Ratio: {analysis_data['savings_ratio']*100:.2f}%
-Risk Tolerance: {user_data['risk_tolerance']}
-Recommended Investment Allocation: {analysis_data['recommended_investment_allocation']}
-
-Existing Savings Available: ₹{user_data['existing_savings']}
-
-MANDATORY INSTRUCTION FOLLOWING FRAMEWORK:
-1. FIRST AND FOREMOST: Implement the user's specific instruction exactly as requested
-2. SECOND: Build the entire financial plan around supporting this instruction
-3. THIRD: Adjust all other financial aspects to accommodate the instruction
-4. FOURTH: Ensure the instruction doesn't compromise basic financial security
-
-Instructions for Advanced Planning:
-- THE USER'S INSTRUCTION IS YOUR TOP PRIORITY - everything else is secondary
-- Create a mathematically sound plan that implements the user's instruction while maintaining financial stability
-- Calculate exact timelines, amounts, and milestones based on the instruction
-- Show how the instruction accelerates or modifies the original goal achievement
-- Provide contingency plans for potential risks introduced by the instruction
-- Be brutally honest about trade-offs and compromises required
-
-ORGANIZE OUTPUT INTO THESE EXACT SECTIONS WITH COLONS:
-
-Instruction Implementation Strategy:
-Detail exactly how the user's specific instruction will be executed step by step
-
-Financial Impact Analysis:
-Show how this instruction affects all aspects of finances with before/after comparisons
-
-Revised Goal Timeline:
-Provide exact timeline calculations showing new completion dates and milestones
-
-Monthly Action Plan:
-Break down monthly financial actions with specific ₹ amounts and allocations
-
-Resource Allocation Strategy:
-Show how existing savings and monthly income will be distributed to support the instruction
-
-Risk Assessment & Mitigation:
-Identify potential risks from following this instruction and provide mitigation strategies
-
-Progress Tracking Framework:
-Define clear metrics and checkpoints to monitor progress
-
-Contingency Planning:
-Provide alternative scenarios if circumstances change or challenges arise
-
-Key Success Metrics:
-List the specific numbers and targets that define success
-
-Next Immediate Actions:
-Provide the first 3-5 actions the user should take immediately
-
-Output Requirements:
-- Use exactly the section headers provided above with colons
-- Each section must have 3-5 clear, actionable points
-- Include specific calculations and ₹ amounts in every relevant section
-- Show mathematical formulas used for timeline calculations
-- Provide monthly breakdowns with exact dates and amounts
-- Be realistic about challenges while maintaining focus on the user's instruction
-- Use simple, direct language without financial jargon
-- Start each section immediately after the header without blank lines
-- Do not use numbering the points just bullet points
-"""
+def generate_goal_plan(user_data, analysis_data, user_instructions="", goal_outlook=""):
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return _generate(build_goal_plan_prompt(user_data, analysis_data, user_instructions, goal_outlook))
     except Exception as e:
-        return f"Gemini API Error: {e}"
+        return local_fallback(user_data, analysis_data, e)
 
 
 # Chatbot Module for Any Query
 def finance_chatbot_response(user_data, analysis_data, user_query):
-    prompt = f"""
-You are a professional, highly knowledgeable, and practical financial advisor. Respond to the user's question with clear, actionable, and personalized advice based on their financial profile and goals.
-
-User Profile Details:
-- Profile Type: {user_data['profile']}
-- Monthly Income: ₹{user_data['income']}
-- Monthly Expenses: ₹{user_data['expenses']}
-- Total Debts: ₹{user_data['debts']}
-- Existing Savings & Investments: ₹{user_data['existing_savings']}
-- Estimated Monthly Savings: ₹{analysis_data['savings']}
-- Total Net Worth: ₹{analysis_data['total_net_worth']}
-- Debt-to-Income Ratio: {analysis_data['debt_to_income_ratio']:.2f}
-- Savings Ratio: {analysis_data['savings_ratio']:.2f}
-- Risk Tolerance: {user_data['risk_tolerance']}
-- Recommended Investment Allocation: {analysis_data['recommended_investment_allocation']}
-- Financial Goals: {', '.join(user_data['goals'])}
-
-User Question: {user_query}
-
-Instructions for response:
-- First, determine if the question is related to finance, budgeting, savings, debts, investments, or financial goals.
-  - If unrelated, respond politely: "I'm a financial advisor, so I can best answer questions about budgeting, savings, debts, investments, and financial planning."
-- Just answer the question don not add any extra info.
-- Tailor the response specifically to the user's financial profile, risk tolerance, and goals.
-- If the question includes a financial term or abbreviation (e.g., SIP, ROI), briefly define it and explain how it may relate to the user's financial situation.
-- Provide 3-5 actionable points tailored to the user's profile and goals.
-- Include numeric suggestions whenever relevant (e.g., amounts to save, invest, or allocate).
-- Consider how existing savings can be utilized in the response
-- Keep the tone professional, friendly, and concise.
-- Use bullet points or numbered steps; avoid long paragraphs.
-- Reference the user's profile, savings, risk tolerance, and goals only if it adds value.
-- Make the answer practical, easy to follow, and directly helpful for financial decision-making.
-- Don not use BOLD words, any markdown formatting along with tables, long paragraphs, and special characters(e.g. _, -, +, *).
-
-Output:
-- Clear, actionable, and personalized financial advice.
-"""
     try:
-        if model is None:
+        if _get_model() is None:
             return "Gemini model not configured. Set GEMINI_API_KEY to use AI responses."
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        profile_block = build_profile_block(user_data, analysis_data)
+        cached = semantic_cache.lookup(profile_block, user_query)
+        if cached is not None:
+            return cached
+        text = _generate(build_chat_prompt(user_data, analysis_data, user_query))
+        semantic_cache.add(profile_block, user_query, text)
+        return text
+    except Exception as e:
+        return local_fallback(user_data, None, e)
+
+
+# Streaming variants: yield text chunks for progressive rendering
+def stream_financial_advice(user_data, analysis_data):
+    if use_local_advice(user_data):
+        yield build_local_advice(user_data, analysis_data)
+        return
+    try:
+        yield from _stream(build_advice_prompt(user_data, analysis_data))
+    except Exception as e:
+        yield advice_fallback(user_data, analysis_data, e)
+
+
+def stream_goal_plan(user_data, analysis_data, user_instructions="", goal_outlook=""):
+    try:
+        yield from _stream(build_goal_plan_prompt(user_data, analysis_data, user_instructions, goal_outlook))
+    except Exception as e:
+        yield local_fallback(user_data, analysis_data, e)
+
+
+def stream_chatbot_response(user_data, analysis_data, user_query):
+    if _get_model() is None:
+        yield "Gemini model not configured. Set GEMINI_API_KEY to use AI responses."
+        return
+    profile_block = build_profile_block(user_data, analysis_data)
+    cached = semantic_cache.lookup(profile_block, user_query)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    try:
+        for chunk in _stream(build_chat_prompt(user_data, analysis_data, user_query)):
+            parts.append(chunk)
+            yield chunk
     except Exception as e:
-        return f"Gemini API Error: {e}"
\ No newline at end of file
+        yield local_fallback(user_data, None, e)
+        return
+    semantic_cache.add(profile_block, user_query, "".join(parts).strip())
+
+
+# Async Gemini call with response caching, the shared deadline and circuit breaker (threads out when the model has no async API)
+async def _generate_async(prompt):
+    model = _require_model()
+    key = prompt_key(getattr(model, "model_name", ""), prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    if not caller.breaker.allow():
+        raise CircuitOpenError("LLM circuit breaker is open; failing fast")
+    options = {"timeout": caller.timeout}
+    try:
+        if hasattr(model, "generate_content_async"):
+            call = model.generate_content_async(prompt, request_options=options)
+        else:
+            call = asyncio.to_thread(model.generate_content, prompt, request_options=options)
+        response = await asyncio.wait_for(call, caller.timeout)
+    except BaseException as e:
+        # Cancellation counts as a failure too, or a cancelled half-open trial would leave the breaker rejecting forever
+        caller.record_outcome(e)
+        raise
+    caller.record_outcome()
+    text = response.text.strip()
+    response_cache.set(key, text)
+    return text
+
+
+# Async Advisor Client: async versions of every generator with a shared concurrency limit
+class AsyncAdvisorClient:
+    def __init__(self, max_concurrency=4):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _call(self, prompt, user_data=None, analysis_data=None):
+        async with self.semaphore:
+            try:
+                return await _generate_async(prompt)
+            except Exception as e:
+                return local_fallback(user_data, analysis_data, e)
+
+    async def generate_financial_advice(self, user_data, analysis_data):
+        if use_local_advice(user_data):
+            return build_local_advice(user_data, analysis_data)
+        async with self.semaphore:
+            try:
+                return await _generate_async(build_advice_prompt(user_data, analysis_data))
+            except Exception as e:
+                return advice_fallback(user_data, analysis_data, e)
+
+    async def generate_goal_plan(self, user_data, analysis_data, user_instructions="", goal_outlook=""):
+        return await self._call(build_goal_plan_prompt(user_data, analysis_data, user_instructions, goal_outlook), user_data, analysis_data)
+
+    async def finance_chatbot_response(self, user_data, analysis_data, user_query):
+        if _get_model() is None:
+            return "Gemini model not configured. Set GEMINI_API_KEY to use AI responses."
+        return await self._call(build_chat_prompt(user_data, analysis_data, user_query))
+
+    async def generate_many(self, prompts):
+        return await asyncio.gather(*(self._call(prompt) for prompt in prompts))
+
+
+# Run several prompts concurrently from synchronous code, results in input order
+def generate_many(prompts, max_concurrency=4):
+    async def run():
+        return await AsyncAdvisorClient(max_concurrency).generate_many(prompts)
+    return asyncio.run(run())
@@ -0,0 +1,214 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+RISK_LEVELS = ["low", "medium", "high"]
+DEFAULT_RISK = "medium"
+PROFILE_TYPES = ["Professional", "Student", "Retiree"]
+ALLOCATION_BUCKETS = [
+    "High-Interest Savings / RD",
+    "Stocks / Equity Funds",
+    "ETFs / Balanced Funds",
+    "Debt Mutual Funds / Bonds"
+]
+
+# Built-in investment split per risk level (share of investment capacity), used when no policy file exists
+ALLOCATION_RULES = {
+    "low": {
+        "High-Interest Savings / RD": 0.4,
+        "Debt Mutual Funds / Bonds": 0.4,
+        "ETFs / Balanced Funds": 0.2
+    },
+    "medium": {
+        "Stocks / Equity Funds": 0.3,
+        "ETFs / Balanced Funds": 0.4,
+        "Debt Mutual Funds / Bonds": 0.3
+    },
+    "high": {
+        "Stocks / Equity Funds": 0.5,
+        "ETFs / Balanced Funds": 0.3,
+        "Debt Mutual Funds / Bonds": 0.2
+    }
+}
+DEFAULT_POLICY = {"income_bands": [], "default": ALLOCATION_RULES, "rules": []}
+
+_PROFILE_INDEX = {profile: i for i, profile in enumerate(PROFILE_TYPES)}
+_RISK_INDEX = {risk: i for i, risk in enumerate(RISK_LEVELS)}
+# Extra profile row for unknown or missing profile types: defaults plus rules that name no profile
+UNKNOWN_PROFILE = len(PROFILE_TYPES)
+
+
+def _split(split, where):
+    if not isinstance(split, dict):
+        raise ValueError(f"{where}: split must be an object of bucket shares")
+    unknown = [bucket for bucket in split if bucket not in ALLOCATION_BUCKETS]
+    if unknown:
+        raise ValueError(f"{where}: unknown buckets {', '.join(unknown)}")
+    shares = [float(split.get(bucket, 0.0)) for bucket in ALLOCATION_BUCKETS]
+    if min(shares) < 0 or abs(sum(shares) - 1) > 1e-6:
+        raise ValueError(f"{where}: shares must be non-negative and sum to 1, got {sum(shares):g}")
+    return shares
+
+
+# Position of each bucket in the split as written (buckets it leaves out go last), so allocations keep that order
+def _order(split):
+    declared = list(split)
+    return [declared.index(bucket) if bucket in split else len(ALLOCATION_BUCKETS) for bucket in ALLOCATION_BUCKETS]
+
+
+def _band_range(rule, bands, where):
+    edges = [0.0] + bands + [float("inf")]
+    low = float(rule.get("min_income", 0))
+    high = float(rule.get("max_income", float("inf")))
+    if low not in edges or high not in edges or low >= high:
+        raise ValueError(f"{where}: min_income/max_income must be income band edges with min < max")
+    return edges.index(low), edges.index(high)
+
+
+# Compiled policy: a dense share table indexed [profile, risk, income band, bucket], plus each cell's
+# bucket order as written in the policy
+class AllocationPolicy:
+    def __init__(self, table, income_bands, order=None):
+        self.table = table
+        self.income_bands = income_bands
+        self.band_edges = np.asarray(income_bands, dtype=float)
+        # Nested lists of Python floats for the scalar path (no numpy scalars in analysis dicts)
+        self.rows = table.tolist()
+        # Per cell: (bucket, share) pairs with a non-zero share, in policy order
+        order = np.broadcast_to(np.arange(len(ALLOCATION_BUCKETS)), table.shape) if order is None else order
+        self.splits = np.empty(table.shape[:-1], dtype=object)
+        for cell in np.ndindex(self.splits.shape):
+            shares = table[cell].tolist()
+            self.splits[cell] = tuple(
+                (ALLOCATION_BUCKETS[i], shares[i]) for i in np.argsort(order[cell], kind="stable") if shares[i] > 0
+            )
+        self.splits = self.splits.tolist()
+        # Set by PolicyFile on each (re)load, so cached analyses can tell which policy produced them
+        self.version = 0
+
+    def _cell(self, profile, risk_tolerance, income):
+        p = _PROFILE_INDEX.get(profile, UNKNOWN_PROFILE)
+        r = _RISK_INDEX.get(str(risk_tolerance).lower(), _RISK_INDEX[DEFAULT_RISK])
+        return p, r, bisect_right(self.income_bands, income)
+
+    # Shares in ALLOCATION_BUCKETS order
+    def shares(self, profile, risk_tolerance, income):
+        p, r, b = self._cell(profile, risk_tolerance, income)
+        return self.rows[p][r][b]
+
+    # (bucket, share) pairs for the buckets the split uses, in the order the policy lists them
+    def split(self, profile, risk_tolerance, income):
+        p, r, b = self._cell(profile, risk_tolerance, income)
+        return self.splits[p][r][b]
+
+    # Row indices (see finance_analysis.risk_index / profile_index) and incomes -> shares, shape (..., buckets)
+    def shares_batch(self, profile_index, risk_index, income):
+        return self.table[profile_index, risk_index, np.searchsorted(self.band_edges, income, side="right")]
+
+
+# Policy spec (parsed JSON) -> AllocationPolicy. Every cell starts from the risk default, then rules
+# are applied in file order, later rules winning; a rule may name a profile, a risk level and an income
+# range (band edges), and leaves out whatever it applies to in full.
+def compile_policy(spec):
+    if not isinstance(spec, dict):
+        raise ValueError("policy must be a JSON object")
+    bands = spec.get("income_bands", [])
+    if not isinstance(bands, list) or not all(isinstance(edge, (int, float)) for edge in bands):
+        raise ValueError("income_bands must be a list of amounts")
+    bands = [float(edge) for edge in bands]
+    if bands != sorted(set(bands)) or any(edge <= 0 for edge in bands):
+        raise ValueError("income_bands must be increasing positive amounts")
+    default = spec.get("default", {})
+    if not isinstance(default, dict):
+        raise ValueError("default must be an object of splits per risk level")
+    missing = [risk for risk in RISK_LEVELS if risk not in default]
+    if missing:
+        raise ValueError(f"default: missing risk levels {', '.join(missing)}")
+    rules = spec.get("rules", [])
+    if not isinstance(rules, list):
+        raise ValueError("rules must be a list")
+    table = np.empty((len(PROFILE_TYPES) + 1, len(RISK_LEVELS), len(bands) + 1, len(ALLOCATION_BUCKETS)))
+    order = np.empty(table.shape, dtype=int)
+    for r, risk in enumerate(RISK_LEVELS):
+        table[:, r] = _split(default[risk], f"default.{risk}")
+        order[:, r] = _order(default[risk])
+    for i, rule in enumerate(rules):
+        where = f"rules[{i}]"
+        if not isinstance(rule, dict):
+            raise ValueError(f"{where}: rule must be an object")
+        profiles = slice(None)
+        if "profile" in rule:
+            if rule["profile"] not in _PROFILE_INDEX:
+                raise ValueError(f"{where}: unknown profile {rule['profile']!r}")
+            profiles = _PROFILE_INDEX[rule["profile"]]
+        risks = slice(None)
+        if "risk" in rule:
+            if str(rule["risk"]).lower() not in _RISK_INDEX:
+                raise ValueError(f"{where}: unknown risk level {rule['risk']!r}")
+            risks = _RISK_INDEX[str(rule["risk"]).lower()]
+        low, high = _band_range(rule, bands, where)
+        split = rule.get("split", {})
+        table[profiles, risks, low:high] = _split(split, where)
+        order[profiles, risks, low:high] = _order(split)
+    table.setflags(write=False)
+    return AllocationPolicy(table, bands, order)
+
+
+def load_policy(path):
+    with open(path, encoding="utf-8") as f:
+        return compile_policy(json.load(f))
+
+
+# Policy file with hot reload: the file's mtime is checked at most every check_seconds and the policy
+# recompiled when it changes. A broken edit keeps the last good policy; a missing file means the built-in one.
+class PolicyFile:
+    def __init__(self, path, check_seconds=2.0, clock=time.monotonic):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.policy = compile_policy(DEFAULT_POLICY)
+        self.signature = None
+        self.checked_at = None
+        self.reloads = 0
+        self.error = None
+        self.current()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self):
+        now = self.clock()
+        if self.checked_at is not None and now - self.checked_at < self.check_seconds:
+            return self.policy
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < self.check_seconds:
+                return self.policy
+            self.checked_at = now
+            signature = self._signature() if self.path else None
+            if signature != self.signature:
+                self.signature = signature
+                try:
+                    policy = load_policy(self.path) if signature else compile_policy(DEFAULT_POLICY)
+                    self.error = None
+                    self.reloads += 1
+                    policy.version = self.reloads
+                    self.policy = policy
+                # Whatever is wrong with the file, the app keeps running on the last good policy
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    print(f"Allocation policy {self.path} not loaded, keeping the previous one: {self.error}", file=sys.stderr)
+            return self.policy
+
+    def stats(self):
+        return {"path": self.path, "version": self.policy.version, "reloads": self.reloads, "error": self.error,
+                "income_bands": len(self.policy.income_bands) + 1}
@@ -1,325 +1,277 @@
 import streamlit as st
 import re
-from config import model
-from finance_analysis import analyze_finances
-from ai_advisor import generate_financial_advice, generate_goal_plan, finance_chatbot_response
-from visualization import plot_advised_financial_overview
-from utils import split_advice_sections, split_goal_sections
-
-# Page configuration
-st.set_page_config(
-    page_title="AI Financial Advisor",
-    page_icon="📠",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Load CSS from file
-def load_css():
-    with open('styles.css', 'r') as f:
-        css = f.read()
-    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
-
-load_css()
-
-# Initialize Session State
-if "user_data" not in st.session_state:
-    st.session_state.user_data = None
-if "analysis_data" not in st.session_state:
-    st.session_state.analysis_data = None
-if "generated_advice" not in st.session_state:
-    st.session_state.generated_advice = None
-if "goal_plan" not in st.session_state:
-    st.session_state.goal_plan = None
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
-if "user_query" not in st.session_state:
-    st.session_state.user_query = ""
-
-# HEADER SECTION 
-st.markdown('<div class="main-header"> 🌐 AI Financial Advisor</div>', unsafe_allow_html=True)
-st.markdown('<div class="subheader">Your Personal AI-Powered Financial Planning Assistant</div>', unsafe_allow_html=True)
-
-st.markdown("""
-<div class='hero-section' style='text-align: center;'>
-    <h2 style='color: white; font-size: 2.5rem; margin-bottom: 1rem;'>Take Control of Your Financial Future</h2>
-    <p style='font-size: 1.2rem; color: #f0f0f0; margin-bottom: 0.5rem;'>
-    Get personalized financial advice, investment strategies, and goal planning powered by AI
-    </p>
-</div>
-""", unsafe_allow_html=True)
-
-# Features Grid
-st.markdown("### 📠 What You Can Do")
-feature_col1, feature_col2, feature_col3, feature_col4 = st.columns(4)
-
-with feature_col1:
-    st.markdown("""
-    <div class='feature-card'>
-        <h4>📊 Financial Health</h4>
-        <p>Track income, expenses, savings, and debts with interactive visualizations</p>
-    </div>
-    """, unsafe_allow_html=True)
+import uuid
+from itertools import chain
+import pandas as pd
+from finance_analysis import analyze_finances, allocation_policy
+from ai_advisor import is_fallback
+from local_advice import build_local_advice
+from chat import ChatSession
+from pipeline import Pipeline, CACHED
+from tracing import span, tracer
+from config import DEBUG_PANEL, TRACE_OTLP_PATH, STORE_DB_PATH, CHART_BACKEND, SERVICE_WORKERS, SERVICE_MAX_PENDING_PER_SESSION
+from store import ResultStore, PROFILE, ANALYSIS, ADVICE, GOAL_PLAN, CHAT
+from service import AdvisorService
+from visualization import advised_overview_spec, what_if_spec
+from what_if import what_if_grid, sweep_range, GRID_FIELDS, GRID_METRICS, METRIC_LABELS, FIELD_LABELS, RISK_LABELS
+from projection import project_cash_flow, MIN_YEARS, MAX_YEARS
+from monte_carlo import simulate_goal_success, format_goal_success
+from utils import split_advice_sections, split_goal_sections, iter_advice_sections, iter_goal_sections
+
+# One span per script run: stage spans of this rerun nest under it, and it still ends when the run
+# stops early (st.rerun) or raises
+with span("app.rerun"):
+    # Page configuration
+    st.set_page_config(
+        page_title="AI Financial Advisor",
+        page_icon="📠",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
 
-with feature_col2:
-    st.markdown("""
-    <div class='feature-card'>
-        <h4>📝 Personalized Advice</h4>
-        <p>Get actionable recommendations tailored to your financial profile</p>
-    </div>
-    """, unsafe_allow_html=True)
+    # Load CSS from file
+    def load_css():
+        with open('styles.css', 'r') as f:
+            css = f.read()
+        st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
 
-with feature_col3:
-    st.markdown("""
-    <div class='feature-card'>
-        <h4>🎯 Goal Planning</h4>
-        <p>Create detailed plans for your short-term and long-term financial goals</p>
-    </div>
-    """, unsafe_allow_html=True)
+    load_css()
+
+    # Collect streamed chunks into a list while passing them through
+    def collect_chunks(chunks, parts):
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+
+    # Show which pipeline stages were served from cache on this run
+    def show_stage_status(pipeline, names):
+        labels = [f"{name.replace('_', ' ')}: {'served from cache' if pipeline.status.get(name) == CACHED else 'recomputed'}"
+                  for name in names]
+        st.caption("Pipeline · " + " · ".join(labels))
+
+    # Render (title, html) sections into two columns as they become available
+    def render_section_cards(sections, card_class):
+        col1, col2 = st.columns(2)
+        for i, (title, content_html) in enumerate(sections):
+            with col1 if i % 2 == 0 else col2:
+                st.markdown(f"""
+                    <div class='{card_class}'>
+                        {f"<h4 style='color: #667eea; margin-bottom: 10px;'>{title}</h4>" if title else ""}
+                        {content_html}
+                    </div>
+                """, unsafe_allow_html=True)
+
+    # Analysis inputs: the profile plus the allocation policy version, so a reloaded policy recomputes the analysis
+    def analysis_inputs(user_data):
+        return dict(user_data, allocation_policy=allocation_policy.current().version)
+
+    # Process-wide result store (write-behind, so saving never blocks a rerun)
+    @st.cache_resource
+    def get_store():
+        return ResultStore(STORE_DB_PATH) if STORE_DB_PATH else None
+
+    # Process-wide advisor service: bounded LLM worker pool with per-session fair queueing, shared caches
+    @st.cache_resource
+    def get_service():
+        return AdvisorService(SERVICE_WORKERS, SERVICE_MAX_PENDING_PER_SESSION)
+
+    def persist(kind, payload):
+        store = get_store()
+        if store is not None:
+            store.save(st.session_state.session_id, kind, payload)
+
+    # Restore results saved under this session id (kept in the URL so a refresh finds them again)
+    def restore_session(saved):
+        pipeline = st.session_state.pipeline
+        profile = saved[PROFILE]
+        if profile and saved[ANALYSIS]:
+            st.session_state.analysis_data = pipeline.store("analysis", analysis_inputs(profile), saved[ANALYSIS])
+        if profile and saved[ADVICE]:
+            st.session_state.generated_advice = pipeline.store("advice", profile, saved[ADVICE]["text"])
+        if saved[GOAL_PLAN]:
+            st.session_state.goal_plan = pipeline.store("goal_plan", saved[GOAL_PLAN]["inputs"], saved[GOAL_PLAN]["text"])
+        st.session_state.chat_session.restore((turn["question"], turn["answer"]) for turn in saved[CHAT])
+        pipeline.status.clear()
+
+    # Initialize Session State
+    if "user_data" not in st.session_state:
+        st.session_state.user_data = None
+    if "analysis_data" not in st.session_state:
+        st.session_state.analysis_data = None
+    if "generated_advice" not in st.session_state:
+        st.session_state.generated_advice = None
+    if "goal_plan" not in st.session_state:
+        st.session_state.goal_plan = None
+    if "pipeline" not in st.session_state:
+        st.session_state.pipeline = Pipeline()
+    if "chat_session" not in st.session_state:
+        st.session_state.chat_session = ChatSession()
+    if "user_query" not in st.session_state:
+        st.session_state.user_query = ""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+        st.query_params["session"] = st.session_state.session_id
+        saved = get_store().load_session(st.session_state.session_id) if get_store() else None
+        st.session_state.saved_profile = (saved and saved[PROFILE]) or {}
+        if saved:
+            restore_session(saved)
+    saved_profile = st.session_state.saved_profile
+
+    # HEADER SECTION 
+    st.markdown('<div class="main-header"> 🌐 AI Financial Advisor</div>', unsafe_allow_html=True)
+    st.markdown('<div class="subheader">Your Personal AI-Powered Financial Planning Assistant</div>', unsafe_allow_html=True)
 
-with feature_col4:
     st.markdown("""
-    <div class='feature-card'>
-        <h4>💬 AI Chat Support</h4>
-        <p>Get instant answers to your financial questions anytime with using AI</p>
+    <div class='hero-section' style='text-align: center;'>
+        <h2 style='color: white; font-size: 2.5rem; margin-bottom: 1rem;'>Take Control of Your Financial Future</h2>
+        <p style='font-size: 1.2rem; color: #f0f0f0; margin-bottom: 0.5rem;'>
+        Get personalized financial advice, investment strategies, and goal planning powered by AI
+        </p>
     </div>
     """, unsafe_allow_html=True)
 
-st.markdown("---")
+    # Features Grid
+    st.markdown("### 📠 What You Can Do")
+    feature_col1, feature_col2, feature_col3, feature_col4 = st.columns(4)
 
-# SIDEBAR INPUTS
-with st.sidebar:
-    st.markdown(" ")
-    profile = st.selectbox(
-        "Select Profile Type:", 
-        ["Professional", "Student", "Retiree"],
-        help="Choose the profile that best matches your current financial situation"
-    )
+    with feature_col1:
+        st.markdown("""
+        <div class='feature-card'>
+            <h4>📊 Financial Health</h4>
+            <p>Track income, expenses, savings, and debts with interactive visualizations</p>
+        </div>
+        """, unsafe_allow_html=True)
 
-    if profile == "Student":
-        income = st.number_input(
-            "Monthly Pocket Money (₹):", 
-            step=10000, 
-            min_value=0,
-            help="Total monthly pocket money received from family"
-        )
-        part_time = st.selectbox(
-            "Do you have part-time income?", 
-            ["No", "Yes"],
-            help="Select if you have additional income from part-time work"
+    with feature_col2:
+        st.markdown("""
+        <div class='feature-card'>
+            <h4>📝 Personalized Advice</h4>
+            <p>Get actionable recommendations tailored to your financial profile</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with feature_col3:
+        st.markdown("""
+        <div class='feature-card'>
+            <h4>🎯 Goal Planning</h4>
+            <p>Create detailed plans for your short-term and long-term financial goals</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with feature_col4:
+        st.markdown("""
+        <div class='feature-card'>
+            <h4>💬 AI Chat Support</h4>
+            <p>Get instant answers to your financial questions anytime with using AI</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.markdown("---")
+
+    # SIDEBAR INPUTS
+    with st.sidebar:
+        st.markdown(" ")
+        profile = st.selectbox(
+            "Select Profile Type:", 
+            ["Professional", "Student", "Retiree"],
+            index=["Professional", "Student", "Retiree"].index(saved_profile.get("profile", "Professional")),
+            help="Choose the profile that best matches your current financial situation"
         )
-        if part_time == "Yes":
-            extra_income = st.number_input(
-                "Monthly Part-Time Income (₹):", 
-                step=5000, 
+
+        if profile == "Student":
+            income = st.number_input(
+                "Monthly Pocket Money (₹):", 
+                step=10000, 
                 min_value=0,
-                help="Additional income from part-time jobs or freelancing"
+                value=int(saved_profile.get("income", 0)),
+                help="Total monthly pocket money received from family"
             )
-            income += extra_income
-    elif profile == "Professional":
-        income = st.number_input(
-            "Monthly Salary (₹):", 
-            step=10000, 
+            part_time = st.selectbox(
+                "Do you have part-time income?", 
+                ["No", "Yes"],
+                help="Select if you have additional income from part-time work"
+            )
+            if part_time == "Yes":
+                extra_income = st.number_input(
+                    "Monthly Part-Time Income (₹):", 
+                    step=5000, 
+                    min_value=0,
+                    help="Additional income from part-time jobs or freelancing"
+                )
+                income += extra_income
+        elif profile == "Professional":
+            income = st.number_input(
+                "Monthly Salary (₹):", 
+                step=10000, 
+                min_value=0,
+                value=int(saved_profile.get("income", 0)),
+                help="Your take-home salary after all deductions"
+            )
+        else:
+            income = st.number_input(
+                "Monthly Pension / Passive Income (₹):", 
+                step=10000, 
+                min_value=0,
+                value=int(saved_profile.get("income", 0)),
+                help="Monthly pension, rental income, or other passive income sources"
+            )
+
+        expenses = st.number_input(
+            "Monthly Expenses (₹):", 
+            step=5000, 
             min_value=0,
-            help="Your take-home salary after all deductions"
+            value=int(saved_profile.get("expenses", 0)),
+            help="Total monthly spending including rent, food, utilities, transportation, etc."
         )
-    else:
-        income = st.number_input(
-            "Monthly Pension / Passive Income (₹):", 
+
+        existing_savings = st.number_input(
+            "Existing Savings & Investments (₹):", 
             step=10000, 
             min_value=0,
-            help="Monthly pension, rental income, or other passive income sources"
+            value=int(saved_profile.get("existing_savings", 0)),
+            help="Total amount currently saved in bank accounts, investments, FDs, mutual funds, etc."
         )
 
-    expenses = st.number_input(
-        "Monthly Expenses (₹):", 
-        step=5000, 
-        min_value=0,
-        help="Total monthly spending including rent, food, utilities, transportation, etc."
-    )
-    
-    existing_savings = st.number_input(
-        "Existing Savings & Investments (₹):", 
-        step=10000, 
-        min_value=0,
-        help="Total amount currently saved in bank accounts, investments, FDs, mutual funds, etc."
-    )
-    
-    debts = st.number_input(
-        "Total Debts (₹):", 
-        step=5000, 
-        min_value=0,
-        help="Total outstanding loans including education loan, personal loan, credit card debt, etc."
-    )
-    
-    goals_input = st.text_area(
-        "Financial Goals (comma-separated)", 
-        placeholder="e.g., Buy a house, Retirement, Emergency Fund, Marriage",
-        height=80,
-        help="List your financial goals separated by commas. Be specific about what you want to achieve."
-    )
-    goals = [goal.strip() for goal in goals_input.split(",") if goal.strip()]
-    
-    risk_tolerance = st.selectbox(
-        "Risk Tolerance:", 
-        ["Low", "Medium", "High"],
-        help="Low: Prefer safe investments | Medium: Balanced approach | High: Willing to take risks for higher returns"
-    )
-
-    st.session_state.user_data = {
-        "profile": profile,
-        "income": income,
-        "expenses": expenses,
-        "debts": debts,
-        "existing_savings": existing_savings,
-        "goals": goals,
-        "risk_tolerance": risk_tolerance
-    }
-
-    generate_btn = st.button("Financial Analysis & Advice")
-
+        debts = st.number_input(
+            "Total Debts (₹):", 
+            step=5000, 
+            min_value=0,
+            value=int(saved_profile.get("debts", 0)),
+            help="Total outstanding loans including education loan, personal loan, credit card debt, etc."
+        )
 
-# MAIN CONTENT AREA
-if st.session_state.user_data and st.session_state.user_data['income'] > 0:
+        goals_input = st.text_area(
+            "Financial Goals (comma-separated)", 
+            value=", ".join(saved_profile.get("goals", [])),
+            placeholder="e.g., Buy a house, Retirement, Emergency Fund, Marriage",
+            height=80,
+            help="List your financial goals separated by commas. Be specific about what you want to achieve."
+        )
+        goals = [goal.strip() for goal in goals_input.split(",") if goal.strip()]
 
-    st.markdown("""
-    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                padding: 1.5rem; 
-                border-radius: 15px; 
-                text-align: center; 
-                margin-bottom: 2rem;
-                box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
-        <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-        🔢 Your Financial Summary
-        </h1>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    if generate_btn:
-        st.session_state.analysis_data = analyze_finances(st.session_state.user_data)
-        st.session_state.generated_advice = generate_financial_advice(
-            st.session_state.user_data,
-            st.session_state.analysis_data
+        risk_tolerance = st.selectbox(
+            "Risk Tolerance:", 
+            ["Low", "Medium", "High"],
+            index=["Low", "Medium", "High"].index(saved_profile.get("risk_tolerance", "Medium")),
+            help="Low: Prefer safe investments | Medium: Balanced approach | High: Willing to take risks for higher returns"
         )
-    
-    if st.session_state.analysis_data:
-        ad = st.session_state.analysis_data
-        
-        # Key Metrics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{st.session_state.user_data['income']:,.0f}</h3>
-                <p>Monthly Income</p>
-            </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{ad['savings']:,.0f}</h3>
-                <p>Monthly Savings</p>
-            </div>
-            """, unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>{ad['savings_ratio']*100:.1f}%</h3>
-                <p>Savings Ratio</p>
-            </div>
-            """, unsafe_allow_html=True)
-        with col4:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{ad['investment_capacity']:,.0f}</h3>
-                <p>Investment Capacity</p>
-            </div>
-            """, unsafe_allow_html=True)
 
-        st.markdown(" ")
-        st.markdown(" ")
+        st.session_state.user_data = {
+            "profile": profile,
+            "income": income,
+            "expenses": expenses,
+            "debts": debts,
+            "existing_savings": existing_savings,
+            "goals": goals,
+            "risk_tolerance": risk_tolerance
+        }
 
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{ad['total_net_worth']:,.0f}</h3>
-                <p>Total Net Worth</p>
-            </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{st.session_state.user_data['existing_savings']:,.0f}</h3>
-                <p>Existing Savings</p>
-            </div>
-            """, unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h3>₹{ad['emergency_fund']:,.0f}</h3>
-                <p>Emergency Fund Target</p>
-            </div>
-            """, unsafe_allow_html=True)
+        generate_btn = st.button("Financial Analysis & Advice")
 
-        # Progress Indicators
-        st.markdown(" ")
-        st.markdown(" ")
-        st.markdown("#### Financial Health Indicators")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("**Savings Rate**")
-            savings_progress = min(ad['savings_ratio'] * 100 / 50, 1.0)
-            st.markdown(f"""
-            <div class='progress-bar'>
-                <div class='progress-fill' style='width: {savings_progress*100}%'></div>
-            </div>
-            <small>{ad['savings_ratio']*100:.1f}% (Target: 20-50%)</small>
-            """, unsafe_allow_html=True)
-            
-        with col2:
-            st.markdown("**Debt-to-Income Ratio**")
-            debt_progress = min(ad['debt_to_income_ratio'] * 100 / 40, 1.0)
-            st.markdown(f"""
-            <div class='progress-bar'>
-                <div class='progress-fill' style='width: {debt_progress*100}%; background: {'#ff6b6b' if ad['debt_to_income_ratio'] > 0.4 else '#667eea'}'></div>
-            </div>
-            <small>{ad['debt_to_income_ratio']*100:.1f}% (Safe: <40%)</small>
-            """, unsafe_allow_html=True)
 
-        st.markdown("---")
-        
-        # Financial Advice Section
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 1.5rem; 
-                    border-radius: 15px; 
-                    text-align: center; 
-                    margin-bottom: 2rem;
-                    box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
-            <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-            💡 Your Personalized Financial Plan
-            </h1>
-        </div>
-        """, unsafe_allow_html=True)
+    # MAIN CONTENT AREA
+    if st.session_state.user_data and st.session_state.user_data['income'] > 0:
 
-        if st.session_state.generated_advice:
-            sections = split_advice_sections(st.session_state.generated_advice)
-            
-            col1, col2 = st.columns(2)
-            
-            for i, (title, content_html) in enumerate(sections):
-                with col1 if i % 2 == 0 else col2:
-                    st.markdown(f"""
-                        <div class='card'>
-                            {f"<h4 style='color: #667eea; margin-bottom: 10px;'>{title}</h4>" if title else ""}
-                            {content_html}
-                        </div>
-                    """, unsafe_allow_html=True)
-
-        # Visualizations
-        st.markdown(" ")
         st.markdown("""
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 1.5rem; 
@@ -328,52 +280,115 @@ if st.session_state.user_data and st.session_state.user_data['income'] > 0:
                     margin-bottom: 2rem;
                     box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
             <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-            💹 Financial Overview Visualizations
-            </h1>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown(" ")
-        fig2 = plot_advised_financial_overview(st.session_state.user_data, ad)
-        st.pyplot(fig2)
-            
-        # Advanced Planning Input
-        st.markdown("---")
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 1.5rem; 
-                    border-radius: 15px; 
-                    text-align: center; 
-                    margin-bottom: 2rem;
-                    box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
-            <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-            🧩 Advanced Planning
+            🔢 Your Financial Summary
             </h1>
         </div>
         """, unsafe_allow_html=True)
 
-        user_instructions = st.text_area(
-            "Your Specific Instructions:", 
-            placeholder="e.g., I want to save 30% of income directly, Pay debt as fast as possible, Reach goal in 2 years, Invest only in stocks, etc.",
-            height=80,
-            help="Enter your specific financial instructions that will be prioritized above all else"
-        )
-        
-        advanced_plan_btn = st.button("🎲 Generate Advanced Goal Plan", use_container_width=True)
-        
-        if advanced_plan_btn:
-            if not user_instructions.strip():
-                st.warning("Please enter your specific instructions for advanced planning")
+        pipeline = st.session_state.pipeline
+        stream_advice = False
+        if generate_btn:
+            user_data = st.session_state.user_data
+            pipeline.status.clear()
+            with span("analyze_finances"):
+                st.session_state.analysis_data = pipeline.run("analysis", analysis_inputs(user_data), lambda: analyze_finances(user_data))
+            persist(PROFILE, user_data)
+            persist(ANALYSIS, st.session_state.analysis_data)
+            if pipeline.is_fresh("advice", user_data):
+                st.session_state.generated_advice = pipeline.mark_cached("advice")
             else:
-                with st.spinner("Creating advanced plan with your specific instructions..."):
-                    st.session_state.goal_plan = generate_goal_plan(
-                        st.session_state.user_data,
-                        st.session_state.analysis_data,
-                        user_instructions
-                    )
-        
-        if st.session_state.goal_plan:
+                stream_advice = True
+            show_stage_status(pipeline, ["analysis", "advice"])
+
+        if st.session_state.analysis_data:
+            ad = st.session_state.analysis_data
+
+            # Key Metrics
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{st.session_state.user_data['income']:,.0f}</h3>
+                    <p>Monthly Income</p>
+                </div>
+                """, unsafe_allow_html=True)
+            with col2:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{ad['savings']:,.0f}</h3>
+                    <p>Monthly Savings</p>
+                </div>
+                """, unsafe_allow_html=True)
+            with col3:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>{ad['savings_ratio']*100:.1f}%</h3>
+                    <p>Savings Ratio</p>
+                </div>
+                """, unsafe_allow_html=True)
+            with col4:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{ad['investment_capacity']:,.0f}</h3>
+                    <p>Investment Capacity</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+            st.markdown(" ")
+            st.markdown(" ")
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{ad['total_net_worth']:,.0f}</h3>
+                    <p>Total Net Worth</p>
+                </div>
+                """, unsafe_allow_html=True)
+            with col2:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{st.session_state.user_data['existing_savings']:,.0f}</h3>
+                    <p>Existing Savings</p>
+                </div>
+                """, unsafe_allow_html=True)
+            with col3:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <h3>₹{ad['emergency_fund']:,.0f}</h3>
+                    <p>Emergency Fund Target</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # Progress Indicators
+            st.markdown(" ")
+            st.markdown(" ")
+            st.markdown("#### Financial Health Indicators")
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown("**Savings Rate**")
+                savings_progress = min(ad['savings_ratio'] * 100 / 50, 1.0)
+                st.markdown(f"""
+                <div class='progress-bar'>
+                    <div class='progress-fill' style='width: {savings_progress*100}%'></div>
+                </div>
+                <small>{ad['savings_ratio']*100:.1f}% (Target: 20-50%)</small>
+                """, unsafe_allow_html=True)
+
+            with col2:
+                st.markdown("**Debt-to-Income Ratio**")
+                debt_progress = min(ad['debt_to_income_ratio'] * 100 / 40, 1.0)
+                st.markdown(f"""
+                <div class='progress-bar'>
+                    <div class='progress-fill' style='width: {debt_progress*100}%; background: {'#ff6b6b' if ad['debt_to_income_ratio'] > 0.4 else '#667eea'}'></div>
+                </div>
+                <small>{ad['debt_to_income_ratio']*100:.1f}% (Safe: <40%)</small>
+                """, unsafe_allow_html=True)
 
             st.markdown("---")
+
+            # Financial Advice Section
             st.markdown("""
             <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                         padding: 1.5rem; 
@@ -382,126 +397,307 @@ if st.session_state.user_data and st.session_state.user_data['income'] > 0:
                         margin-bottom: 2rem;
                         box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
                 <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-                🎯 Goal-Oriented Planning
+                💡 Your Personalized Financial Plan
                 </h1>
             </div>
             """, unsafe_allow_html=True)
 
-            sections = split_goal_sections(st.session_state.goal_plan)
-            
-            col1, col2 = st.columns(2)
-            
-            for i, (title, content_html) in enumerate(sections):
-                with col1 if i % 2 == 0 else col2:
-                    st.markdown(f"""
-                        <div class='goal-card'>
-                            {f"<h4 style='color: #667eea; margin-bottom: 10px;'>{title}</h4>" if title else ""}
-                            {content_html}
-                        </div>
-                    """, unsafe_allow_html=True)
-
-else:
+            advice_span = tracer.start("render.advice", streamed=stream_advice)
+            if stream_advice:
+                # Instant first render from the rule-based plan, replaced once the first AI section arrives
+                advice_area = st.empty()
+                with advice_area.container():
+                    st.caption("Quick plan computed from your numbers; personalized AI advice is on its way...")
+                    render_section_cards(split_advice_sections(build_local_advice(st.session_state.user_data, ad)), "card")
+                advice_parts = []
+                sections = iter_advice_sections(collect_chunks(
+                    get_service().stream_advice(st.session_state.session_id, st.session_state.user_data, ad),
+                    advice_parts
+                ))
+                first_section = next(sections, None)
+                with advice_area.container():
+                    render_section_cards(chain([first_section] if first_section else [], sections), "card")
+                st.session_state.generated_advice = "".join(advice_parts).strip()
+                if not is_fallback(st.session_state.generated_advice):
+                    pipeline.store("advice", st.session_state.user_data, st.session_state.generated_advice)
+                    persist(ADVICE, {"text": st.session_state.generated_advice})
+            elif st.session_state.generated_advice:
+                render_section_cards(split_advice_sections(st.session_state.generated_advice), "card")
+            if st.session_state.generated_advice and is_fallback(st.session_state.generated_advice):
+                st.info(st.session_state.generated_advice.split("\n", 1)[0])
+            tracer.end(advice_span)
+
+            # Visualizations
+            st.markdown(" ")
+            st.markdown("""
+            <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                        padding: 1.5rem; 
+                        border-radius: 15px; 
+                        text-align: center; 
+                        margin-bottom: 2rem;
+                        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
+                <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
+                💹 Financial Overview Visualizations
+                </h1>
+            </div>
+            """, unsafe_allow_html=True)
+            st.markdown(" ")
+            with span("render.chart", backend=CHART_BACKEND):
+                if CHART_BACKEND == "matplotlib":
+                    st.image(get_service().chart(st.session_state.user_data, ad), use_container_width=True)
+                else:
+                    st.vega_lite_chart(advised_overview_spec(st.session_state.user_data, ad), use_container_width=True)
+
+            # Cash-flow Projection
+            st.markdown("#### Projected Balances")
+            projection_years = st.slider("Projection horizon (years):", MIN_YEARS, MAX_YEARS, 10)
+            projection = project_cash_flow(st.session_state.user_data, ad, years=projection_years)
+            st.line_chart(pd.DataFrame({
+                "Net Worth": projection["net_worth"],
+                "Investments": projection["total_investments"],
+                "Emergency Fund": projection["emergency_fund"],
+                "Debt": projection["debt"]
+            }, index=pd.Index(projection["months"] / 12, name="Years")))
+
+            # What-if Explorer: metric heatmap over two swept fields, computed locally (no AI call)
+            st.markdown("#### What-if Explorer")
+            metric_col, x_col, y_col, spread_col = st.columns(4)
+            with metric_col:
+                what_if_metric = st.selectbox("Metric:", GRID_METRICS, format_func=lambda m: METRIC_LABELS[m][0])
+            with x_col:
+                x_field = st.selectbox("Horizontal axis:", GRID_FIELDS, index=0, format_func=FIELD_LABELS.get)
+            with y_col:
+                y_options = [field for field in GRID_FIELDS if field != x_field]
+                y_field = st.selectbox("Vertical axis:", y_options, index=y_options.index("expenses") if "expenses" in y_options else 0,
+                                       format_func=FIELD_LABELS.get)
+            with spread_col:
+                what_if_spread = st.slider("Range (± %):", 10, 100, 50, step=10)
+            what_if_ranges = {
+                field: RISK_LABELS if field == "risk_tolerance" else sweep_range(
+                    st.session_state.user_data[field], what_if_spread / 100, steps=25, scale=st.session_state.user_data["income"]
+                )
+                for field in (x_field, y_field)
+            }
+            with span("what_if.grid", x=x_field, y=y_field):
+                what_if = what_if_grid(st.session_state.user_data, what_if_ranges, [what_if_metric])
+            st.vega_lite_chart(what_if_spec(what_if, what_if_metric, x_field, y_field), use_container_width=True)
+
+            # Advanced Planning Input
+            st.markdown("---")
+            st.markdown("""
+            <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                        padding: 1.5rem; 
+                        border-radius: 15px; 
+                        text-align: center; 
+                        margin-bottom: 2rem;
+                        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
+                <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
+                🧩 Advanced Planning
+                </h1>
+            </div>
+            """, unsafe_allow_html=True)
+
+            user_instructions = st.text_area(
+                "Your Specific Instructions:", 
+                placeholder="e.g., I want to save 30% of income directly, Pay debt as fast as possible, Reach goal in 2 years, Invest only in stocks, etc.",
+                height=80,
+                help="Enter your specific financial instructions that will be prioritized above all else"
+            )
+
+            goal_targets = {}
+            if st.session_state.user_data['goals']:
+                with st.expander("Goal Targets (optional)"):
+                    for goal in st.session_state.user_data['goals']:
+                        target_col, years_col = st.columns(2)
+                        with target_col:
+                            amount = st.number_input(f"{goal} - Target Amount (₹):", min_value=0, step=50000, key=f"goal_amount_{goal}")
+                        with years_col:
+                            years = st.number_input(f"{goal} - Years to Reach:", min_value=1, max_value=MAX_YEARS, value=5, key=f"goal_years_{goal}")
+                        if amount > 0:
+                            goal_targets[goal] = (amount, years * 12)
+
+            advanced_plan_btn = st.button("🎲 Generate Advanced Goal Plan", use_container_width=True)
+
+            stream_plan = False
+            goal_outlook = ""
+            if advanced_plan_btn:
+                if not user_instructions.strip():
+                    st.warning("Please enter your specific instructions for advanced planning")
+                else:
+                    stream_plan = True
+                    if goal_targets:
+                        goal_odds = simulate_goal_success(
+                            st.session_state.analysis_data, goal_targets, seed=0, user_data=st.session_state.user_data
+                        )
+                        goal_outlook = format_goal_success(goal_odds)
+                        st.dataframe(pd.DataFrame([{
+                            "Goal": r["name"],
+                            "Target (₹)": f"{r['amount']:,.0f}",
+                            "By": f"{r['target_date']:%b %Y}",
+                            "Success Probability": f"{r['probability'] * 100:.0f}%",
+                            "Median Outcome (₹)": f"{r['median']:,.0f}"
+                        } for r in goal_odds]), hide_index=True, use_container_width=True)
+                    plan_inputs = dict(st.session_state.user_data, user_instructions=user_instructions, goal_outlook=goal_outlook)
+                    if pipeline.is_fresh("goal_plan", plan_inputs):
+                        st.session_state.goal_plan = pipeline.mark_cached("goal_plan")
+                        stream_plan = False
+                    show_stage_status(pipeline, ["goal_plan"])
+
+            if stream_plan or st.session_state.goal_plan:
+
+                st.markdown("---")
+                st.markdown("""
+                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                            padding: 1.5rem; 
+                            border-radius: 15px; 
+                            text-align: center; 
+                            margin-bottom: 2rem;
+                            box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
+                    <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
+                    🎯 Goal-Oriented Planning
+                    </h1>
+                </div>
+                """, unsafe_allow_html=True)
+
+                plan_span = tracer.start("render.goal_plan", streamed=stream_plan)
+                if stream_plan:
+                    plan_parts = []
+                    render_section_cards(iter_goal_sections(collect_chunks(
+                        get_service().stream_goal_plan(
+                            st.session_state.session_id, st.session_state.user_data, st.session_state.analysis_data,
+                            user_instructions, goal_outlook
+                        ),
+                        plan_parts
+                    )), "goal-card")
+                    st.session_state.goal_plan = "".join(plan_parts).strip()
+                    if not is_fallback(st.session_state.goal_plan):
+                        pipeline.store("goal_plan", plan_inputs, st.session_state.goal_plan)
+                        persist(GOAL_PLAN, {"inputs": plan_inputs, "text": st.session_state.goal_plan})
+                else:
+                    render_section_cards(split_goal_sections(st.session_state.goal_plan), "goal-card")
+                tracer.end(plan_span)
+
+    else:
+
+        st.markdown("""
+        <div style='text-align: center; padding: 4rem 2rem; background: #f8f9fa; border-radius: 15px;'>
+            <h3 style='color: #667eea; margin-bottom: 1rem;'>Welcome to Your AI Financial Advisor! 👋</h3>
+            <p style='font-size: 1.1rem; color: #666; margin-bottom: 2rem;'>
+                To get started, please enter your financial details in the sidebar and click 
+                <strong>"Generate Financial Analysis & Advice"</strong> to receive your personalized financial plan.
+            </p>
+            <div style='font-size: 2rem; margin-bottom: 1rem;'>⬅️</div>
+            <p>Fill out the form in the sidebar to begin</p>
+        </div>
+        """, unsafe_allow_html=True)
 
+    # CHATBOT SECTION 
+    st.markdown("---")
     st.markdown("""
-    <div style='text-align: center; padding: 4rem 2rem; background: #f8f9fa; border-radius: 15px;'>
-        <h3 style='color: #667eea; margin-bottom: 1rem;'>Welcome to Your AI Financial Advisor! 👋</h3>
-        <p style='font-size: 1.1rem; color: #666; margin-bottom: 2rem;'>
-            To get started, please enter your financial details in the sidebar and click 
-            <strong>"Generate Financial Analysis & Advice"</strong> to receive your personalized financial plan.
+    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                padding: 1.5rem; 
+                border-radius: 15px; 
+                text-align: center; 
+                margin-bottom: 2rem;
+                box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
+        <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
+        💬 Financial Assistant Chat
+        </h1>
+        <p style='font-size: 1rem; color: rgba(255,255,255,0.9); margin-bottom: 0;'>
+        Your AI Financial Expert
         </p>
-        <div style='font-size: 2rem; margin-bottom: 1rem;'>⬅️</div>
-        <p>Fill out the form in the sidebar to begin</p>
     </div>
     """, unsafe_allow_html=True)
 
-# CHATBOT SECTION 
-st.markdown("---")
-st.markdown("""
-<div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-            padding: 1.5rem; 
-            border-radius: 15px; 
-            text-align: center; 
-            margin-bottom: 2rem;
-            box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3);'>
-    <h1 style='font-size: 2rem; font-weight: 700; color: white; margin-bottom: 0.3rem;'>
-    💬 Financial Assistant Chat
-    </h1>
-    <p style='font-size: 1rem; color: rgba(255,255,255,0.9); margin-bottom: 0;'>
-    Your AI Financial Expert
-    </p>
-</div>
-""", unsafe_allow_html=True)
-
-chat_col1, chat_col2 = st.columns([2, 1])
-
-with chat_col1:
-
-    chat_container = st.container()
-    with chat_container:
-        for msg in st.session_state.chat_history:
-            if msg['user']:
-                st.markdown(f'<div class="user-message">{msg["user"]}</div>', unsafe_allow_html=True)
-            if msg['bot']:
-                st.markdown(f'<div class="bot-message">{msg["bot"]}</div>', unsafe_allow_html=True)
-
-    # Chat Input
-    st.session_state.user_query = st.text_area(
-        "Ask your financial question:",
-        value=st.session_state.user_query,
-        placeholder="e.g., How much should I invest monthly for retirement? What's the best way to pay off my debt?",
-        height=80,
-        key="chat_input",
-        help="Enter your financial question here, and the AI will provide personalized advice based on your profile and goals. e.g., 'What's the best way to pay off my debt?', 'How much should I invest monthly for retirement?', etc."
-    )
+    chat_col1, chat_col2 = st.columns([2, 1])
 
-    ask_col1, ask_col2, ask_col3 = st.columns([1, 2, 1])
-    with ask_col2:
-        ask_btn = st.button("📨 Send Message", use_container_width=True)
-
-    if ask_btn:
-        if not st.session_state.user_query.strip():
-            st.warning("Please enter a question before sending.")
-        elif not st.session_state.user_data or st.session_state.user_data.get("income", 0) == 0:
-            st.error("Please enter your financial details in the sidebar before using the chatbot.")
-        elif not st.session_state.analysis_data:
-            st.error("Please generate your financial analysis first.")
-        else:
-            with st.spinner("Analyzing your question..."):
+    with chat_col1:
+
+        chat_container = st.container()
+        with chat_container:
+            with span("render.chat", turns=len(st.session_state.chat_session.turns)):
+                st.markdown(st.session_state.chat_session.render_html(), unsafe_allow_html=True)
+
+        # Chat Input
+        st.session_state.user_query = st.text_area(
+            "Ask your financial question:",
+            value=st.session_state.user_query,
+            placeholder="e.g., How much should I invest monthly for retirement? What's the best way to pay off my debt?",
+            height=80,
+            key="chat_input",
+            help="Enter your financial question here, and the AI will provide personalized advice based on your profile and goals. e.g., 'What's the best way to pay off my debt?', 'How much should I invest monthly for retirement?', etc."
+        )
+
+        ask_col1, ask_col2, ask_col3 = st.columns([1, 2, 1])
+        with ask_col2:
+            ask_btn = st.button("📨 Send Message", use_container_width=True)
+
+        if ask_btn:
+            if not st.session_state.user_query.strip():
+                st.warning("Please enter a question before sending.")
+            elif not st.session_state.user_data or st.session_state.user_data.get("income", 0) == 0:
+                st.error("Please enter your financial details in the sidebar before using the chatbot.")
+            elif not st.session_state.analysis_data:
+                st.error("Please generate your financial analysis first.")
+            else:
+                with chat_container:
+                    st.markdown(f'<div class="user-message">{st.session_state.user_query}</div>', unsafe_allow_html=True)
+                    bot_placeholder = st.empty()
                 try:
-                    response = finance_chatbot_response(
+                    response = ""
+                    for chunk in get_service().stream_chat(
+                        st.session_state.session_id,
+                        st.session_state.chat_session,
                         st.session_state.user_data,
                         st.session_state.analysis_data,
                         st.session_state.user_query
-                    )
-                    st.session_state.chat_history.append({
-                        "user": st.session_state.user_query,
-                        "bot": response
-                    })
+                    ):
+                        response += chunk
+                        bot_placeholder.markdown(f'<div class="bot-message">{response}</div>', unsafe_allow_html=True)
+                    if not is_fallback(response):
+                        persist(CHAT, {"question": st.session_state.user_query, "answer": response.strip()})
                     st.session_state.user_query = ""
                     st.rerun()
                 except Exception as e:
                     st.error(f"Chatbot Error: {e}")
 
-with chat_col2:
+    with chat_col2:
+        st.markdown("""
+        <div class='card'>
+            <h4>💡 Chat Tips</h4>
+            <ul style='font-size: 0.9rem;'>
+                <li>Ask about investments</li>
+                <li>Get budgeting advice</li>
+                <li>Discuss debt management</li>
+                <li>Plan for specific goals</li>
+                <li>Understand financial terms</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # FOOTER
+    st.markdown("---")
     st.markdown("""
-    <div class='card'>
-        <h4>💡 Chat Tips</h4>
-        <ul style='font-size: 0.9rem;'>
-            <li>Ask about investments</li>
-            <li>Get budgeting advice</li>
-            <li>Discuss debt management</li>
-            <li>Plan for specific goals</li>
-            <li>Understand financial terms</li>
-        </ul>
+    <div style='text-align: center; color: #666; padding: 1rem 0;'>
+        <h3>About This Project</h3>
+        <p>An intelligent AI-powered financial advisor designed to help you make smarter financial decisions, 
+        plan for your goals, and achieve financial wellness.</p>
     </div>
     """, unsafe_allow_html=True)
 
-# FOOTER
-st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #666; padding: 1rem 0;'>
-    <h3>About This Project</h3>
-    <p>An intelligent AI-powered financial advisor designed to help you make smarter financial decisions, 
-    plan for your goals, and achieve financial wellness.</p>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+
+# DEBUG PANEL
+if DEBUG_PANEL:
+    with st.expander("🔧 Performance Debug Panel"):
+        summary = tracer.summary()
+        if summary:
+            st.dataframe(pd.DataFrame([
+                {"Stage": name, "Count": row["count"], "p50 (ms)": round(row["p50"], 2),
+                 "p95 (ms)": round(row["p95"], 2), "Max (ms)": round(row["max"], 2)}
+                for name, row in sorted(summary.items())
+            ]), hide_index=True, use_container_width=True)
+        st.markdown("**Advisor service**")
+        st.json(get_service().stats())
+        if st.button("Export OTLP trace"):
+            exported = tracer.export_otlp_json(TRACE_OTLP_PATH)
+            st.success(f"Exported {exported} spans to {TRACE_OTLP_PATH}")
@@ -0,0 +1,174 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import LLM_TIMEOUT_SECONDS, LLM_HEDGE_AFTER_SECONDS
+from finance_analysis import analyze_finances
+from records import ProfileRecord, PROFILE_NUMERIC_FIELDS
+from resilience import ResilientCaller
+import ai_advisor
+
+
+# Token bucket rate limiter shared by all workers
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+# ResilientCaller that takes a rate-limit token before every upstream request, retries and hedges included
+class ThrottledCaller(ResilientCaller):
+    def __init__(self, bucket, **kwargs):
+        super().__init__(**kwargs)
+        self.bucket = bucket
+
+    def call(self, fn, fallback=None, hedge=True):
+        def throttled():
+            self.bucket.acquire()
+            return fn()
+
+        return super().call(throttled, fallback, hedge)
+
+
+# Profile readers: stream one row at a time from CSV or Parquet
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_parquet(path, batch_size=1024):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Reading Parquet input requires pyarrow (pip install pyarrow)")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+# Raw row -> user_data; amounts are parsed and validated by ProfileRecord, so a bad cell fails only its own row
+def _to_user_data(row):
+    user_data = {field: row.get(field) or 0 for field in PROFILE_NUMERIC_FIELDS}
+    goals = row.get("goals") or ""
+    user_data["goals"] = goals if isinstance(goals, list) else [g.strip() for g in goals.split(";") if g.strip()]
+    user_data["profile"] = row.get("profile") or "Professional"
+    user_data["risk_tolerance"] = row.get("risk_tolerance") or "Medium"
+    return user_data
+
+
+def read_profiles(path):
+    rows = _iter_parquet(path) if path.endswith(".parquet") else _iter_csv(path)
+    for index, row in enumerate(rows):
+        yield str(row.get("id") or index), row
+
+
+# Checkpoint: ids of profiles whose results are already written
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+# Generate advice for one profile (raises once the caller's retries are used up)
+def process_profile(user_data, caller):
+    analysis_data = analyze_finances(user_data)
+    prompt = ai_advisor.build_advice_prompt(user_data, analysis_data)
+    return {"analysis": analysis_data, "advice": ai_advisor._generate(prompt, caller)}
+
+
+# Batch pipeline: bounded in-flight work, results and checkpoint appended as they complete
+def run_batch(input_path, output_path, checkpoint_path, workers=4, rate=1.0, retries=3):
+    done = load_checkpoint(checkpoint_path)
+    # Retries and backoff come from the caller alone; the breaker is shared with the app's caller
+    caller = ThrottledCaller(
+        TokenBucket(rate, capacity=workers),
+        timeout=LLM_TIMEOUT_SECONDS,
+        retries=retries,
+        hedge_after=LLM_HEDGE_AFTER_SECONDS,
+        breaker=ai_advisor.caller.breaker,
+        max_threads=workers * 2
+    )
+    max_pending = workers * 2
+    written = failed = 0
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain():
+            nonlocal written, failed
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                profile_id = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[{profile_id}] failed: {e}", file=sys.stderr)
+                    continue
+                out.write(json.dumps({"id": profile_id, **result}, ensure_ascii=False) + "\n")
+                out.flush()
+                ckpt.write(profile_id + "\n")
+                ckpt.flush()
+                written += 1
+
+        # Submitted work is always drained and written, even if reading the input fails part way
+        try:
+            for profile_id, row in read_profiles(input_path):
+                if profile_id in done:
+                    continue
+                try:
+                    user_data = ProfileRecord.from_dict(_to_user_data(row)).to_dict()
+                except (ValueError, TypeError) as e:
+                    failed += 1
+                    print(f"[{profile_id}] invalid profile: {e}", file=sys.stderr)
+                    continue
+                if len(pending) >= max_pending:
+                    drain()
+                pending[pool.submit(process_profile, user_data, caller)] = profile_id
+        finally:
+            while pending:
+                drain()
+
+    return written, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate financial advice offline for a file of customer profiles")
+    parser.add_argument("input", help="CSV or Parquet file of profiles")
+    parser.add_argument("-o", "--output", default="advice.jsonl", help="JSONL output file (appended)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Gemini calls")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max Gemini requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per profile")
+    args = parser.parse_args(argv)
+
+    checkpoint = args.checkpoint or args.output + ".checkpoint"
+    written, failed = run_batch(args.input, args.output, checkpoint, args.workers, args.rate, args.retries)
+    print(f"Wrote {written} results to {args.output} ({failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
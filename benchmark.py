@@ -0,0 +1,592 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+import ai_advisor
+import prompts
+import records
+import resilience
+import semantic_cache
+import service
+import utils
+import visualization
+import what_if
+from finance_analysis import analyze_finances, analyze_finances_batch, allocation_policy, RISK_LEVELS
+from allocation_policy import load_policy
+from chat import ChatSession
+from local_advice import build_local_advice
+from tests.conftest import (
+    FakeModel, FlakyModel, SAMPLE_USER, make_advice_text, PARAPHRASES, DISTINCT_QUESTIONS, NUMBER_PAIRS
+)
+
+# A benchmark whose median got slower than this ratio against the baseline is reported as a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+# Timing helper: min / median / mean per call over `repeat` runs of `number` calls (milliseconds)
+def measure(fn, repeat=5, number=1, clock=time.perf_counter):
+    runs = []
+    for _ in range(repeat):
+        start = clock()
+        for _ in range(number):
+            fn()
+        runs.append((clock() - start) * 1000 / number)
+    return {"min_ms": min(runs), "median_ms": statistics.median(runs), "mean_ms": statistics.mean(runs)}
+
+
+# Process CPU time per call (milliseconds), for work whose cost is server CPU rather than wall time
+def measure_cpu(fn, repeat=5, number=1):
+    return measure(fn, repeat, number, clock=time.process_time)
+
+
+# Random profiles as columns (the shape analyze_finances_batch takes)
+def make_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "income": rng.integers(0, 300000, n),
+        "expenses": rng.integers(0, 200000, n),
+        "debts": rng.integers(0, 1000000, n),
+        "existing_savings": rng.integers(0, 2000000, n),
+        "risk_tolerance": rng.choice([level.title() for level in RISK_LEVELS], n)
+    }
+
+
+# Benchmark: analyze_finances one profile at a time vs analyze_finances_batch
+def bench_analysis(n=10000):
+    profiles = make_profiles(n)
+    rows = [
+        {field: values[i].item() for field, values in profiles.items()}
+        for i in range(n)
+    ]
+    return {
+        "analysis.scalar_single": measure(lambda: analyze_finances(SAMPLE_USER), number=1000),
+        f"analysis.scalar_loop_{n}": measure(lambda: [analyze_finances(row) for row in rows], repeat=3),
+        f"analysis.batch_{n}": measure(lambda: analyze_finances_batch(profiles)),
+        "analysis.policy_lookup": measure(lambda: allocation_policy.current().shares("Professional", "Medium", 120000), number=10000),
+        "analysis.policy_compile": measure(lambda: load_policy(allocation_policy.path), number=100)
+    }
+
+
+# Benchmark: what-if grid throughput (cells per second) vs scalar analyze_finances, and the app's 25x25 heatmap
+def bench_what_if(steps=40):
+    ranges = {field: what_if.sweep_range(SAMPLE_USER[field], 0.5, steps) for field in what_if.NUMERIC_FIELDS}
+    ranges["risk_tolerance"] = what_if.RISK_LABELS
+    cells = steps ** len(what_if.NUMERIC_FIELDS) * len(what_if.RISK_LABELS)
+    grid = measure(lambda: what_if.what_if_grid(SAMPLE_USER, ranges), repeat=3)
+    grid["cells_per_s"] = round(cells / (grid["median_ms"] / 1000))
+    grid["mb"] = round(what_if.what_if_grid(SAMPLE_USER, ranges)["values"].nbytes / 1e6, 1)
+    scalar = measure(lambda: analyze_finances(SAMPLE_USER), number=1000)
+    scalar["cells_per_s"] = round(1000 / scalar["median_ms"])
+    heatmap_ranges = {"income": what_if.sweep_range(SAMPLE_USER["income"], steps=25),
+                      "expenses": what_if.sweep_range(SAMPLE_USER["expenses"], steps=25)}
+
+    def heatmap():
+        grid = what_if.what_if_grid(SAMPLE_USER, heatmap_ranges, ["savings"])
+        return visualization.what_if_spec(grid, "savings", "income", "expenses")
+
+    return {
+        f"what_if.grid_{cells}": grid,
+        "what_if.scalar_cell": scalar,
+        "what_if.heatmap_25x25": measure(heatmap, number=20)
+    }
+
+
+# Traced Python heap growth (MB) while building a value
+def _heap_mb(build):
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, {"mb": round(size / 1e6, 1)}
+
+
+# Memory: n profiles as user_data dicts, as ProfileRecord instances and as one ProfileBatch
+def bench_records(n=1000000):
+    columns = make_profiles(n)
+    goal_choices = [[], ["Retirement"], ["Buy a house", "Retirement"], ["Emergency Fund"]]
+    picks = np.random.default_rng(1).integers(0, len(goal_choices), n).tolist()
+
+    def dicts():
+        fields = [columns[field].astype(float).tolist() for field in records.PROFILE_NUMERIC_FIELDS]
+        risks = columns["risk_tolerance"].tolist()
+        return [
+            {"profile": "Professional", "income": income, "expenses": expenses, "debts": debts,
+             "existing_savings": existing_savings, "goals": list(goal_choices[pick]), "risk_tolerance": risk}
+            for income, expenses, debts, existing_savings, pick, risk in zip(*fields, picks, risks)
+        ]
+
+    rows, as_dicts = _heap_mb(dicts)
+    _, as_records = _heap_mb(lambda: [records.ProfileRecord.from_dict(row) for row in rows])
+    batch, as_batch = _heap_mb(lambda: records.ProfileBatch.from_dicts(rows))
+    as_batch["nbytes_mb"] = round(batch.nbytes / 1e6, 1)
+    del rows
+    return {
+        f"records.dicts_{n}": as_dicts,
+        f"records.slots_{n}": as_records,
+        f"records.batch_{n}": as_batch,
+        f"records.batch_to_dicts_{n}": measure(batch.to_dicts, repeat=1),
+        f"records.batch_analyze_{n}": measure(batch.analyze, repeat=3)
+    }
+
+
+# Benchmark: section splitters on a realistic and a very large response, first parse vs cached rerun
+def bench_parsers():
+    results = {}
+    for label, text in (("realistic", make_advice_text(1, 4)), ("large", make_advice_text(20, 25))):
+        def first_parse():
+            utils.parse_advice_sections.cache_clear()
+            utils._advice_sections_html.cache_clear()
+            utils.split_advice_sections(text)
+
+        results[f"parse.{label}_first"] = measure(first_parse, number=10)
+        results[f"parse.{label}_first"]["kb"] = round(len(text) / 1024, 1)
+        results[f"parse.{label}_cached"] = measure(lambda: utils.split_advice_sections(text), number=1000)
+    return results
+
+
+# Benchmark: overview figure build and PNG render timed separately, then memoized reruns
+def bench_visualization(reruns=50):
+    import matplotlib.pyplot as plt
+
+    analysis = analyze_finances(SAMPLE_USER)
+
+    def build():
+        plt.close(visualization.plot_advised_financial_overview(SAMPLE_USER, analysis))
+
+    def build_and_render():
+        visualization.figure_to_bytes(visualization.plot_advised_financial_overview(SAMPLE_USER, analysis))
+
+    build_time = measure(build, repeat=3)
+    render_time = measure(build_and_render, repeat=3)
+    render_only = {key: max(0.0, render_time[key] - build_time[key]) for key in build_time}
+
+    visualization._figure_cache.clear()
+    visualization.render_advised_financial_overview(SAMPLE_USER, analysis)
+    cached = measure(lambda: visualization.render_advised_financial_overview(SAMPLE_USER, analysis), number=reruns)
+    cached["open_figures"] = len(plt.get_fignums())
+
+    # Server CPU per rerun with fresh inputs: PNG render vs Vega-Lite spec (as serialized for the browser)
+    png_cpu = measure_cpu(build_and_render, repeat=3)
+    png_cpu["payload_bytes"] = len(visualization.figure_to_bytes(visualization.plot_advised_financial_overview(SAMPLE_USER, analysis)))
+    spec = lambda: json.dumps(visualization.advised_overview_spec(SAMPLE_USER, analysis), separators=(",", ":"))
+    vega_cpu = measure_cpu(spec, number=1000)
+    vega_cpu["payload_bytes"] = len(spec().encode("utf-8"))
+    return {
+        "plot.figure_build": build_time,
+        "plot.figure_render_png": render_only,
+        "plot.cached_rerun": cached,
+        "plot.cpu_per_rerun_matplotlib": png_cpu,
+        "plot.cpu_per_rerun_vega": vega_cpu
+    }
+
+
+# Benchmark: advisor functions against the fake model (uncached, cached, sequential vs concurrent)
+def bench_advisor(latency=0.2, max_concurrency=4):
+    original = ai_advisor.model
+    ai_advisor.model = FakeModel(latency, make_advice_text(1, 4))
+    try:
+        analysis = analyze_finances(SAMPLE_USER)
+        prompt_list = [
+            ai_advisor.build_advice_prompt(SAMPLE_USER, analysis),
+            ai_advisor.build_goal_plan_prompt(SAMPLE_USER, analysis, "Reach goal in 5 years"),
+            ai_advisor.build_chat_prompt(SAMPLE_USER, analysis, "What is SIP?")
+        ]
+
+        def uncached(fn):
+            def run():
+                ai_advisor.response_cache.clear()
+                ai_advisor.semantic_cache.clear()
+                fn()
+            return run
+
+        def sequential():
+            for prompt in prompt_list:
+                ai_advisor._generate(prompt)
+
+        return {
+            "advisor.advice": measure(uncached(lambda: ai_advisor.generate_financial_advice(SAMPLE_USER, analysis)), repeat=3),
+            "advisor.goal_plan": measure(uncached(lambda: ai_advisor.generate_goal_plan(SAMPLE_USER, analysis, "Reach goal in 5 years")), repeat=3),
+            "advisor.chat": measure(uncached(lambda: ai_advisor.finance_chatbot_response(SAMPLE_USER, analysis, "What is SIP?")), repeat=3),
+            "advisor.stream_advice": measure(uncached(lambda: list(ai_advisor.stream_financial_advice(SAMPLE_USER, analysis))), repeat=3),
+            "advisor.advice_cached": measure(lambda: ai_advisor.generate_financial_advice(SAMPLE_USER, analysis), number=100),
+            "advisor.local_advice": measure(lambda: build_local_advice(SAMPLE_USER, analysis), number=1000),
+            "advisor.three_sequential": measure(uncached(sequential), repeat=3),
+            "advisor.three_concurrent": measure(uncached(lambda: ai_advisor.generate_many(prompt_list, max_concurrency)), repeat=3)
+        }
+    finally:
+        ai_advisor.model = original
+
+
+# Fault injection: retries, deadlines, hedging and the circuit breaker against a scripted stub model
+def bench_resilience():
+    analysis = analyze_finances(SAMPLE_USER)
+    original_model, original_caller = ai_advisor.model, ai_advisor.caller
+    scenarios = {
+        "transient_errors": (FlakyModel([ConnectionError("reset"), ConnectionError("reset")]),
+                             resilience.ResilientCaller(timeout=2, retries=2, base_delay=0.01)),
+        "hung_call": (FlakyModel([5.0]), resilience.ResilientCaller(timeout=0.2, retries=0)),
+        "slow_tail_hedged": (FlakyModel([1.0], delay=0.02), resilience.ResilientCaller(timeout=2, retries=0, hedge_after=0.1)),
+        "hard_down": (FlakyModel([ConnectionError("unreachable")] * 10),
+                      resilience.ResilientCaller(timeout=1, retries=0, breaker=resilience.CircuitBreaker(3, 60)))
+    }
+    results = {}
+    try:
+        for name, (stub, caller) in scenarios.items():
+            ai_advisor.model = stub
+            ai_advisor.caller = caller
+            attempts = 5 if name == "hard_down" else 1
+            timings = []
+            for _ in range(attempts):
+                ai_advisor.response_cache.clear()
+                start = time.perf_counter()
+                text = ai_advisor.generate_financial_advice(SAMPLE_USER, analysis)
+                timings.append((time.perf_counter() - start) * 1000)
+            stats = caller.stats()
+            results[f"resilience.{name}"] = {
+                "median_ms": timings[-1],
+                "fallback": ai_advisor.is_fallback(text),
+                "upstream_calls": stub.calls,
+                "retried": stats["retried"],
+                "hedged": stats["hedged"],
+                "breaker": stats["breaker"]["state"]
+            }
+    finally:
+        ai_advisor.model, ai_advisor.caller = original_model, original_caller
+    return results
+
+
+# Semantic chat cache: paraphrase hit rate, false positives, brute-force vs IVF search and mmap reload
+def bench_semantic_cache(entries=20000):
+    cache = semantic_cache.SemanticCache(threshold=0.9)
+    profile = prompts.build_profile_block(SAMPLE_USER, analyze_finances(SAMPLE_USER))
+    for question, _ in PARAPHRASES:
+        cache.add(profile, question, f"answer: {question}")
+    for question, _ in NUMBER_PAIRS:
+        cache.add(profile, question, f"answer: {question}")
+    hits = sum(cache.lookup(profile, p) == f"answer: {q}" for q, paraphrases in PARAPHRASES for p in paraphrases)
+    distinct = DISTINCT_QUESTIONS + [other for _, other in NUMBER_PAIRS]
+    false_hits = sum(cache.lookup(profile, q) is not None for q in distinct)
+    results = {
+        "semantic.paraphrases": {"hit_rate": round(hits / sum(len(p) for _, p in PARAPHRASES), 3),
+                                 "false_hit_rate": round(false_hits / len(distinct), 3)},
+        "semantic.embed": measure(lambda: semantic_cache.embed("how much should I invest monthly for retirement"), number=1000)
+    }
+
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(3000)]
+    questions = [" ".join(rng.choice(words, 4)) for _ in range(entries)]
+    vectors = np.array([semantic_cache.embed(q) for q in questions])
+    brute = semantic_cache._Bucket(semantic_cache.EMBEDDING_DIM, ivf=False)
+    for vector, question in zip(vectors, questions):
+        brute.add(vector, question, question)
+    ivf = semantic_cache._Bucket(semantic_cache.EMBEDDING_DIM, vectors.copy(), list(questions), list(questions))
+    ivf.train()
+    queries = [semantic_cache.embed(" ".join(q.split()[:3])) for q in questions[:200]]
+    recall = np.mean([ivf.search(q)[0] == brute.search(q)[0] for q in queries])
+    results[f"semantic.search_bruteforce_{entries}_200q"] = measure(lambda: [brute.search(q) for q in queries], repeat=3)
+    results[f"semantic.search_ivf_{entries}_200q"] = measure(lambda: [ivf.search(q) for q in queries], repeat=3)
+    results[f"semantic.search_ivf_{entries}_200q"]["recall_at_1"] = round(float(recall), 3)
+
+    with tempfile.TemporaryDirectory() as path:
+        cache.buckets[semantic_cache.profile_scope(profile)] = brute
+        cache.save(path)
+        reloaded = measure(lambda: semantic_cache.SemanticCache(path=path), repeat=3)
+        reloaded["mmap"] = isinstance(semantic_cache.SemanticCache(path=path).buckets[semantic_cache.profile_scope(profile)].vectors, np.memmap)
+        results["semantic.load_mmap"] = reloaded
+    return results
+
+
+# Fake model that also records the peak number of calls in flight at once
+class CountingModel(FakeModel):
+    def __init__(self, delay=0.2, text=None):
+        super().__init__(delay, text)
+        self.inflight = 0
+        self.peak = 0
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        with self.lock:
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+        try:
+            return super().generate_content(prompt, stream, request_options)
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+
+# Load test: simulated sessions (one thread each, like Streamlit script runs) stream advice and ask one
+# chat question, calling ai_advisor directly vs through the shared AdvisorService; a quarter of the
+# sessions repeat another session's profile, as returning users do
+def bench_service(sessions=200, latency=0.2, workers=16):
+    columns = make_profiles(sessions // 4 * 3 or 1, seed=7)
+    profiles = [
+        {"profile": "Professional", "income": int(columns["income"][i]) + 10000, "expenses": int(columns["expenses"][i]),
+         "debts": int(columns["debts"][i]) + 1, "existing_savings": int(columns["existing_savings"][i]),
+         "goals": ["Retirement"], "risk_tolerance": str(columns["risk_tolerance"][i])}
+        for i in range(len(columns["income"]))
+    ]
+    users = [profiles[i % len(profiles)] for i in range(sessions)]
+
+    def run(advisor):
+        model = CountingModel(latency)
+        ai_advisor.model = model
+        ai_advisor.response_cache.clear()
+        ai_advisor.semantic_cache = semantic_cache.SemanticCache(ai_advisor.semantic_cache.threshold)
+        barrier = threading.Barrier(sessions)
+        latencies = []
+        peak_threads = [threading.active_count()]
+        stop = threading.Event()
+
+        def monitor():
+            while not stop.wait(0.01):
+                peak_threads[0] = max(peak_threads[0], threading.active_count())
+
+        def session(i):
+            user_data = users[i]
+            analysis = analyze_finances(user_data)
+            chat = ChatSession()
+            barrier.wait()
+            start = time.perf_counter()
+            if advisor is None:
+                "".join(ai_advisor.stream_financial_advice(user_data, analysis))
+                "".join(chat.stream_reply(user_data, analysis, f"How should session {i} invest?"))
+            else:
+                "".join(advisor.stream_advice(i, user_data, analysis))
+                "".join(advisor.stream_chat(i, chat, user_data, analysis, f"How should session {i} invest?"))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        watcher = threading.Thread(target=monitor, daemon=True)
+        watcher.start()
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = (time.perf_counter() - start) * 1000
+        stop.set()
+        metrics = {
+            "median_ms": elapsed,
+            "session_p50": _percentile_ms(latencies, 0.5),
+            "session_p95": _percentile_ms(latencies, 0.95),
+            "upstream_calls": model.calls,
+            "peak_llm_calls": model.peak,
+            "peak_threads": peak_threads[0]
+        }
+        if advisor is not None:
+            stats = advisor.stats()
+            metrics.update(max_queue_depth=stats["max_depth"], queue_wait_p95=stats["wait_p95_ms"], rejected=stats["rejected"])
+        return metrics
+
+    original_model, shared_semantic_cache = ai_advisor.model, ai_advisor.semantic_cache
+    advisor = service.AdvisorService(workers, max_pending_per_session=4)
+    try:
+        results = {
+            f"service.direct_{sessions}_sessions": run(None),
+            f"service.pooled_{sessions}_sessions_{workers}_workers": run(advisor)
+        }
+    finally:
+        advisor.close()
+        ai_advisor.model, ai_advisor.semantic_cache = original_model, shared_semantic_cache
+
+    # Fairness: one session queues 40 tasks before 10 others queue one each; with round-robin the
+    # others finish within the first ~20 tasks instead of after all 40 (FIFO)
+    fair = service.AdvisorService(2, max_pending_per_session=40)
+    order = []
+    gate = threading.Event()
+    fair.submit("gate", gate.wait)
+    fair.submit("gate", gate.wait)
+    futures = [fair.submit("hog", lambda: (time.sleep(0.001), order.append("hog"))) for _ in range(40)]
+    futures += [fair.submit(f"user{i}", lambda: (time.sleep(0.001), order.append("user"))) for i in range(10)]
+    gate.set()
+    for future in futures:
+        future.result()
+    fair.close()
+    results["service.fairness_hog_40_vs_10"] = {"last_other_session_task": max(i for i, who in enumerate(order) if who == "user") + 1}
+    return results
+
+
+def _percentile_ms(values, q):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+# Stress test: many threads sending the same prompt at once to a slow model share one upstream call
+def bench_request_coalescing(threads=50, delay=0.5):
+    fake = FakeModel(delay)
+    original = ai_advisor.model
+    ai_advisor.model = fake
+    ai_advisor.response_cache.clear()
+    prompt = ai_advisor.build_chat_prompt(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?")
+    before = ai_advisor.coalescing_stats()["coalesced"]
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(ai_advisor._generate(prompt))
+
+    workers = [threading.Thread(target=session) for _ in range(threads)]
+    start = time.perf_counter()
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        ai_advisor.model = original
+    elapsed = (time.perf_counter() - start) * 1000
+
+    return {
+        "coalescing.identical_prompts": {
+            "median_ms": elapsed,
+            "threads": threads,
+            "upstream_calls": fake.calls,
+            "coalesced": ai_advisor.coalescing_stats()["coalesced"] - before,
+            "distinct_answers": len(set(results))
+        }
+    }
+
+
+# Prompt size report: estimated tokens per prompt against PROMPT_TOKEN_BUDGET
+def bench_prompt_sizes():
+    analysis = analyze_finances(SAMPLE_USER)
+    report = prompts.prompt_token_report(SAMPLE_USER, analysis, "Reach goal in 5 years", "What is SIP?")
+    results = {}
+    for name, tokens in report.items():
+        results[f"prompt.{name}"] = {"tokens": tokens}
+        if name in prompts.PROMPT_TOKEN_BUDGET:
+            results[f"prompt.{name}"]["budget"] = prompts.PROMPT_TOKEN_BUDGET[name]
+    return results
+
+
+# Cumulative import time (microseconds) of a snippet, from python -X importtime
+def _import_time_us(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() and not parts[2].startswith("  ") and parts[1].strip().isdigit():
+            total += int(parts[1])
+    return total
+
+
+# Benchmark: cold-start imports with lazy loading vs eagerly loading the plotting stack and Gemini client
+def bench_import_time():
+    startup = "import ai_advisor, finance_analysis, utils, visualization"
+    lazy = _import_time_us(startup)
+    eager = _import_time_us(startup + "; import config; config.get_model(); visualization._plotting()")
+    return {
+        "import.lazy_startup": {"median_ms": lazy / 1000},
+        "import.eager_equivalent": {"median_ms": eager / 1000}
+    }
+
+
+SUITES = {
+    "analysis": bench_analysis,
+    "what_if": bench_what_if,
+    "records": bench_records,
+    "parsers": bench_parsers,
+    "visualization": bench_visualization,
+    "advisor": bench_advisor,
+    "coalescing": bench_request_coalescing,
+    "service": bench_service,
+    "resilience": bench_resilience,
+    "semantic": bench_semantic_cache,
+    "prompts": bench_prompt_sizes,
+    "imports": bench_import_time
+}
+
+
+def _format(metrics):
+    extra = ", ".join(f"{key} {value}" for key, value in metrics.items() if not key.endswith("_ms"))
+    if "median_ms" not in metrics:
+        return extra
+    return f"{metrics['median_ms']:10.3f}ms" + (f"  ({extra})" if extra else "")
+
+
+# Compare timings with a saved baseline; returns the benchmarks that regressed
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for name, metrics in results.items():
+        before = baseline["results"].get(name, {})
+        if "median_ms" not in metrics or not before.get("median_ms"):
+            continue
+        ratio = metrics["median_ms"] / before["median_ms"]
+        regressed = ratio > threshold
+        print(f"  {name:32s} {before['median_ms']:10.3f}ms -> {metrics['median_ms']:10.3f}ms "
+              f"({ratio:.2f}x){'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analysis, parsing, plotting and advisor round-trips.")
+    parser.add_argument("suites", nargs="*", help=f"Suites to run (default: all of {', '.join(SUITES)})")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency in seconds")
+    parser.add_argument("--save", help="Write the results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare the results with this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.suites or SUITES:
+        if name == "advisor":
+            suite = bench_advisor(args.latency)
+        elif name == "service":
+            suite = bench_service(latency=args.latency)
+        elif name == "coalescing":
+            suite = bench_request_coalescing(delay=max(args.latency, 0.05))
+        else:
+            suite = SUITES[name]()
+        for bench, metrics in suite.items():
+            print(f"{bench:34s} {_format(metrics)}")
+        results.update(suite)
+
+    status = 0
+    over_budget = [name for name, metrics in results.items() if metrics.get("budget") and metrics["tokens"] > metrics["budget"]]
+    if over_budget:
+        print(f"prompt token budget exceeded: {', '.join(over_budget)}")
+        status = 1
+
+    if args.save:
+        baseline = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "latency": args.latency,
+            "results": results
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
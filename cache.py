@@ -0,0 +1,202 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cache key: hash of the model name plus the fully rendered prompt
+def prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+# In-memory LRU tier with per-entry TTL
+class LRUCache:
+    def __init__(self, max_entries=256, ttl_seconds=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Optional on-disk SQLite tier, shared across processes and restarts
+class SQLiteCache:
+    def __init__(self, path, ttl_seconds=86400, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= self.clock():
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            return value
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+
+# Two-tier response cache (memory first, then disk) with hit/miss/eviction counters
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl_seconds=3600, db_path=None, db_ttl_seconds=86400):
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.disk = SQLiteCache(db_path, db_ttl_seconds) if db_path else None
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            with self.lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                with self.lock:
+                    self.disk_hits += 1
+                return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        return {
+            "hits": self.memory_hits + self.disk_hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+            "entries": len(self.memory)
+        }
+
+
+# Single-flight: concurrent calls with the same key share one upstream request
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    # Returns (flight, is_leader); the leader must call finish() exactly once
+    def begin(self, key):
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = _Flight()
+            self.flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        flight.result = result
+        flight.error = error
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.done.set()
+
+    def wait(self, flight, timeout=None):
+        if not flight.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an in-flight request")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do(self, key, fn, timeout=None):
+        flight, leader = self.begin(key)
+        if not leader:
+            return self.wait(flight, timeout)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self.flights)}
@@ -0,0 +1,124 @@
+from collections import deque
+
+import ai_advisor
+from prompts import build_chat_context, build_profile_block
+
+CHAT_ACK = "Understood. I will answer each question using this profile."
+
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _first_sentence(text):
+    text = " ".join(text.split())
+    for end in (". ", "? ", "! "):
+        if end in text:
+            return text[:text.index(end) + 1]
+    return text
+
+
+# Chat Session: ring buffer of turns, last few sent verbatim (up to context_chars), older ones folded into a
+# rolling summary
+class ChatSession:
+    def __init__(self, max_turns=20, context_turns=4, summary_chars=800, context_chars=1600):
+        self.turns = deque(maxlen=max_turns)
+        self.context = deque(maxlen=context_turns)
+        self.context_chars = context_chars
+        self.context_length = 0
+        self.summary_lines = deque()
+        self.summary_length = 0
+        self.summary_chars = summary_chars
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def _summarize(self, question, answer):
+        line = f"- Asked: {_clip(question, 120)} Answered: {_clip(_first_sentence(answer), 160)}"
+        self.summary_lines.append(line)
+        self.summary_length += len(line) + 1
+        while self.summary_length > self.summary_chars and len(self.summary_lines) > 1:
+            self.summary_length -= len(self.summary_lines.popleft()) + 1
+
+    def _fold_oldest(self):
+        question, answer = self.context.popleft()
+        self.context_length -= len(question) + len(answer)
+        self._summarize(question, answer)
+
+    def _remember(self, question, answer, in_context=True):
+        if in_context:
+            if len(self.context) == self.context.maxlen:
+                self._fold_oldest()
+            self.context.append((question, answer))
+            self.context_length += len(question) + len(answer)
+            while self.context_length > self.context_chars and len(self.context) > 1:
+                self._fold_oldest()
+        turn_html = f'<div class="user-message">{question}</div>'
+        if answer:
+            turn_html += f'<div class="bot-message">{answer}</div>'
+        self.turns.append((question, answer, turn_html))
+
+    # Gemini multi-turn history: profile context once, then the recent turns
+    def history(self, user_data, analysis_data):
+        history = [
+            {"role": "user", "parts": [build_chat_context(user_data, analysis_data, self.summary)]},
+            {"role": "model", "parts": [CHAT_ACK]}
+        ]
+        for question, answer in self.context:
+            history.append({"role": "user", "parts": [question]})
+            history.append({"role": "model", "parts": [answer[:self.context_chars]]})
+        return history
+
+    # Stream a reply through model.start_chat; the turn is recorded once the reply completes.
+    # An opening question has no conversation to depend on, so it can be answered from the semantic cache.
+    # Every attempt opens a fresh chat, since a failed send_message leaves its question in the chat's history
+    def stream_reply(self, user_data, analysis_data, question):
+        model = ai_advisor._get_model()
+        if model is None:
+            yield "Gemini model not configured. Set GEMINI_API_KEY to use AI responses."
+            return
+        opening = not self.context and not self.summary_lines
+        if opening:
+            profile_block = build_profile_block(user_data, analysis_data)
+            cached = ai_advisor.semantic_cache.lookup(profile_block, question)
+            if cached is not None:
+                yield cached
+                self._remember(question, cached)
+                return
+        parts = []
+        try:
+            history = self.history(user_data, analysis_data)
+            stream = ai_advisor.caller.stream(
+                lambda: model.start_chat(history=history).send_message(question, stream=True)
+            )
+            for chunk in stream:
+                text = chunk.text
+                parts.append(text)
+                yield text
+        except Exception as e:
+            error = ai_advisor.local_fallback(user_data, None, e)
+            yield error
+            self._remember(question, error, in_context=False)
+            return
+        answer = "".join(parts).strip()
+        if opening:
+            ai_advisor.semantic_cache.add(profile_block, question, answer)
+        self._remember(question, answer)
+
+    # Rebuild the session from saved (question, answer) turns
+    def restore(self, turns):
+        for question, answer in turns:
+            self._remember(question, answer)
+
+    # Each turn's HTML is built once; a rerun only joins the cached fragments
+    def render_html(self):
+        return "".join(turn_html for _, _, turn_html in self.turns)
+
+    def clear(self):
+        self.turns.clear()
+        self.context.clear()
+        self.context_length = 0
+        self.summary_lines.clear()
+        self.summary_length = 0
@@ -1,10 +1,62 @@
 import os
-import google.generativeai as genai
+from functools import lru_cache
 
 # Gemini API Key configuration
 GEMINI_API_KEY = "KEY"
 os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
 
-# Configure Gemini
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-model = genai.GenerativeModel("gemini-2.0-flash")
\ No newline at end of file
+
+# Gemini client factory: google.generativeai is imported and configured on first use only
+@lru_cache(maxsize=None)
+def get_model():
+    if not os.environ.get("GEMINI_API_KEY"):
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+# Response cache for Gemini calls (set CACHE_DB_PATH to a file to enable the SQLite tier)
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 3600
+CACHE_DB_PATH = os.environ.get("ADVISOR_CACHE_DB")
+CACHE_DB_TTL_SECONDS = 86400
+
+# Tracing: in-app debug panel with per-stage p50/p95 (ADVISOR_DEBUG=1) and OTLP/JSON export file
+DEBUG_PANEL = os.environ.get("ADVISOR_DEBUG") == "1"
+TRACE_OTLP_PATH = os.environ.get("ADVISOR_TRACE_OTLP", "traces.otlp.jsonl")
+
+# LLM call layer: per-call deadline, retries, optional hedge delay (unset disables hedging), circuit breaker
+LLM_TIMEOUT_SECONDS = float(os.environ.get("ADVISOR_LLM_TIMEOUT", "30"))
+LLM_RETRIES = 2
+LLM_HEDGE_AFTER_SECONDS = float(os.environ["ADVISOR_LLM_HEDGE_AFTER"]) if os.environ.get("ADVISOR_LLM_HEDGE_AFTER") else None
+# Upper bound on threads blocked in Gemini calls at once (attempts, hedges and stream readers)
+LLM_MAX_CALL_THREADS = int(os.environ.get("ADVISOR_LLM_MAX_CALL_THREADS", "16"))
+# Deadline for a whole streamed response (each chunk must still arrive within ADVISOR_LLM_TIMEOUT)
+LLM_STREAM_TIMEOUT_SECONDS = float(os.environ.get("ADVISOR_LLM_STREAM_TIMEOUT", "120"))
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+# Rule-based advice instead of an LLM call for simple profiles (no debt, no goals); ADVISOR_LOCAL_FAST_PATH=0 disables
+LOCAL_ADVICE_FAST_PATH = os.environ.get("ADVISOR_LOCAL_FAST_PATH", "1") != "0"
+
+# Local store for profiles, analyses, advice, goal plans and chat history (ADVISOR_STORE_DB="" disables)
+STORE_DB_PATH = os.environ.get("ADVISOR_STORE_DB", "advisor_store.db")
+
+# Advised overview chart backend: "vega" (Vega-Lite spec drawn in the browser) or "matplotlib" (server-rendered PNG)
+CHART_BACKEND = os.environ.get("ADVISOR_CHART_BACKEND", "vega")
+
+# Semantic chat cache: cosine similarity needed to reuse an answer, and an optional directory to persist the index
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("ADVISOR_SEMANTIC_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_DIR = os.environ.get("ADVISOR_SEMANTIC_CACHE_DIR")
+
+# Allocation policy file (JSON: splits by risk, profile type and income band), re-read when its mtime changes
+ALLOCATION_POLICY_PATH = os.environ.get(
+    "ADVISOR_ALLOCATION_POLICY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "allocation_policy.json")
+)
+ALLOCATION_POLICY_RELOAD_SECONDS = float(os.environ.get("ADVISOR_ALLOCATION_POLICY_RELOAD", "2"))
+
+# Process-wide advisor service: LLM worker threads shared by all sessions, and queued requests allowed per session
+SERVICE_WORKERS = int(os.environ.get("ADVISOR_SERVICE_WORKERS", "8"))
+SERVICE_MAX_PENDING_PER_SESSION = 4
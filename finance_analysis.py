@@ -1,3 +1,14 @@
+import numpy as np
+
+from allocation_policy import (
+    PolicyFile, ALLOCATION_BUCKETS, DEFAULT_RISK, PROFILE_TYPES, RISK_LEVELS, UNKNOWN_PROFILE
+)
+from config import ALLOCATION_POLICY_PATH, ALLOCATION_POLICY_RELOAD_SECONDS
+
+# Investment split per profile type, risk level and income band, compiled from the policy file and hot-reloaded
+allocation_policy = PolicyFile(ALLOCATION_POLICY_PATH, ALLOCATION_POLICY_RELOAD_SECONDS)
+
+
 # Finance Analysis Module
 def analyze_finances(user_data):
     savings = max(0, user_data['income'] - user_data['expenses'])
@@ -8,36 +19,13 @@ def analyze_finances(user_data):
     investment_capacity = savings * 0.5
 
     total_net_worth = user_data['existing_savings'] + savings - user_data['debts']
-    
+
     emergency_fund_target = user_data['expenses'] * 6
     emergency_fund_shortfall = max(0, emergency_fund_target - user_data['existing_savings'])
-    emergency_fund_monthly = emergency_fund_shortfall / 18  
-
-    risk = user_data['risk_tolerance'].lower()
-    if risk == "low":
-        investment_allocation = {
-            "High-Interest Savings / RD": investment_capacity * 0.4,
-            "Debt Mutual Funds / Bonds": investment_capacity * 0.4,
-            "ETFs / Balanced Funds": investment_capacity * 0.2
-        }
-    elif risk == "medium":
-        investment_allocation = {
-            "Stocks / Equity Funds": investment_capacity * 0.3,
-            "ETFs / Balanced Funds": investment_capacity * 0.4,
-            "Debt Mutual Funds / Bonds": investment_capacity * 0.3
-        }
-    elif risk == "high":
-        investment_allocation = {
-            "Stocks / Equity Funds": investment_capacity * 0.5,
-            "ETFs / Balanced Funds": investment_capacity * 0.3,
-            "Debt Mutual Funds / Bonds": investment_capacity * 0.2
-        }
-    else:
-        investment_allocation = {
-            "Stocks / Equity Funds": investment_capacity * 0.3,
-            "ETFs / Balanced Funds": investment_capacity * 0.4,
-            "Debt Mutual Funds / Bonds": investment_capacity * 0.3
-        }
+    emergency_fund_monthly = emergency_fund_shortfall / 18
+
+    split = allocation_policy.current().split(user_data.get('profile'), user_data['risk_tolerance'], user_data['income'])
+    investment_allocation = {bucket: investment_capacity * share for bucket, share in split}
 
     high_debt_alert = debt_to_income_ratio > 0.4
 
@@ -56,3 +44,79 @@ def analyze_finances(user_data):
         "recommended_investment_allocation": investment_allocation,
         "high_debt_alert": high_debt_alert
     }
+
+
+# Map risk tolerance labels to policy table rows (unknown labels fall back to medium);
+# integer input is taken as row indices already (e.g. ProfileBatch risk codes)
+def risk_index(risk_tolerance):
+    codes = np.asarray(risk_tolerance)
+    if np.issubdtype(codes.dtype, np.integer):
+        return codes.astype(np.intp)
+    risk = np.char.lower(np.asarray(risk_tolerance, dtype=str))
+    index = np.full(risk.shape, RISK_LEVELS.index(DEFAULT_RISK), dtype=np.intp)
+    for i, level in enumerate(RISK_LEVELS):
+        index[risk == level] = i
+    return index
+
+
+# Map profile types to policy table rows (unknown or missing profiles use the generic row); integers pass through
+def profile_index(profile):
+    if profile is None:
+        return UNKNOWN_PROFILE
+    codes = np.asarray(profile)
+    if np.issubdtype(codes.dtype, np.integer):
+        return codes.astype(np.intp)
+    codes = codes.astype(str)
+    index = np.full(codes.shape, UNKNOWN_PROFILE, dtype=np.intp)
+    for i, name in enumerate(PROFILE_TYPES):
+        index[codes == name] = i
+    return index
+
+
+# Batch Finance Analysis: columnar input (DataFrame or dict of arrays), every metric as arrays;
+# columns may be any broadcast-compatible shapes (e.g. the axes of a what-if grid)
+def analyze_finances_batch(profiles):
+    income = np.asarray(profiles['income'], dtype=float)
+    expenses = np.asarray(profiles['expenses'], dtype=float)
+    debts = np.asarray(profiles['debts'], dtype=float)
+    existing_savings = np.asarray(profiles['existing_savings'], dtype=float)
+
+    has_income = income > 0
+    safe_income = np.where(has_income, income, 1.0)
+
+    savings = np.maximum(0, income - expenses)
+    debt_to_income_ratio = np.where(has_income, debts / safe_income, 0.0)
+    savings_ratio = np.where(has_income, savings / safe_income, 0.0)
+    expense_ratio = np.where(has_income, expenses / safe_income, 0.0)
+    has_savings = savings > 0
+    debt_to_savings_ratio = np.where(has_savings, debts / np.where(has_savings, savings, 1.0), 0.0)
+    investment_capacity = savings * 0.5
+
+    total_net_worth = existing_savings + savings - debts
+
+    emergency_fund_target = expenses * 6
+    emergency_fund_shortfall = np.maximum(0, emergency_fund_target - existing_savings)
+    emergency_fund_monthly = emergency_fund_shortfall / 18
+
+    shares = allocation_policy.current().shares_batch(
+        profile_index(profiles.get('profile')), risk_index(profiles['risk_tolerance']), income
+    )
+    allocation = investment_capacity[..., None] * shares
+
+    return {
+        "savings": savings,
+        "debt_to_income_ratio": debt_to_income_ratio,
+        "savings_ratio": savings_ratio,
+        "expense_ratio": expense_ratio,
+        "debt_to_savings_ratio": debt_to_savings_ratio,
+        "investment_capacity": investment_capacity,
+        "emergency_fund": emergency_fund_target,
+        "emergency_fund_shortfall": emergency_fund_shortfall,
+        "emergency_fund_monthly": emergency_fund_monthly,
+        "total_net_worth": total_net_worth,
+        "existing_savings": existing_savings,
+        "recommended_investment_allocation": {
+            bucket: allocation[..., i] for i, bucket in enumerate(ALLOCATION_BUCKETS)
+        },
+        "high_debt_alert": debt_to_income_ratio > 0.4
+    }
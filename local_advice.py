@@ -0,0 +1,159 @@
+from prompts import ADVICE_SECTIONS, AUDIENCE
+from projection import project_cash_flow, projection_milestones
+
+SAVINGS_RATE_TARGET = 0.2
+HIGH_EXPENSE_RATIO = 0.8
+GOAL_CHECKPOINT_YEARS = 5
+
+INVESTMENT_STYLE = {
+    "low": "Favour capital safety: recurring deposits, debt funds and bonds, with a small balanced-fund portion for growth.",
+    "medium": "Combine equity, balanced and debt funds through SIPs (Systematic Investment Plans, a fixed amount invested every month).",
+    "high": "Lean on equity funds through SIPs (Systematic Investment Plans) and hold them for at least 5-7 years to ride out volatility."
+}
+PROFILE_RISK_NOTE = {
+    "Student": "Avoid borrowing for spending; if you take an education loan, know its interest rate and repayment start date.",
+    "Professional": "Get health insurance, and term life cover of about 10x annual income if anyone depends on you.",
+    "Retiree": "Keep 2-3 years of expenses in low-risk instruments so you never sell investments in a downturn."
+}
+
+
+def _money(value):
+    return f"₹{value:,.0f}"
+
+
+def _month_label(month):
+    if month == 0:
+        return "already"
+    return f"in about {month} months (year {(month - 1) // 12 + 1})"
+
+
+def _health(user_data, ad):
+    return [
+        f"You earn {_money(user_data['income'])} a month and spend {_money(user_data['expenses'])}, "
+        f"leaving {_money(ad['savings'])} ({ad['savings_ratio'] * 100:.1f}% of income).",
+        f"You hold {_money(user_data['existing_savings'])} in savings and investments against {_money(user_data['debts'])} "
+        f"of debt, a net worth of {_money(ad['total_net_worth'])}."
+    ]
+
+
+def _existing_savings(user_data, ad):
+    existing, target = user_data["existing_savings"], ad["emergency_fund"]
+    if existing <= 0:
+        return [f"You have no savings yet; build an emergency fund of {_money(target)} (6 months of expenses) first."]
+    if ad["emergency_fund_shortfall"] > 0:
+        return [
+            f"Keep all {_money(existing)} as your emergency fund; it is {_money(ad['emergency_fund_shortfall'])} "
+            f"short of the {_money(target)} target (6 months of expenses).",
+            "Hold it in a savings account or liquid fund you can reach within a day."
+        ]
+    items = [f"Your {_money(existing)} already covers the {_money(target)} emergency fund; keep that amount liquid."]
+    surplus = existing - target
+    if surplus > 0 and user_data["debts"] > 0:
+        items.append(f"Use the {_money(surplus)} above the emergency fund to prepay debt, highest interest rate first.")
+    elif surplus > 0:
+        items.append(f"Invest the {_money(surplus)} above the emergency fund in the allocation below, spread over 6-12 months.")
+    return items
+
+
+def _monthly_savings(user_data, ad):
+    if ad["savings"] <= 0:
+        return ["Your expenses use your whole income; cut spending to create a monthly surplus before investing."]
+    items = [f"Save {_money(ad['savings'])} every month, ideally moved automatically on payday."]
+    if ad["savings_ratio"] < SAVINGS_RATE_TARGET:
+        goal = user_data["income"] * SAVINGS_RATE_TARGET
+        items.append(f"Work towards saving {_money(goal)} a month ({SAVINGS_RATE_TARGET:.0%} of income), {_money(goal - ad['savings'])} more than now.")
+    if ad["emergency_fund_monthly"] > ad["savings"]:
+        items.append("Send the whole surplus to the emergency fund until it reaches its target.")
+    elif ad["emergency_fund_monthly"] > 0:
+        items.append(f"Put {_money(ad['emergency_fund_monthly'])} a month into the emergency fund to complete it in 18 months.")
+    items.append(f"Invest {_money(ad['investment_capacity'])} a month, half of your savings, as shown under investments.")
+    return items
+
+
+def _debt_plan(user_data, ad, projection):
+    if user_data["debts"] <= 0:
+        return ["You have no debt; avoid high-interest borrowing such as credit card balances and personal loans."]
+    items = [f"Your debt of {_money(user_data['debts'])} is {ad['debt_to_income_ratio'] * 100:.1f}% of monthly income."]
+    if ad["high_debt_alert"]:
+        items.append("High debt alert: this is above the 40% safety limit, so send any spare money to repayment before new investments.")
+    month = projection["debt_free_month"]
+    if month is None:
+        items.append("Current savings do not clear the debt within 10 years; raise payments or refinance to a lower rate.")
+    else:
+        items.append(f"Paying it from the savings left after the emergency fund and investments, you would be debt free {_month_label(month)}.")
+    items.append("Pay off the highest-interest loans first and never miss a minimum payment.")
+    return items
+
+
+def _allocation(ad):
+    total = ad["investment_capacity"]
+    return [
+        f"{bucket}: {_money(amount)} a month ({amount / total * 100:.0f}%)"
+        for bucket, amount in ad["recommended_investment_allocation"].items()
+    ] if total > 0 else ["No monthly surplus to invest yet; build savings first."]
+
+
+def _investment_advice(user_data, ad, with_allocation):
+    risk = user_data["risk_tolerance"].lower()
+    items = [INVESTMENT_STYLE.get(risk, INVESTMENT_STYLE["medium"])]
+    if ad["emergency_fund_shortfall"] > 0:
+        items.append("Complete the emergency fund alongside investing; do not invest money you may need within a year.")
+    if with_allocation:
+        items.extend(_allocation(ad))
+    return items
+
+
+def _goal_guidance(user_data, projection):
+    if not user_data["goals"]:
+        return ["Set 1-3 concrete goals with an amount and a target date so your savings can be assigned to them."]
+    items = [f"{goal}: give it a target amount and date, and fund it from the monthly investment." for goal in user_data["goals"]]
+    items.append("Keep money for goals under 3 years away in debt funds; longer goals can go into equity.")
+    milestones = projection_milestones(projection, GOAL_CHECKPOINT_YEARS)
+    if milestones:
+        items.append(f"On this plan your investments would reach {_money(milestones[0]['investments'])} by year {GOAL_CHECKPOINT_YEARS}.")
+    return items
+
+
+def _budgeting(ad):
+    if ad["expense_ratio"] > HIGH_EXPENSE_RATIO:
+        items = [f"Expenses take {ad['expense_ratio'] * 100:.0f}% of income; review the three largest categories and aim to cut 10%."]
+    else:
+        items = [f"Expenses are {ad['expense_ratio'] * 100:.0f}% of income; keep fixed costs such as rent and EMIs under half of income."]
+    items.append("Track spending every month and review subscriptions and other recurring payments each quarter.")
+    return items
+
+
+def _risk_management(user_data):
+    items = [PROFILE_RISK_NOTE.get(user_data["profile"], PROFILE_RISK_NOTE["Retiree"])]
+    if user_data["risk_tolerance"].lower() == "high":
+        items.append("Rebalance once a year, or when any bucket drifts more than 5 points from its target share.")
+    items.append("Keep the emergency fund separate from investments so a market fall never forces a sale.")
+    return items
+
+
+# Rule-based advice from analyze_finances output, in the section format split_advice_sections expects
+def build_local_advice(user_data, analysis_data):
+    _, label, _ = AUDIENCE.get(user_data["profile"], AUDIENCE["Retiree"])
+    names = ADVICE_SECTIONS.get(user_data["profile"], ADVICE_SECTIONS["Retiree"]).split(", ")
+    projection = project_cash_flow(user_data, analysis_data, years=10)
+    builders = {
+        "Existing Savings Utilization": lambda: _existing_savings(user_data, analysis_data),
+        "Monthly Savings Strategy": lambda: _monthly_savings(user_data, analysis_data),
+        "Debt Plan": lambda: _debt_plan(user_data, analysis_data, projection),
+        "Investment Advice": lambda: _investment_advice(user_data, analysis_data, "Investment Allocation" not in names),
+        "Investment Allocation": lambda: _allocation(analysis_data),
+        "Goal Guidance": lambda: _goal_guidance(user_data, projection),
+        "Budgeting & Expense Optimization": lambda: _budgeting(analysis_data),
+        "Risk Management": lambda: _risk_management(user_data)
+    }
+    lines = [f"Here is your personalized financial plan as a {label}.", "Current Financial Health:"]
+    lines.extend(_health(user_data, analysis_data))
+    for name in names:
+        lines.append(f"{name}:")
+        lines.extend(f"- {item}" for item in builders[name]())
+    return "\n".join(lines)
+
+
+# Simple profiles (no debt, no goals) get the local advice directly instead of an LLM call
+def is_simple_profile(user_data):
+    return user_data["debts"] <= 0 and not user_data["goals"]
@@ -0,0 +1,94 @@
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from finance_analysis import ALLOCATION_BUCKETS
+from projection import BUCKET_RETURNS, investment_starts
+
+# Annual return volatility per allocation bucket
+BUCKET_VOLATILITY = {
+    "High-Interest Savings / RD": 0.01,
+    "Stocks / Equity Funds": 0.18,
+    "ETFs / Balanced Funds": 0.12,
+    "Debt Mutual Funds / Bonds": 0.05
+}
+DEFAULT_PATHS = 20000
+CHUNK_PATHS = 5000
+
+
+# Simulate one chunk of paths; returns total portfolio value at each goal month, shape (goals, paths)
+def _simulate_chunk(seed_seq, n_paths, starts, contributions, mu, sigma, goal_months):
+    rng = np.random.default_rng(seed_seq)
+    balances = np.broadcast_to(starts, (n_paths, len(starts))).copy()
+    results = np.empty((len(goal_months), n_paths))
+    checkpoints = {month: i for i, month in enumerate(goal_months)}
+    for month in range(1, max(goal_months) + 1):
+        returns = rng.normal(mu, sigma, size=balances.shape)
+        balances *= 1 + returns
+        balances += contributions
+        if month in checkpoints:
+            results[checkpoints[month]] = balances.sum(axis=1)
+    return results
+
+
+# Accept {"name": (amount, months)} or [{"name", "amount", "months"}]
+def _normalize_goals(goals):
+    if isinstance(goals, dict):
+        return [{"name": name, "amount": float(amount), "months": int(months)} for name, (amount, months) in goals.items()]
+    return [{"name": g["name"], "amount": float(g["amount"]), "months": int(g["months"])} for g in goals]
+
+
+# Monte Carlo goal success: probability that the invested portfolio reaches each goal amount by its date
+# (user_data picks the policy split for existing savings when there is no monthly surplus to follow)
+def simulate_goal_success(analysis_data, goals, n_paths=DEFAULT_PATHS, seed=None, processes=None,
+                          bucket_returns=None, bucket_volatility=None, user_data=None):
+    goals = _normalize_goals(goals)
+    if not goals:
+        return []
+    bucket_returns = bucket_returns or BUCKET_RETURNS
+    bucket_volatility = bucket_volatility or BUCKET_VOLATILITY
+
+    allocation = analysis_data["recommended_investment_allocation"]
+    contributions = np.array([allocation.get(bucket, 0) for bucket in ALLOCATION_BUCKETS], dtype=float)
+    starts = investment_starts(analysis_data, contributions, user_data)
+    mu = np.array([bucket_returns.get(bucket, 0) for bucket in ALLOCATION_BUCKETS]) / 12
+    sigma = np.array([bucket_volatility.get(bucket, 0) for bucket in ALLOCATION_BUCKETS]) / np.sqrt(12)
+    goal_months = [max(1, g["months"]) for g in goals]
+
+    # Fixed-size chunks with spawned seeds: results depend on the seed only, not on the process count
+    sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS) + ([n_paths % CHUNK_PATHS] if n_paths % CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, starts, contributions, mu, sigma, goal_months) for s, n in zip(seeds, sizes)]
+    if processes and processes > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+    values = np.concatenate(chunks, axis=1)
+
+    today = datetime.date.today()
+    results = []
+    for i, goal in enumerate(goals):
+        p10, p50, p90 = np.percentile(values[i], [10, 50, 90])
+        month_index = today.month - 1 + goal_months[i]
+        results.append({
+            "name": goal["name"],
+            "amount": goal["amount"],
+            "months": goal_months[i],
+            "target_date": datetime.date(today.year + month_index // 12, month_index % 12 + 1, 1),
+            "probability": float((values[i] >= goal["amount"]).mean()),
+            "p10": float(p10),
+            "median": float(p50),
+            "p90": float(p90)
+        })
+    return results
+
+
+# Compact text block of goal odds for LLM prompts
+def format_goal_success(results):
+    return "\n".join(
+        f"- {r['name']}: ₹{r['amount']:,.0f} by {r['target_date']:%b %Y} -> {r['probability'] * 100:.0f}% likely "
+        f"(median ₹{r['median']:,.0f}, pessimistic ₹{r['p10']:,.0f})"
+        for r in results
+    )
@@ -0,0 +1,49 @@
+import hashlib
+import json
+
+# Stage dependencies: user_data / extra input fields each stage reads, plus upstream stages
+APP_STAGES = {
+    "analysis": {"fields": ["profile", "income", "expenses", "debts", "existing_savings", "risk_tolerance",
+                            "allocation_policy"], "upstream": []},
+    "advice": {"fields": ["profile", "goals"], "upstream": ["analysis"]},
+    "goal_plan": {"fields": ["profile", "goals", "user_instructions", "goal_outlook"], "upstream": ["analysis"]}
+}
+
+CACHED = "cached"
+COMPUTED = "computed"
+
+
+# Dependency-tracked pipeline: a stage re-runs only when its inputs or an upstream stage changed
+class Pipeline:
+    def __init__(self, stages=None):
+        self.stages = stages or APP_STAGES
+        self.results = {}
+        self.fingerprints = {}
+        self.status = {}
+
+    def fingerprint(self, name, inputs):
+        stage = self.stages[name]
+        payload = {
+            "fields": {field: inputs.get(field) for field in stage["fields"]},
+            "upstream": [self.fingerprints.get(up) for up in stage["upstream"]]
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def is_fresh(self, name, inputs):
+        return name in self.results and self.fingerprints[name] == self.fingerprint(name, inputs)
+
+    def store(self, name, inputs, result):
+        self.fingerprints[name] = self.fingerprint(name, inputs)
+        self.results[name] = result
+        self.status[name] = COMPUTED
+        return result
+
+    def run(self, name, inputs, compute):
+        if self.is_fresh(name, inputs):
+            self.status[name] = CACHED
+            return self.results[name]
+        return self.store(name, inputs, compute())
+
+    def mark_cached(self, name):
+        self.status[name] = CACHED
+        return self.results[name]
@@ -0,0 +1,161 @@
+import numpy as np
+
+from finance_analysis import ALLOCATION_BUCKETS, allocation_policy
+
+# Expected annual returns per allocation bucket
+BUCKET_RETURNS = {
+    "High-Interest Savings / RD": 0.065,
+    "Stocks / Equity Funds": 0.12,
+    "ETFs / Balanced Funds": 0.10,
+    "Debt Mutual Funds / Bonds": 0.075
+}
+DEBT_INTEREST_RATE = 0.10
+MIN_YEARS = 1
+MAX_YEARS = 40
+
+
+# First month a condition holds (0 if it already held at the start, None if never)
+def _first_month(months, reached, already=False):
+    if already:
+        return 0
+    return int(months[reached.argmax()]) if reached.any() else None
+
+
+# Month debt is cleared for good: 0 if there never was any, None if some is still owed at the end
+def _debt_free_month(months, debt, starting_debt):
+    if debt[-1] > 0:
+        return None
+    owed = np.flatnonzero(debt > 0)
+    if len(owed) == 0:
+        return 0 if starting_debt <= 0 else int(months[0])
+    return int(months[owed[-1] + 1])
+
+
+# Existing savings above the emergency fund, spread across buckets like the monthly contributions. With no
+# contributions (no monthly surplus, e.g. a retiree living off savings) the policy split for the profile is used.
+def investment_starts(analysis_data, contributions, user_data=None):
+    user_data = user_data or {}
+    total = contributions.sum()
+    if total > 0:
+        shares = contributions / total
+    else:
+        shares = np.array(allocation_policy.current().shares(
+            user_data.get("profile"), user_data.get("risk_tolerance", "Medium"), user_data.get("income", 0)
+        ))
+    return max(0, analysis_data["existing_savings"] - analysis_data["emergency_fund"]) * shares
+
+
+# Month-by-month cash-flow projection (all series are NumPy arrays, one value per month). Only the real
+# monthly surplus is spent: emergency fund top-up first, then the recommended investments, then debt
+# repayment, and what is left accumulates as cash. A monthly deficit is paid from the emergency fund, then
+# the investments, and after that it is borrowed.
+def project_cash_flow(user_data, analysis_data, years=10, bucket_returns=None, debt_interest_rate=DEBT_INTEREST_RATE):
+    if not MIN_YEARS <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between {MIN_YEARS} and {MAX_YEARS}")
+    bucket_returns = bucket_returns or BUCKET_RETURNS
+    months = np.arange(1, int(round(years * 12)) + 1)
+
+    surplus = user_data["income"] - user_data["expenses"]
+    allocation = analysis_data["recommended_investment_allocation"]
+    contributions = np.array([allocation.get(bucket, 0) for bucket in ALLOCATION_BUCKETS], dtype=float)
+    planned = contributions.sum()
+    target = analysis_data["emergency_fund"]
+    ef_monthly = analysis_data["emergency_fund_monthly"]
+    growth = 1 + np.array([bucket_returns.get(bucket, 0) for bucket in ALLOCATION_BUCKETS]) / 12
+    debt_growth = 1 + debt_interest_rate / 12
+
+    # Existing savings fill the emergency fund first; the rest is invested from month 0
+    ef_start = min(user_data["existing_savings"], target)
+    fund = ef_start
+    held = investment_starts(analysis_data, contributions, user_data)
+    debt = float(user_data["debts"])
+    cash = 0.0
+
+    emergency_fund = np.empty(len(months))
+    debts = np.empty(len(months))
+    cash_series = np.empty(len(months))
+    investments = np.empty((len(months), len(ALLOCATION_BUCKETS)))
+    for i in range(len(months)):
+        held = held * growth
+        debt *= debt_growth
+        if surplus >= 0:
+            left = surplus
+            top_up = min(ef_monthly, target - fund, left)
+            fund += top_up
+            left -= top_up
+            invest = min(planned, left)
+            if invest > 0:
+                held = held + contributions * (invest / planned)
+                left -= invest
+            payment = min(debt, left)
+            debt -= payment
+            cash += left - payment
+        else:
+            need = -surplus
+            drawn = min(fund, need)
+            fund -= drawn
+            need -= drawn
+            total = held.sum()
+            if need > 0 and total > 0:
+                drawn = min(total, need)
+                held = held * (1 - drawn / total)
+                need -= drawn
+            debt += need
+        emergency_fund[i] = fund
+        debts[i] = debt
+        cash_series[i] = cash
+        investments[i] = held
+
+    total_investments = investments.sum(axis=1)
+    net_worth = emergency_fund + cash_series + total_investments - debts
+
+    return {
+        "months": months,
+        "emergency_fund": emergency_fund,
+        "debt": debts,
+        "cash": cash_series,
+        "investments": {bucket: investments[:, i] for i, bucket in enumerate(ALLOCATION_BUCKETS)},
+        "total_investments": total_investments,
+        "net_worth": net_worth,
+        "emergency_fund_complete_month": _first_month(months, emergency_fund >= target, ef_start >= target),
+        "debt_free_month": _debt_free_month(months, debts, user_data["debts"])
+    }
+
+
+# Year-end snapshots of a projection
+def projection_milestones(projection, every_years=1):
+    months = projection["months"]
+    rows = []
+    for month in range(12 * every_years, int(months[-1]) + 1, 12 * every_years):
+        i = month - 1
+        rows.append({
+            "year": month // 12,
+            "emergency_fund": float(projection["emergency_fund"][i]),
+            "debt": float(projection["debt"][i]),
+            "investments": float(projection["total_investments"][i]),
+            "cash": float(projection["cash"][i]),
+            "net_worth": float(projection["net_worth"][i])
+        })
+    return rows
+
+
+def _month_label(month):
+    if month is None:
+        return "not within the projection"
+    if month == 0:
+        return "already"
+    return f"month {month} (year {(month - 1) // 12 + 1})"
+
+
+# Compact text block of computed numbers for LLM prompts
+def format_projection(projection, every_years=1):
+    lines = [
+        f"- Emergency fund complete: {_month_label(projection['emergency_fund_complete_month'])}",
+        f"- Debt free: {_month_label(projection['debt_free_month'])}"
+    ]
+    for row in projection_milestones(projection, every_years):
+        lines.append(
+            f"- Year {row['year']}: net worth ₹{row['net_worth']:,.0f}, investments ₹{row['investments']:,.0f}, "
+            f"emergency fund ₹{row['emergency_fund']:,.0f}, debt ₹{row['debt']:,.0f}"
+        )
+    return "\n".join(lines)
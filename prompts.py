@@ -0,0 +1,165 @@
+from functools import lru_cache
+
+from projection import project_cash_flow, format_projection
+
+# Shared prefix: identical across advice, goal plan and chat so it is sent (and cached upstream) the same way
+SYSTEM_PREFIX = """You are an expert, practical financial advisor for Indian users (amounts in ₹, monthly unless stated).
+Write plain text only: no markdown, bold, tables or special formatting. Be concise and specific to the profile below."""
+
+ADVICE_SECTIONS = {
+    "Student": "Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Goal Guidance, Budgeting & Expense Optimization, Risk Management",
+    "Professional": "Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Investment Allocation, Goal Guidance, Budgeting & Expense Optimization, Risk Management",
+    "Retiree": "Existing Savings Utilization, Monthly Savings Strategy, Debt Plan, Investment Advice, Investment Allocation, Goal Guidance, Budgeting & Expense Optimization, Risk Management"
+}
+AUDIENCE = {
+    "Student": ("a student living on pocket money", "student", "2-3"),
+    "Professional": ("a working professional managing salary, expenses, savings and investments", "professional", "5-7"),
+    "Retiree": ("a retiree relying on pension or passive income", "retiree", "5-7")
+}
+
+GOAL_SECTIONS = [
+    "Instruction Implementation Strategy",
+    "Financial Impact Analysis",
+    "Revised Goal Timeline",
+    "Monthly Action Plan",
+    "Resource Allocation Strategy",
+    "Risk Assessment & Mitigation",
+    "Progress Tracking Framework",
+    "Contingency Planning",
+    "Key Success Metrics",
+    "Next Immediate Actions"
+]
+
+# Rough budgets (estimated tokens) each prompt should stay under for a typical profile
+PROMPT_TOKEN_BUDGET = {"advice": 450, "goal_plan": 650, "chat": 350}
+
+
+def _money(value):
+    return f"₹{value:,.0f}"
+
+
+# Canonical key: only the fields that appear in the profile block, already rounded
+def _profile_key(user_data, analysis_data):
+    allocation = tuple(
+        (bucket, round(amount)) for bucket, amount in analysis_data["recommended_investment_allocation"].items()
+    )
+    return (
+        user_data["profile"],
+        round(user_data["income"]),
+        round(user_data["expenses"]),
+        round(user_data["debts"]),
+        round(user_data["existing_savings"]),
+        tuple(user_data["goals"]),
+        user_data["risk_tolerance"],
+        round(analysis_data["savings"]),
+        round(analysis_data["total_net_worth"]),
+        round(analysis_data["debt_to_income_ratio"] * 100, 1),
+        round(analysis_data["savings_ratio"] * 100, 1),
+        round(analysis_data["emergency_fund"]),
+        allocation
+    )
+
+
+@lru_cache(maxsize=256)
+def _render_profile_block(key):
+    (profile, income, expenses, debts, existing, goals, risk,
+     savings, net_worth, dti, savings_ratio, emergency_fund, allocation) = key
+    total = sum(amount for _, amount in allocation)
+    split = "; ".join(
+        f"{bucket} {amount / total * 100:.0f}% ({_money(amount)})" for bucket, amount in allocation
+    ) if total else "none (no monthly surplus)"
+    return "\n".join([
+        "Profile:",
+        f"- Type: {profile}; risk tolerance: {risk}",
+        f"- Income {_money(income)}, expenses {_money(expenses)}, savings {_money(savings)} ({savings_ratio:.1f}% of income)",
+        f"- Existing savings & investments {_money(existing)}; debts {_money(debts)} ({dti:.1f}% of monthly income)",
+        f"- Net worth {_money(net_worth)}; emergency fund target {_money(emergency_fund)}",
+        f"- Recommended monthly investment: {split}",
+        f"- Goals: {', '.join(goals) if goals else 'not specified'}"
+    ])
+
+
+# Compact profile block, rendered once per analysis and shared by every prompt
+def build_profile_block(user_data, analysis_data):
+    return _render_profile_block(_profile_key(user_data, analysis_data))
+
+
+# Prompt: Personalized Financial Advice
+def build_advice_prompt(user_data, analysis_data):
+    audience, label, length = AUDIENCE.get(user_data["profile"], AUDIENCE["Retiree"])
+    sections = ADVICE_SECTIONS.get(user_data["profile"], ADVICE_SECTIONS["Retiree"])
+    return f"""{SYSTEM_PREFIX}
+
+{build_profile_block(user_data, analysis_data)}
+
+Task: write a personalized financial plan for {audience}.
+- Start with: "Here is your personalized financial plan as a {label}."
+- Then "Current Financial Health:" summarizing income, expenses, savings, existing savings and debt in {length} sentences.
+- Then these sections, each header on its own line ending with a colon, followed by short actionable "-" bullets: {sections}.
+- Say how to use the existing savings: debt repayment, completing the emergency fund, or accelerating goals.
+- Tailor to the profile and risk tolerance; no executive summary or long paragraphs."""
+
+
+# Prompt: Advanced Goal Oriented plan with User Instructions
+def build_goal_plan_prompt(user_data, analysis_data, user_instructions="", goal_outlook=""):
+    projection = format_projection(project_cash_flow(user_data, analysis_data, years=10), every_years=2)
+    outlook = f"\nGoal success odds (Monte Carlo, recommended allocation):\n{goal_outlook}\n" if goal_outlook else ""
+    return f"""{SYSTEM_PREFIX}
+
+{build_profile_block(user_data, analysis_data)}
+
+Projected balances on the current plan (computed; use these instead of recalculating):
+{projection}
+{outlook}
+User instructions (top priority, non-negotiable; build the whole plan around them without compromising basic financial security):
+{user_instructions}
+
+Task: write a goal-specific plan that implements the instructions.
+- Use exactly these section headers, each on its own line ending with a colon: {", ".join(GOAL_SECTIONS)}.
+- 3-5 "-" bullets per section starting right under the header; no numbering.
+- Give specific ₹ amounts, monthly breakdowns, dates and the formulas behind timelines, starting from the projected balances.
+- Be honest about trade-offs and risks the instructions introduce; use simple language."""
+
+
+CHAT_RULES = """Answer rules:
+- If the question is not about finance, budgeting, savings, debts, investments or goals, reply: "I'm a financial advisor, so I can best answer questions about budgeting, savings, debts, investments, and financial planning."
+- Answer only the question. Define any financial term or abbreviation (e.g. SIP, ROI) briefly and relate it to this profile.
+- Give 3-5 actionable points with numbers where relevant, using the profile and existing savings only when it adds value.
+- Avoid characters like _, +, *."""
+
+
+# Prompt: Chatbot Query
+def build_chat_prompt(user_data, analysis_data, user_query):
+    return f"""{SYSTEM_PREFIX}
+
+{build_profile_block(user_data, analysis_data)}
+
+Question: {user_query}
+
+{CHAT_RULES}"""
+
+
+# Prompt: opening context of a multi-turn chat (questions follow as separate messages)
+def build_chat_context(user_data, analysis_data, summary=""):
+    earlier = f"\n\nEarlier in this conversation:\n{summary}" if summary else ""
+    return f"""{SYSTEM_PREFIX}
+
+{build_profile_block(user_data, analysis_data)}{earlier}
+
+You will now answer the user's questions one at a time; follow-up questions refer to earlier answers.
+{CHAT_RULES}"""
+
+
+# Token estimate (~4 characters per token for English text)
+def estimate_tokens(text):
+    return max(1, round(len(text) / 4))
+
+
+# Estimated tokens per prompt, to keep an eye on input size
+def prompt_token_report(user_data, analysis_data, user_instructions="", user_query=""):
+    return {
+        "profile_block": estimate_tokens(build_profile_block(user_data, analysis_data)),
+        "advice": estimate_tokens(build_advice_prompt(user_data, analysis_data)),
+        "goal_plan": estimate_tokens(build_goal_plan_prompt(user_data, analysis_data, user_instructions)),
+        "chat": estimate_tokens(build_chat_prompt(user_data, analysis_data, user_query))
+    }
@@ -0,0 +1,238 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from finance_analysis import analyze_finances_batch, ALLOCATION_BUCKETS, PROFILE_TYPES, RISK_LEVELS
+
+RISK_LABELS = [level.title() for level in RISK_LEVELS]
+PROFILE_NUMERIC_FIELDS = ["income", "expenses", "debts", "existing_savings"]
+ANALYSIS_NUMERIC_FIELDS = [
+    "savings", "debt_to_income_ratio", "savings_ratio", "expense_ratio", "debt_to_savings_ratio",
+    "investment_capacity", "emergency_fund", "emergency_fund_shortfall", "emergency_fund_monthly",
+    "total_net_worth", "existing_savings"
+]
+
+
+def _amount(name, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{name} must be a non-negative number, got {value!r}")
+    return value
+
+
+# Profile record: validated, immutable user_data (profile and risk labels normalised, goals as a tuple)
+@dataclass(frozen=True, slots=True)
+class ProfileRecord:
+    profile: str
+    income: float
+    expenses: float
+    debts: float
+    existing_savings: float
+    goals: tuple = ()
+    risk_tolerance: str = "Medium"
+
+    def __post_init__(self):
+        if self.profile not in PROFILE_TYPES:
+            raise ValueError(f"profile must be one of {', '.join(PROFILE_TYPES)}, got {self.profile!r}")
+        risk = str(self.risk_tolerance).title()
+        if risk not in RISK_LABELS:
+            raise ValueError(f"risk_tolerance must be one of {', '.join(RISK_LABELS)}, got {self.risk_tolerance!r}")
+        # Frozen: normalised values are written through object.__setattr__
+        object.__setattr__(self, "risk_tolerance", risk)
+        for field in PROFILE_NUMERIC_FIELDS:
+            object.__setattr__(self, field, _amount(field, getattr(self, field)))
+        goals = (self.goals,) if isinstance(self.goals, str) else self.goals
+        object.__setattr__(self, "goals", tuple(str(goal).strip() for goal in goals if str(goal).strip()))
+
+    # Extra keys (e.g. goal-plan instructions) are ignored; goals and risk tolerance are optional
+    @classmethod
+    def from_dict(cls, user_data):
+        missing = [field for field in ["profile"] + PROFILE_NUMERIC_FIELDS if field not in user_data]
+        if missing:
+            raise ValueError(f"Missing profile fields: {', '.join(missing)}")
+        return cls(
+            user_data["profile"],
+            user_data["income"],
+            user_data["expenses"],
+            user_data["debts"],
+            user_data["existing_savings"],
+            user_data.get("goals", ()),
+            user_data.get("risk_tolerance", "Medium")
+        )
+
+    def to_dict(self):
+        return {
+            "profile": self.profile,
+            "income": self.income,
+            "expenses": self.expenses,
+            "debts": self.debts,
+            "existing_savings": self.existing_savings,
+            "goals": list(self.goals),
+            "risk_tolerance": self.risk_tolerance
+        }
+
+
+# Analysis record: the analyze_finances result; allocation kept as (bucket, amount) pairs in rule order
+@dataclass(frozen=True, slots=True)
+class AnalysisRecord:
+    savings: float
+    debt_to_income_ratio: float
+    savings_ratio: float
+    expense_ratio: float
+    debt_to_savings_ratio: float
+    investment_capacity: float
+    emergency_fund: float
+    emergency_fund_shortfall: float
+    emergency_fund_monthly: float
+    total_net_worth: float
+    existing_savings: float
+    recommended_investment_allocation: tuple
+    high_debt_alert: bool
+
+    def __post_init__(self):
+        for field in ANALYSIS_NUMERIC_FIELDS:
+            value = float(getattr(self, field))
+            if not math.isfinite(value):
+                raise ValueError(f"{field} must be finite, got {value!r}")
+            object.__setattr__(self, field, value)
+        allocation = self.recommended_investment_allocation
+        if isinstance(allocation, dict):
+            allocation = allocation.items()
+        allocation = tuple((bucket, float(amount)) for bucket, amount in allocation)
+        unknown = [bucket for bucket, _ in allocation if bucket not in ALLOCATION_BUCKETS]
+        if unknown:
+            raise ValueError(f"Unknown allocation buckets: {', '.join(unknown)}")
+        object.__setattr__(self, "recommended_investment_allocation", allocation)
+        object.__setattr__(self, "high_debt_alert", bool(self.high_debt_alert))
+
+    @classmethod
+    def from_dict(cls, analysis_data):
+        return cls(**analysis_data)
+
+    def to_dict(self):
+        analysis_data = {field: getattr(self, field) for field in ANALYSIS_NUMERIC_FIELDS}
+        analysis_data["recommended_investment_allocation"] = dict(self.recommended_investment_allocation)
+        analysis_data["high_debt_alert"] = self.high_debt_alert
+        return analysis_data
+
+
+def _codes(name, labels, values, normalise=str):
+    lookup = {label: i for i, label in enumerate(labels)}
+    try:
+        return np.fromiter((lookup[normalise(value)] for value in values), dtype=np.uint8)
+    except KeyError as e:
+        raise ValueError(f"{name} must be one of {', '.join(labels)}, got {e.args[0]!r}")
+
+
+# Profile batch: struct-of-arrays for bulk work. Amounts are float64 columns, profile type and risk are
+# uint8 codes, and goals are a shared vocabulary plus CSR-style offsets (row i owns codes[offsets[i]:offsets[i + 1]])
+class ProfileBatch:
+    __slots__ = ("income", "expenses", "debts", "existing_savings", "profile", "risk",
+                 "goal_offsets", "goal_codes", "goal_names")
+
+    def __init__(self, income, expenses, debts, existing_savings, profile=None, risk=None,
+                 goal_offsets=None, goal_codes=None, goal_names=None):
+        amounts = [np.ascontiguousarray(values, dtype=np.float64) for values in (income, expenses, debts, existing_savings)]
+        n = len(amounts[0])
+        for field, values in zip(PROFILE_NUMERIC_FIELDS, amounts):
+            if values.shape != (n,):
+                raise ValueError(f"{field} must be a 1-D column of length {n}")
+            if not np.isfinite(values).all() or (values < 0).any():
+                raise ValueError(f"{field} must hold non-negative numbers")
+        self.income, self.expenses, self.debts, self.existing_savings = amounts
+        self.profile = np.zeros(n, dtype=np.uint8) if profile is None else np.asarray(profile, dtype=np.uint8)
+        self.risk = np.full(n, RISK_LEVELS.index("medium"), dtype=np.uint8) if risk is None else np.asarray(risk, dtype=np.uint8)
+        if self.profile.shape != (n,) or self.profile.max(initial=0) >= len(PROFILE_TYPES):
+            raise ValueError(f"profile codes must index PROFILE_TYPES for {n} rows")
+        if self.risk.shape != (n,) or self.risk.max(initial=0) >= len(RISK_LEVELS):
+            raise ValueError(f"risk codes must index RISK_LEVELS for {n} rows")
+        self.goal_offsets = np.zeros(n + 1, dtype=np.int64) if goal_offsets is None else np.asarray(goal_offsets, dtype=np.int64)
+        self.goal_codes = np.zeros(0, dtype=np.int32) if goal_codes is None else np.asarray(goal_codes, dtype=np.int32)
+        self.goal_names = list(goal_names or [])
+        if self.goal_offsets.shape != (n + 1,) or self.goal_offsets[-1] != len(self.goal_codes):
+            raise ValueError("goal_offsets must have one entry per row plus one, ending at len(goal_codes)")
+
+    # Columns in the shape make_profiles / analyze_finances_batch use (risk labels may be strings)
+    @classmethod
+    def from_columns(cls, columns):
+        risk = columns.get("risk_tolerance")
+        profile = columns.get("profile")
+        return cls(
+            columns["income"], columns["expenses"], columns["debts"], columns["existing_savings"],
+            None if profile is None else _codes("profile", PROFILE_TYPES, profile),
+            None if risk is None else _codes("risk_tolerance", RISK_LABELS, risk, lambda value: str(value).title())
+        )
+
+    @classmethod
+    def from_dicts(cls, rows):
+        rows = rows if isinstance(rows, list) else list(rows)
+        vocabulary = {}
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        codes = []
+        for i, row in enumerate(rows):
+            for goal in row.get("goals", ()):
+                codes.append(vocabulary.setdefault(goal, len(vocabulary)))
+            offsets[i + 1] = len(codes)
+        return cls(
+            *[np.fromiter((row.get(field, 0) for row in rows), dtype=np.float64, count=len(rows))
+              for field in PROFILE_NUMERIC_FIELDS],
+            _codes("profile", PROFILE_TYPES, (row.get("profile", "Professional") for row in rows)),
+            _codes("risk_tolerance", RISK_LABELS, (row.get("risk_tolerance", "Medium") for row in rows), lambda value: str(value).title()),
+            offsets, np.asarray(codes, dtype=np.int32), list(vocabulary)
+        )
+
+    def __len__(self):
+        return len(self.income)
+
+    def goals(self, i):
+        start, end = self.goal_offsets[i], self.goal_offsets[i + 1]
+        return [self.goal_names[code] for code in self.goal_codes[start:end]]
+
+    def record(self, i):
+        return ProfileRecord(
+            PROFILE_TYPES[self.profile[i]], self.income[i], self.expenses[i], self.debts[i],
+            self.existing_savings[i], tuple(self.goals(i)), RISK_LABELS[self.risk[i]]
+        )
+
+    def to_dicts(self):
+        columns = [self.income.tolist(), self.expenses.tolist(), self.debts.tolist(), self.existing_savings.tolist()]
+        profiles = [PROFILE_TYPES[code] for code in self.profile.tolist()]
+        risks = [RISK_LABELS[code] for code in self.risk.tolist()]
+        offsets = self.goal_offsets.tolist()
+        goals = [self.goal_names[code] for code in self.goal_codes.tolist()]
+        return [
+            {
+                "profile": profiles[i],
+                "income": income,
+                "expenses": expenses,
+                "debts": debts,
+                "existing_savings": existing_savings,
+                "goals": goals[offsets[i]:offsets[i + 1]],
+                "risk_tolerance": risks[i]
+            }
+            for i, (income, expenses, debts, existing_savings) in enumerate(zip(*columns))
+        ]
+
+    # Columns for analyze_finances_batch (profile and risk as integer codes, so no string matching)
+    def columns(self):
+        return {
+            "profile": self.profile,
+            "income": self.income,
+            "expenses": self.expenses,
+            "debts": self.debts,
+            "existing_savings": self.existing_savings,
+            "risk_tolerance": self.risk
+        }
+
+    def analyze(self):
+        return analyze_finances_batch(self.columns())
+
+    @property
+    def nbytes(self):
+        arrays = (self.income, self.expenses, self.debts, self.existing_savings, self.profile, self.risk,
+                  self.goal_offsets, self.goal_codes)
+        return sum(array.nbytes for array in arrays) + sum(len(name) for name in self.goal_names)
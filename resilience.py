@@ -0,0 +1,253 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+
+# Error class names (google.api_core and friends) and HTTP codes that are worth retrying
+RETRYABLE_ERRORS = {
+    "DeadlineExceeded", "ServiceUnavailable", "ResourceExhausted", "TooManyRequests",
+    "InternalServerError", "GatewayTimeout", "Aborted", "Unavailable"
+}
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_retryable(error):
+    if isinstance(error, (TimeoutError, ConnectionError)) and not isinstance(error, CircuitOpenError):
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_CODES
+
+
+# Circuit breaker: opens after consecutive failures, lets one trial call through after a cool-down
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_seconds=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    def allow(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def stats(self):
+        with self.lock:
+            return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
+
+
+# Run fn on a daemon thread, calling release() when it returns: a call abandoned at its deadline can't be
+# cancelled and must not block exit, but it holds its slot until it returns
+def _submit(release, fn, *args):
+    future = Future()
+
+    def run():
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            release()
+
+    threading.Thread(target=run, name="llm-call", daemon=True).start()
+    return future
+
+
+# Resilient caller: per-call deadline, jittered exponential retry, optional hedging, circuit breaker.
+# Calls run on at most max_threads threads; with all of them stuck on a hung upstream, new calls wait for
+# a free one until their deadline and then fail like any other timeout.
+class ResilientCaller:
+    def __init__(self, timeout=30.0, retries=2, base_delay=0.5, max_delay=8.0, hedge_after=None,
+                 breaker=None, sleep=time.sleep, rng=None, max_threads=16):
+        self.timeout = timeout
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.max_threads = max_threads
+        self.slots = threading.BoundedSemaphore(max_threads)
+        self.busy = 0
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retried = 0
+        self.hedged = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    # Start fn on a call thread once one is free (waiting no later than the deadline; not at all if wait is False)
+    def _start(self, fn, deadline, wait=True):
+        if wait:
+            acquired = self.slots.acquire(timeout=max(0.0, deadline - time.monotonic()))
+        else:
+            acquired = self.slots.acquire(blocking=False)
+        if not acquired:
+            if not wait:
+                return None
+            self._count("timeouts")
+            raise DeadlineExceeded("No free LLM call thread before the deadline")
+        with self.lock:
+            self.busy += 1
+        return _submit(self._release, fn)
+
+    def _release(self):
+        with self.lock:
+            self.busy -= 1
+        self.slots.release()
+
+    # Breaker bookkeeping: only errors that say the upstream is unhealthy (timeouts, 5xx, dropped connections,
+    # cancelled calls) count as failures; a non-retryable error such as a 4xx means it answered
+    def record_outcome(self, error=None):
+        if error is None or (isinstance(error, Exception) and not is_retryable(error)):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    # Full jitter: sleep a random time up to the exponential backoff, never past the deadline
+    def _backoff(self, attempt, deadline):
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        delay = min(delay, deadline - time.monotonic())
+        if delay > 0:
+            self.sleep(delay)
+
+    # One attempt, plus a hedged duplicate if the first is still running after hedge_after seconds
+    def _attempt(self, fn, deadline, hedge):
+        futures = [self._start(fn, deadline)]
+        if hedge and self.hedge_after is not None and self.hedge_after < deadline - time.monotonic():
+            done, _ = wait(futures, timeout=self.hedge_after)
+            # No hedge when every call thread is busy: a duplicate request would only add load
+            duplicate = None if done else self._start(fn, deadline, wait=False)
+            if duplicate is not None:
+                self._count("hedged")
+                futures.append(duplicate)
+        error = None
+        while futures:
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if not futures:
+            raise error
+        self._count("timeouts")
+        raise DeadlineExceeded(f"LLM call exceeded its {self.timeout:g}s deadline")
+
+    def call(self, fn, fallback=None, hedge=True):
+        self._count("calls")
+        if not self.breaker.allow():
+            return self._fail(CircuitOpenError("LLM circuit breaker is open; failing fast"), fallback)
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(self.retries + 1):
+            try:
+                result = self._attempt(fn, deadline, hedge)
+            except Exception as e:
+                if attempt < self.retries and is_retryable(e) and time.monotonic() < deadline:
+                    self._count("retried")
+                    self._backoff(attempt, deadline)
+                    continue
+                self.record_outcome(e)
+                return self._fail(e, fallback)
+            self.record_outcome()
+            return result
+
+    # Streaming call: opening the stream and its first chunk go through call() (never hedged, which
+    # would leave two open streams); one reader thread then pulls the rest, and each chunk must
+    # arrive within the timeout
+    def stream(self, open_stream):
+        done = object()
+
+        def first_chunk():
+            iterator = iter(open_stream())
+            return iterator, next(iterator, done)
+
+        iterator, chunk = self.call(first_chunk, hedge=False)
+        if chunk is done:
+            return
+        chunks = queue.Queue()
+
+        def read():
+            try:
+                for item in iterator:
+                    chunks.put((item, None))
+                chunks.put((done, None))
+            except BaseException as e:
+                chunks.put((None, e))
+
+        self._start(read, time.monotonic() + self.timeout)
+        while chunk is not done:
+            yield chunk
+            try:
+                chunk, error = chunks.get(timeout=self.timeout)
+            except queue.Empty:
+                self._count("timeouts")
+                self.breaker.record_failure()
+                raise DeadlineExceeded(f"LLM stream stalled for more than {self.timeout:g}s")
+            if error is not None:
+                self.record_outcome(error)
+                raise error
+
+    def _fail(self, error, fallback):
+        if fallback is None:
+            raise error
+        self._count("fallbacks")
+        return fallback(error)
+
+    def stats(self):
+        with self.lock:
+            counters = {
+                "calls": self.calls,
+                "retried": self.retried,
+                "hedged": self.hedged,
+                "timeouts": self.timeouts,
+                "fallbacks": self.fallbacks,
+                "busy_threads": self.busy
+            }
+        counters["breaker"] = self.breaker.stats()
+        return counters
@@ -0,0 +1,226 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+# Question words that change the phrasing but not what is being asked
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "did", "can", "could", "should", "would", "will",
+    "i", "me", "my", "we", "you", "your", "it", "its", "this", "that", "of", "to", "in", "on", "for", "about",
+    "what", "whats", "how", "why", "explain", "tell", "describe", "define", "meaning", "mean", "means",
+    "work", "works", "working", "please", "kindly", "exactly", "really", "there", "some", "any"
+}
+IVF_MIN_VECTORS = 2048
+IVF_PROBES = 8
+SAVE_EVERY = 16
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# Numbers are kept at any length ("retire in 5 years"); other one-letter tokens are dropped
+def _tokens(text):
+    tokens = []
+    for token in _TOKEN.findall(text.lower().replace("'", "")):
+        if token.isdigit():
+            tokens.append(token)
+            continue
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+# Numbers in a question, which must match exactly for a cached answer to be reused ("1 crore" vs "5 crore")
+def _numbers(text):
+    return sorted(token for token in _TOKEN.findall(text.lower()) if token.isdigit())
+
+
+def _feature_index(feature, dim):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+# Deterministic local embedding: signed feature hashing of words and character trigrams, L2-normalized
+def embed(text, dim=EMBEDDING_DIM):
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in _tokens(text):
+        index, sign = _feature_index("w:" + token, dim)
+        vector[index] += 2.0 * sign
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            index, sign = _feature_index("c:" + padded[i:i + 3], dim)
+            vector[index] += sign
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Cache scope: hash of the profile block the answer's prompt was built from. Answers quote the user's own
+# figures, so they are only reused for an identical profile, never across users with different numbers
+def profile_scope(profile_block):
+    return hashlib.sha256(profile_block.encode("utf-8")).hexdigest()
+
+
+def _bucket_file(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".npy"
+
+
+# One profile scope: a growable float32 matrix of unit vectors, with an IVF index once it gets large
+class _Bucket:
+    def __init__(self, dim, vectors=None, questions=None, answers=None, ivf=True):
+        self.vectors = vectors if vectors is not None else np.zeros((16, dim), dtype=np.float32)
+        self.size = len(questions) if questions else 0
+        self.questions = questions or []
+        self.answers = answers or []
+        self.centroids = None
+        self.lists = None
+        self.trained_size = 0
+        self.ivf = ivf
+
+    def add(self, vector, question, answer):
+        if self.size == len(self.vectors) or not self.vectors.flags.writeable:
+            grown = np.zeros((max(16, 2 * len(self.vectors)), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.vectors[self.size] = vector
+        self.questions.append(question)
+        self.answers.append(answer)
+        if self.lists is not None:
+            nearest = int(np.argmax(self.centroids @ vector))
+            self.lists[nearest] = np.append(self.lists[nearest], self.size)
+        self.size += 1
+        if self.lists is not None and self.size >= 2 * self.trained_size:
+            self.train()
+
+    # Spherical k-means (deterministic init) over the stored vectors, sqrt(n) lists
+    def train(self, iterations=8):
+        data = self.vectors[:self.size]
+        nlist = max(1, int(np.sqrt(self.size)))
+        centroids = data[np.linspace(0, self.size - 1, nlist).astype(int)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1), centroids)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assign == i) for i in range(nlist)]
+        self.trained_size = self.size
+
+    # Brute force below IVF_MIN_VECTORS; above it the index is trained on first search and retrained as it doubles
+    def search(self, vector, probes=IVF_PROBES):
+        if self.size == 0:
+            return -1, 0.0
+        if self.lists is None and self.ivf and self.size >= IVF_MIN_VECTORS:
+            self.train()
+        if self.lists is None:
+            scores = self.vectors[:self.size] @ vector
+            best = int(np.argmax(scores))
+            return best, float(scores[best])
+        nearest = np.argsort(self.centroids @ vector)[::-1][:probes]
+        candidates = np.concatenate([self.lists[i] for i in nearest])
+        if len(candidates) == 0:
+            return -1, 0.0
+        scores = self.vectors[candidates] @ vector
+        best = int(np.argmax(scores))
+        return int(candidates[best]), float(scores[best])
+
+
+# Semantic Cache: near-duplicate chatbot questions about the same profile share one answer
+class SemanticCache:
+    def __init__(self, threshold=0.9, dim=EMBEDDING_DIM, path=None, embed_fn=None, ivf=True):
+        self.threshold = threshold
+        self.dim = dim
+        self.ivf = ivf
+        self.path = path
+        self.embed_fn = embed_fn or (lambda text: embed(text, dim))
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+        if path:
+            self.load(path)
+            atexit.register(self.save)
+
+    def lookup(self, profile_block, question):
+        vector = self.embed_fn(question)
+        with self.lock:
+            bucket = self.buckets.get(profile_scope(profile_block))
+            index, score = bucket.search(vector) if bucket else (-1, 0.0)
+            if index < 0 or score < self.threshold or _numbers(bucket.questions[index]) != _numbers(question):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return bucket.answers[index]
+
+    def add(self, profile_block, question, answer):
+        vector = self.embed_fn(question)
+        with self.lock:
+            key = profile_scope(profile_block)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = _Bucket(self.dim, ivf=self.ivf)
+            bucket.add(vector, question, answer)
+            self.unsaved += 1
+            save = self.path and self.unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def clear(self):
+        with self.lock:
+            self.buckets = {}
+            self.unsaved = 0
+
+    # One .npy matrix per profile scope plus a JSON index of questions and answers
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(path, exist_ok=True)
+        with self.lock:
+            index = {}
+            for key, bucket in self.buckets.items():
+                name = _bucket_file(key)
+                if bucket.vectors.flags.writeable:
+                    # Written under a new name and swapped in, so a live memory map of the old file stays valid
+                    with open(os.path.join(path, name + ".tmp"), "wb") as f:
+                        np.save(f, bucket.vectors[:bucket.size])
+                    os.replace(os.path.join(path, name + ".tmp"), os.path.join(path, name))
+                index[key] = {"file": name, "questions": bucket.questions, "answers": bucket.answers}
+            self.unsaved = 0
+        with open(os.path.join(path, "index.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "buckets": index}, f, ensure_ascii=False)
+        os.replace(os.path.join(path, "index.json.tmp"), os.path.join(path, "index.json"))
+
+    # Matrices are memory-mapped read-only; a bucket is copied into memory on its first new entry
+    def load(self, path):
+        index_path = os.path.join(path, "index.json")
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index["dim"] != self.dim:
+            return
+        with self.lock:
+            for key, entry in index["buckets"].items():
+                vectors = np.load(os.path.join(path, entry["file"]), mmap_mode="r")
+                self.buckets[key] = _Bucket(self.dim, vectors, entry["questions"], entry["answers"], self.ivf)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "buckets": len(self.buckets),
+                "entries": sum(bucket.size for bucket in self.buckets.values())
+            }
@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import ai_advisor
+import visualization
+from tracing import span, tracer
+
+
+class ServiceBusy(RuntimeError):
+    pass
+
+
+# Fair queue: one FIFO per session, sessions served round-robin, so a session with many queued
+# requests can't starve the others; each session may only queue max_per_session requests
+class FairQueue:
+    def __init__(self, max_per_session=4):
+        self.max_per_session = max_per_session
+        self.cond = threading.Condition()
+        self.sessions = OrderedDict()
+        self.depth = 0
+        self.max_depth = 0
+        self.closed = False
+
+    def put(self, session_id, task):
+        with self.cond:
+            if self.closed:
+                raise ServiceBusy("Advisor service is shut down")
+            tasks = self.sessions.get(session_id)
+            if tasks is None:
+                tasks = self.sessions[session_id] = deque()
+            if len(tasks) >= self.max_per_session:
+                raise ServiceBusy(f"Too many pending requests for this session (limit {self.max_per_session})")
+            tasks.append(task)
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            self.cond.notify()
+
+    # Next task from the session at the head of the rotation, which then moves to the back; None once closed
+    def get(self):
+        with self.cond:
+            while not self.sessions and not self.closed:
+                self.cond.wait()
+            if not self.sessions:
+                return None
+            session_id, tasks = next(iter(self.sessions.items()))
+            task = tasks.popleft()
+            self.depth -= 1
+            if tasks:
+                self.sessions.move_to_end(session_id)
+            else:
+                del self.sessions[session_id]
+            return task
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "waiting_sessions": len(self.sessions),
+                "deepest_session": max((len(tasks) for tasks in self.sessions.values()), default=0)
+            }
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# Advisor Service: one per process, shared by every Streamlit session. LLM work runs on a bounded
+# pool of workers fed by the fair queue; responses and rendered figures come from the process-wide
+# caches in ai_advisor and visualization, so identical work across sessions is done once.
+class AdvisorService:
+    def __init__(self, workers=8, max_pending_per_session=4, clock=time.monotonic):
+        self.workers = workers
+        self.clock = clock
+        self.queue = FairQueue(max_pending_per_session)
+        self.response_cache = ai_advisor.response_cache
+        self.lock = threading.Lock()
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=1000)
+        self.threads = [
+            threading.Thread(target=self._work, name=f"advisor-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    # The caller's open span goes with the task, so spans on the worker stay in the caller's trace
+    def submit(self, session_id, fn, *args):
+        future = Future()
+        try:
+            self.queue.put(session_id, (future, fn, args, self.clock(), tracer.current()))
+        except ServiceBusy:
+            with self.lock:
+                self.rejected += 1
+            raise
+        with self.lock:
+            self.submitted += 1
+        return future
+
+    def _work(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            future, fn, args, queued_at, parent = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.lock:
+                self.active += 1
+                self.waits.append(self.clock() - queued_at)
+            try:
+                with tracer.attach(parent):
+                    result = fn(*args)
+                future.set_result(result)
+                failed = False
+            except BaseException as e:
+                future.set_exception(e)
+                failed = True
+            with self.lock:
+                self.active -= 1
+                self.completed += 1
+                self.failed += failed
+
+    # Run a streaming generator on a worker and relay its chunks to the calling session as they arrive.
+    # If the request can't be queued, fallback(error) supplies the text instead (or the error is raised).
+    def stream(self, session_id, open_stream, fallback=None):
+        chunks = queue.Queue()
+        done = object()
+
+        def pump():
+            try:
+                for chunk in open_stream():
+                    chunks.put(chunk)
+            finally:
+                chunks.put(done)
+
+        with span("service.stream") as current:
+            try:
+                future = self.submit(session_id, pump)
+            except ServiceBusy as e:
+                current.set("rejected", True)
+                if fallback is None:
+                    raise
+                yield fallback(e)
+                return
+            queued_at = self.clock()
+            chunk = chunks.get()
+            current.set("first_chunk_wait_ms", round((self.clock() - queued_at) * 1000, 3))
+            while chunk is not done:
+                yield chunk
+                chunk = chunks.get()
+            future.result()
+
+    def stream_advice(self, session_id, user_data, analysis_data):
+        # Rule-based advice needs no model call, so it skips the queue
+        if ai_advisor.use_local_advice(user_data):
+            return ai_advisor.stream_financial_advice(user_data, analysis_data)
+        return self.stream(
+            session_id, lambda: ai_advisor.stream_financial_advice(user_data, analysis_data),
+            lambda e: ai_advisor.advice_fallback(user_data, analysis_data, e)
+        )
+
+    def stream_goal_plan(self, session_id, user_data, analysis_data, user_instructions="", goal_outlook=""):
+        return self.stream(
+            session_id, lambda: ai_advisor.stream_goal_plan(user_data, analysis_data, user_instructions, goal_outlook),
+            lambda e: ai_advisor.local_fallback(user_data, analysis_data, e)
+        )
+
+    def stream_chat(self, session_id, chat_session, user_data, analysis_data, question):
+        return self.stream(
+            session_id, lambda: chat_session.stream_reply(user_data, analysis_data, question),
+            lambda e: ai_advisor.local_fallback(user_data, None, e)
+        )
+
+    # Server-rendered overview chart from the shared figure cache
+    def chart(self, user_data, analysis_data, fmt="png"):
+        return visualization.render_advised_financial_overview(user_data, analysis_data, fmt)
+
+    def close(self):
+        self.queue.close()
+        for thread in self.threads:
+            thread.join()
+
+    def stats(self):
+        with self.lock:
+            waits = list(self.waits)
+            counters = {
+                "workers": self.workers,
+                "active": self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected
+            }
+        counters.update(self.queue.stats())
+        counters["wait_p50_ms"] = round(_percentile(waits, 0.5) * 1000, 3)
+        counters["wait_p95_ms"] = round(_percentile(waits, 0.95) * 1000, 3)
+        counters["response_cache"] = self.response_cache.stats()
+        counters["figure_cache"] = len(visualization._figure_cache)
+        counters["coalescing"] = ai_advisor.coalescing_stats()
+        return counters
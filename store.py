@@ -0,0 +1,161 @@
+import atexit
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from records import AnalysisRecord
+
+# Record kinds; the latest of each is restored, chat turns are restored in full
+PROFILE = "profile"
+ANALYSIS = "analysis"
+ADVICE = "advice"
+GOAL_PLAN = "goal_plan"
+CHAT = "chat"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    "id TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS records ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, kind TEXT NOT NULL, "
+    "created_at REAL NOT NULL, payload TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS records_session ON records (session_id, kind, id)"
+]
+
+# Chat turns restored per session (the chat session keeps no more than this either)
+RESTORE_CHAT_TURNS = 20
+
+# One indexed query: the latest record of every other kind plus the last chat turns, in write order
+LOAD_SESSION = (
+    "SELECT kind, payload FROM records WHERE session_id = ? AND ("
+    "id IN (SELECT MAX(id) FROM records WHERE session_id = ? AND kind != 'chat' GROUP BY kind) OR "
+    "id IN (SELECT id FROM records WHERE session_id = ? AND kind = 'chat' ORDER BY id DESC LIMIT ?)) "
+    "ORDER BY id"
+)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# Result Store: profiles, analyses, advice, goal plans and chat turns per session, written behind the UI
+class ResultStore:
+    def __init__(self, path, batch_size=64, flush_interval=0.5, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.reader = _connect(path)
+        for statement in SCHEMA:
+            self.reader.execute(statement)
+        self.reader.commit()
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.closed = False
+        self.writer = threading.Thread(target=self._write_loop, name="result-store", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    # Queue a record; returns immediately, the writer thread commits it with the next batch
+    def save(self, session_id, kind, payload):
+        self.pending.put((session_id, kind, self.clock(), json.dumps(payload, default=str)))
+
+    def _next_batch(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            try:
+                batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, conn, records):
+        sessions = {}
+        for session_id, _, created_at, _ in records:
+            first, _ = sessions.get(session_id, (created_at, created_at))
+            sessions[session_id] = (first, created_at)
+        with conn:
+            conn.executemany(
+                "INSERT INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at",
+                [(session_id, first, last) for session_id, (first, last) in sessions.items()]
+            )
+            conn.executemany(
+                "INSERT INTO records (session_id, kind, created_at, payload) VALUES (?, ?, ?, ?)",
+                records
+            )
+
+    # A failed batch is logged and dropped (the UI never waits on the store); every record is marked done either way
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            batch = self._next_batch()
+            records = [record for record in batch if record is not None]
+            try:
+                if records:
+                    self._write_batch(conn, records)
+                    with self.lock:
+                        self.written += len(records)
+                        self.batches += 1
+            except Exception as e:
+                with self.lock:
+                    self.failed += len(records)
+                print(f"Result store {self.path}: dropped {len(records)} records: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+            if batch[-1] is None:
+                conn.close()
+                return
+
+    # Wait until every queued record is written (or dropped); False if that took longer than timeout seconds
+    def flush(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        with self.pending.all_tasks_done:
+            while self.pending.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.pending.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.put(None)
+        self.writer.join(timeout)
+
+    def load_session(self, session_id, chat_turns=RESTORE_CHAT_TURNS):
+        self.flush()
+        with self.lock:
+            rows = self.reader.execute(LOAD_SESSION, (session_id, session_id, session_id, chat_turns)).fetchall()
+        if not rows:
+            return None
+        session = {PROFILE: None, ANALYSIS: None, ADVICE: None, GOAL_PLAN: None, CHAT: []}
+        for kind, payload in rows:
+            if kind == CHAT:
+                session[CHAT].append(json.loads(payload))
+            else:
+                session[kind] = json.loads(payload)
+        # A saved analysis that no longer validates (e.g. written by an older version) is dropped and recomputed
+        if session[ANALYSIS] is not None:
+            try:
+                session[ANALYSIS] = AnalysisRecord.from_dict(session[ANALYSIS]).to_dict()
+            except (TypeError, ValueError) as e:
+                print(f"Result store {self.path}: discarded saved analysis for {session_id}: {e}", file=sys.stderr)
+                session[ANALYSIS] = None
+        return session
+
+    def stats(self):
+        with self.lock:
+            return {"queued": self.pending.qsize(), "written": self.written, "batches": self.batches, "failed": self.failed}
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import ai_advisor
+import resilience
+import semantic_cache
+import utils
+
+SAMPLE_USER = {
+    "profile": "Professional",
+    "income": 120000,
+    "expenses": 70000,
+    "debts": 200000,
+    "existing_savings": 300000,
+    "goals": ["Buy a house", "Retirement"],
+    "risk_tolerance": "Medium"
+}
+
+# Deterministic stand-in for the Gemini model with configurable latency
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    model_name = "fake-model"
+
+    def __init__(self, delay=0.2, text=None):
+        self.delay = delay
+        self.text = text
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _reply(self, prompt):
+        with self.lock:
+            self.calls += 1
+        return self.text or f"Response to a {len(prompt)} character prompt"
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        time.sleep(self.delay)
+        text = self._reply(prompt)
+        if stream:
+            return [FakeResponse(text[i:i + 64]) for i in range(0, len(text), 64)]
+        return FakeResponse(text)
+
+    async def generate_content_async(self, prompt, request_options=None):
+        await asyncio.sleep(self.delay)
+        return FakeResponse(self._reply(prompt))
+
+    def start_chat(self, history=None):
+        return FakeChat(self, history or [])
+
+
+class FakeChat:
+    def __init__(self, model, history):
+        self.model = model
+        self.history = history
+
+    def send_message(self, message, stream=False, request_options=None):
+        return self.model.generate_content(message, stream, request_options)
+
+
+# Fault injection: scripted failures or delays per call (an entry is an exception to raise or seconds to sleep)
+class FlakyModel(FakeModel):
+    def __init__(self, script, delay=0.0):
+        super().__init__(delay)
+        self.script = list(script)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        with self.lock:
+            step = self.script.pop(0) if self.script else None
+        if isinstance(step, Exception):
+            with self.lock:
+                self.calls += 1
+            raise step
+        if step is not None:
+            time.sleep(step)
+        return super().generate_content(prompt, stream, request_options)
+
+
+# Synthetic advice response: every header repeated `repeat` times with `bullets` points each
+def make_advice_text(repeat=20, bullets=25):
+    lines = ["Here is your personalized financial plan as a professional."]
+    for _ in range(repeat):
+        for header in utils.ADVICE_HEADERS:
+            lines.append(header)
+            lines.extend(f"- Put *Rs {i * 500}* into the {{bucket}} every month" for i in range(bullets))
+    return "\n".join(lines) + "\n"
+
+
+PARAPHRASES = [
+    ("what is SIP", ["explain SIP", "how do SIPs work", "What's a SIP?", "what does SIP mean"]),
+    ("what is a mutual fund", ["explain mutual funds", "how do mutual funds work", "what are mutual funds"]),
+    ("what is an emergency fund", ["explain emergency fund", "what does emergency fund mean"]),
+    ("what is ELSS", ["explain ELSS", "how does ELSS work"])
+]
+DISTINCT_QUESTIONS = [
+    "how much should I save for retirement", "how do I pay off my credit card debt", "is SIP better than lumpsum",
+    "how much emergency fund do I need", "should I buy gold", "what is a credit score", "how to reduce my rent"
+]
+# Questions that differ only in a number: the cached answer to the first must never serve the second
+NUMBER_PAIRS = [
+    ("Is 1 crore enough to retire?", "Is 5 crore enough to retire?"),
+    ("Can I retire in 5 years?", "Can I retire in 9 years?"),
+    ("Should I keep 2 lakh in FD?", "Should I keep 8 lakh in FD?")
+]
+
+
+# Advisor module state swapped for a fake model, empty caches and a fresh caller, restored afterwards
+@pytest.fixture
+def advisor(monkeypatch):
+    monkeypatch.setattr(ai_advisor, "model", FakeModel(delay=0))
+    monkeypatch.setattr(ai_advisor, "semantic_cache", semantic_cache.SemanticCache(ai_advisor.semantic_cache.threshold))
+    monkeypatch.setattr(ai_advisor, "caller", resilience.ResilientCaller(timeout=2, retries=0))
+    ai_advisor.response_cache.clear()
+    yield ai_advisor
+    ai_advisor.response_cache.clear()
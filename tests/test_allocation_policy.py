@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from allocation_policy import ALLOCATION_RULES, DEFAULT_POLICY, PolicyFile, compile_policy
+
+LOW_EQUITY = {"Stocks / Equity Funds": 0.1, "Debt Mutual Funds / Bonds": 0.9}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def policy_file(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps(DEFAULT_POLICY))
+    clock = FakeClock()
+    return path, clock, PolicyFile(str(path), check_seconds=1, clock=clock)
+
+
+def reload(path, clock, policy, content):
+    path.write_text(content)
+    clock.now += 2
+    return policy.current()
+
+
+def test_split_keeps_the_declared_bucket_order():
+    policy = compile_policy(DEFAULT_POLICY)
+    for risk, split in ALLOCATION_RULES.items():
+        assert policy.split("Professional", risk, 100000) == tuple(split.items())
+
+
+def test_rules_override_by_profile_and_income_band():
+    spec = dict(DEFAULT_POLICY, income_bands=[50000], rules=[
+        {"profile": "Retiree", "risk": "high", "min_income": 50000, "split": LOW_EQUITY}
+    ])
+    policy = compile_policy(spec)
+    assert policy.split("Retiree", "High", 60000) == tuple(LOW_EQUITY.items())
+    assert policy.split("Retiree", "High", 40000) == tuple(ALLOCATION_RULES["high"].items())
+    assert policy.split("Student", "High", 60000) == tuple(ALLOCATION_RULES["high"].items())
+
+
+def test_hot_reload_picks_up_edits(policy_file):
+    path, clock, policy = policy_file
+    spec = dict(DEFAULT_POLICY, rules=[{"risk": "low", "split": LOW_EQUITY}])
+    assert reload(path, clock, policy, json.dumps(spec)).split("Professional", "Low", 0) == tuple(LOW_EQUITY.items())
+    assert policy.stats()["reloads"] == 2
+
+
+@pytest.mark.parametrize("content", [
+    "[]",
+    "{not json",
+    json.dumps(dict(DEFAULT_POLICY, rules=["low"])),
+    json.dumps(dict(DEFAULT_POLICY, rules={"risk": "low"})),
+    json.dumps(dict(DEFAULT_POLICY, rules=[{"risk": "low", "split": [0.5, 0.5]}])),
+    json.dumps(dict(DEFAULT_POLICY, default=dict(ALLOCATION_RULES, low="safe"))),
+    json.dumps(dict(DEFAULT_POLICY, income_bands="50000")),
+    json.dumps(dict(DEFAULT_POLICY, rules=[{"risk": "low", "min_income": [1], "split": LOW_EQUITY}]))
+])
+def test_broken_edit_keeps_the_last_good_policy(policy_file, content):
+    path, clock, policy = policy_file
+    before = policy.current()
+    assert reload(path, clock, policy, content) is before
+    assert policy.stats()["error"]
+
+
+@pytest.mark.parametrize("spec", [[], dict(DEFAULT_POLICY, rules=[None]), dict(DEFAULT_POLICY, default=[])])
+def test_compile_rejects_wrong_json_types(spec):
+    with pytest.raises(ValueError):
+        compile_policy(spec)
+
+
+def test_missing_file_uses_the_built_in_policy(tmp_path):
+    policy = PolicyFile(str(tmp_path / "missing.json")).current()
+    assert policy.split("Professional", "Medium", 100000) == tuple(ALLOCATION_RULES["medium"].items())
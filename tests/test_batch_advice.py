@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import batch_advice
+from tests.conftest import FlakyModel, SAMPLE_USER
+
+
+def write_csv(path, rows):
+    path.write_text("id,profile,income,expenses,debts,existing_savings,goals,risk_tolerance\n" + "\n".join(rows) + "\n")
+
+
+def test_bad_row_fails_alone(advisor, tmp_path):
+    source = tmp_path / "profiles.csv"
+    write_csv(source, [
+        "a,Professional,120000,70000,200000,300000,Buy a house,Medium",
+        "b,Professional,n/a,70000,200000,300000,,Medium",
+        "c,Student,20000,15000,0,10000,Laptop,Low"
+    ])
+    output, checkpoint = tmp_path / "advice.jsonl", tmp_path / "advice.checkpoint"
+    written, failed = batch_advice.run_batch(str(source), str(output), str(checkpoint), workers=2, rate=1000, retries=0)
+    assert (written, failed) == (2, 1)
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(result["id"] for result in results) == ["a", "c"]
+    assert batch_advice.load_checkpoint(str(checkpoint)) == {"a", "c"}
+
+
+def test_rerun_skips_checkpointed_profiles(advisor, tmp_path):
+    source = tmp_path / "profiles.csv"
+    write_csv(source, ["a,Professional,120000,70000,200000,300000,Buy a house,Medium"])
+    output, checkpoint = tmp_path / "advice.jsonl", tmp_path / "advice.checkpoint"
+    assert batch_advice.run_batch(str(source), str(output), str(checkpoint), rate=1000, retries=0) == (1, 0)
+    assert batch_advice.run_batch(str(source), str(output), str(checkpoint), rate=1000, retries=0) == (0, 0)
+    assert len(output.read_text().splitlines()) == 1
+
+
+def test_finished_work_is_written_when_reading_fails(advisor, tmp_path, monkeypatch):
+    def broken_reader(path):
+        yield "a", {"profile": "Professional", "income": "120000", "expenses": "70000", "debts": "0", "existing_savings": "0"}
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    monkeypatch.setattr(batch_advice, "read_profiles", broken_reader)
+    output, checkpoint = tmp_path / "advice.jsonl", tmp_path / "advice.checkpoint"
+    with pytest.raises(UnicodeDecodeError):
+        batch_advice.run_batch("profiles.csv", str(output), str(checkpoint), rate=1000, retries=0)
+    assert [json.loads(line)["id"] for line in output.read_text().splitlines()] == ["a"]
+
+
+class CountingBucket:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+def test_every_attempt_takes_a_token_and_retries_are_not_stacked(advisor):
+    advisor.model = FlakyModel([ConnectionError("reset")] * 10)
+    bucket = CountingBucket()
+    caller = batch_advice.ThrottledCaller(bucket, timeout=2, retries=2, base_delay=0.01)
+    with pytest.raises(ConnectionError):
+        batch_advice.process_profile(SAMPLE_USER, caller)
+    assert advisor.model.calls == 3
+    assert bucket.acquired == 3
+
+
+def test_bad_request_is_not_retried(advisor):
+    advisor.model = FlakyModel([ValueError("bad request")])
+    bucket = CountingBucket()
+    caller = batch_advice.ThrottledCaller(bucket, timeout=2, retries=3, base_delay=0.01)
+    with pytest.raises(ValueError):
+        batch_advice.process_profile(SAMPLE_USER, caller)
+    assert advisor.model.calls == 1
+    assert bucket.acquired == 1
+
+
+def test_hedged_requests_take_a_token(advisor):
+    advisor.model = FlakyModel([0.3])
+    bucket = CountingBucket()
+    caller = batch_advice.ThrottledCaller(bucket, timeout=2, retries=0, hedge_after=0.05)
+    assert batch_advice.process_profile(SAMPLE_USER, caller)["advice"]
+    assert caller.stats()["hedged"] == 1
+    assert bucket.acquired == 2
@@ -0,0 +1,63 @@
+import pytest
+
+import semantic_cache
+import utils
+import visualization
+import what_if
+from benchmark import make_profiles
+from finance_analysis import analyze_finances, analyze_finances_batch
+from local_advice import build_local_advice
+from prompts import build_profile_block
+from tests.conftest import PARAPHRASES, SAMPLE_USER, make_advice_text
+
+# Hot paths timed with pytest-benchmark; skipped when it is not installed (python benchmark.py covers the rest)
+pytest.importorskip("pytest_benchmark")
+
+
+def test_analyze_single(benchmark):
+    assert benchmark(analyze_finances, SAMPLE_USER)["savings"] == 50000
+
+
+def test_analyze_batch(benchmark):
+    profiles = make_profiles(10000)
+    assert len(benchmark(analyze_finances_batch, profiles)["savings"]) == 10000
+
+
+def test_what_if_heatmap(benchmark):
+    ranges = {"income": what_if.sweep_range(SAMPLE_USER["income"], steps=25),
+              "expenses": what_if.sweep_range(SAMPLE_USER["expenses"], steps=25)}
+
+    def heatmap():
+        grid = what_if.what_if_grid(SAMPLE_USER, ranges, ["savings"])
+        return visualization.what_if_spec(grid, "savings", "income", "expenses")
+
+    assert benchmark(heatmap)
+
+
+def test_parse_large_advice(benchmark):
+    text = make_advice_text(20, 25)
+
+    def first_parse():
+        utils.parse_advice_sections.cache_clear()
+        return utils.parse_advice_sections(text)
+
+    assert len(benchmark(first_parse)) == 20 * len(utils.ADVICE_HEADERS)
+
+
+def test_local_advice(benchmark):
+    assert benchmark(build_local_advice, SAMPLE_USER, analyze_finances(SAMPLE_USER))
+
+
+def test_semantic_lookup(benchmark):
+    cache = semantic_cache.SemanticCache(threshold=0.9)
+    profile = build_profile_block(SAMPLE_USER, analyze_finances(SAMPLE_USER))
+    for question, _ in PARAPHRASES:
+        cache.add(profile, question, f"answer: {question}")
+    assert benchmark(cache.lookup, profile, "explain SIP") == "answer: what is SIP"
+
+
+def test_cached_advice(benchmark, advisor):
+    analysis = analyze_finances(SAMPLE_USER)
+    advice = advisor.generate_financial_advice(SAMPLE_USER, analysis)
+    assert benchmark(advisor.generate_financial_advice, SAMPLE_USER, analysis) == advice
+    assert advisor.model.calls == 1
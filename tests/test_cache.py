@@ -0,0 +1,54 @@
+from cache import LRUCache, ResponseCache
+from tests.conftest import SAMPLE_USER
+from finance_analysis import analyze_finances
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeated_prompt_hits_the_cache(advisor):
+    analysis = analyze_finances(SAMPLE_USER)
+    before = advisor.response_cache.stats()
+    first = advisor.generate_goal_plan(SAMPLE_USER, analysis, "Reach goal in 5 years")
+    second = advisor.generate_goal_plan(SAMPLE_USER, analysis, "Reach goal in 5 years")
+    assert first == second
+    assert advisor.model.calls == 1
+    after = advisor.response_cache.stats()
+    assert after["memory_hits"] - before["memory_hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+
+
+def test_different_prompts_miss(advisor):
+    analysis = analyze_finances(SAMPLE_USER)
+    advisor.generate_goal_plan(SAMPLE_USER, analysis, "Reach goal in 5 years")
+    advisor.generate_goal_plan(SAMPLE_USER, analysis, "Reach goal in 10 years")
+    assert advisor.model.calls == 2
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_sqlite_tier_survives_a_new_memory_tier(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=path).set("key", "value")
+    cache = ResponseCache(db_path=path)
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
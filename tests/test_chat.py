@@ -0,0 +1,54 @@
+import pytest
+
+import resilience
+from chat import ChatSession
+from finance_analysis import analyze_finances
+from prompts import estimate_tokens
+from tests.conftest import FakeModel, FlakyModel, SAMPLE_USER
+
+ANSWER = "Start a monthly SIP in a low-cost index fund and raise it every year as your income grows. " * 6
+
+
+# Records the history each chat is opened with
+def record_chats(model):
+    opened = []
+    start_chat = model.start_chat
+
+    def recording(history=None):
+        opened.append(history)
+        return start_chat(history)
+
+    model.start_chat = recording
+    return opened
+
+
+def prompt_tokens(history, question):
+    return sum(estimate_tokens(part) for message in history for part in message["parts"]) + estimate_tokens(question)
+
+
+@pytest.mark.parametrize("answer", [ANSWER, ANSWER * 40])
+def test_prompt_stays_bounded_over_many_turns(advisor, answer):
+    advisor.model = FakeModel(delay=0, text=answer)
+    opened = record_chats(advisor.model)
+    analysis = analyze_finances(SAMPLE_USER)
+    chat = ChatSession()
+    sizes = []
+    for turn in range(60):
+        question = f"Question {turn}: how much should I invest in year {turn} and in which funds?"
+        assert "".join(chat.stream_reply(SAMPLE_USER, analysis, question)).strip() == answer.strip()
+        sizes.append(prompt_tokens(opened[-1], question))
+    assert max(sizes) <= 1000
+    assert max(sizes[30:]) <= max(sizes[:10]) * 1.5
+    assert len(chat.turns) == 20
+
+
+def test_retry_opens_a_fresh_chat(advisor):
+    advisor.model = FlakyModel([ConnectionError("reset")])
+    advisor.caller = resilience.ResilientCaller(timeout=2, retries=1, base_delay=0.01)
+    opened = record_chats(advisor.model)
+    chat = ChatSession()
+    reply = "".join(chat.stream_reply(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?"))
+    assert not advisor.is_fallback(reply)
+    assert len(opened) == 2
+    assert opened[0] == opened[1]
+    assert [question for question, _ in chat.context] == ["What is SIP?"]
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight
+from tests.conftest import FakeModel, FlakyModel, SAMPLE_USER
+from finance_analysis import analyze_finances
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(target())
+
+    threads = [threading.Thread(target=session) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_prompts_share_one_upstream_call(advisor):
+    advisor.model = FakeModel(delay=0.3)
+    prompt = advisor.build_chat_prompt(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?")
+    before = advisor.coalescing_stats()["coalesced"]
+    results = run_threads(20, lambda: advisor._generate(prompt))
+    assert advisor.model.calls == 1
+    assert len(set(results)) == 1
+    assert advisor.coalescing_stats()["coalesced"] - before == 19
+    assert advisor.coalescing_stats()["in_flight"] == 0
+
+
+def test_identical_streams_share_one_upstream_call(advisor):
+    advisor.model = FakeModel(delay=0.3, text="x" * 200)
+    prompt = advisor.build_chat_prompt(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?")
+    results = run_threads(10, lambda: "".join(advisor._stream(prompt)))
+    assert advisor.model.calls == 1
+    assert set(results) == {"x" * 200}
+
+
+def test_followers_see_the_leaders_error(advisor):
+    advisor.model = FlakyModel([ValueError("bad request")] * 5)
+    prompt = advisor.build_chat_prompt(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?")
+
+    def call():
+        try:
+            return advisor._generate(prompt)
+        except ValueError as e:
+            return str(e)
+
+    assert set(run_threads(5, call)) == {"bad request"}
+    assert advisor.coalescing_stats()["in_flight"] == 0
+
+
+def test_followers_stop_waiting_at_the_deadline():
+    flights = SingleFlight()
+    flight, leader = flights.begin("key")
+    assert leader
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flights.do("key", lambda: "never called", timeout=0.1)
+    assert time.monotonic() - start < 0.5
+    flights.finish("key", flight, "done")
+    assert flights.do("key", lambda: "fresh", timeout=0.1) == "fresh"
+
+
+def test_stream_followers_wait_no_longer_than_the_stream_deadline(advisor, monkeypatch):
+    monkeypatch.setattr(advisor, "LLM_STREAM_TIMEOUT_SECONDS", 0.2)
+    advisor.model = FakeModel(delay=1.0)
+    prompt = advisor.build_chat_prompt(SAMPLE_USER, analyze_finances(SAMPLE_USER), "What is SIP?")
+    leader = advisor._stream(prompt)
+    errors = []
+
+    def lead():
+        try:
+            "".join(leader)
+        except TimeoutError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        "".join(advisor._stream(prompt))
+    assert time.monotonic() - start < 0.5
+    thread.join()
+    assert len(errors) == 1
+    assert advisor.coalescing_stats()["in_flight"] == 0
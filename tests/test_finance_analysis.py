@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from finance_analysis import analyze_finances, analyze_finances_batch, ALLOCATION_BUCKETS
+
+RISK_LABELS = ["Low", "Medium", "High", "medium", "HIGH", "aggressive", ""]
+PROFILES = ["Professional", "Student", "Retiree", "Freelancer"]
+
+
+# Random profiles with zero incomes, zero savings (expenses >= income) and unknown risk labels mixed in
+def make_rows(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    income = rng.integers(0, 600000, n).astype(float)
+    income[::7] = 0
+    expenses = rng.integers(0, 400000, n).astype(float)
+    expenses[::5] = income[::5]
+    expenses[::11] = income[::11] + 1000
+    return [
+        {
+            "profile": PROFILES[i % len(PROFILES)],
+            "income": income[i],
+            "expenses": expenses[i],
+            "debts": float(rng.integers(0, 2000000)),
+            "existing_savings": float(rng.integers(0, 5000000)),
+            "goals": [],
+            "risk_tolerance": RISK_LABELS[i % len(RISK_LABELS)]
+        }
+        for i in range(n)
+    ]
+
+
+def columns(rows):
+    return {field: np.array([row[field] for row in rows]) for field in
+            ["profile", "income", "expenses", "debts", "existing_savings", "risk_tolerance"]}
+
+
+def test_batch_matches_scalar():
+    rows = make_rows()
+    batch = analyze_finances_batch(columns(rows))
+    assert any(row["income"] == 0 for row in rows)
+    assert any(row["income"] > 0 and row["income"] <= row["expenses"] for row in rows)
+    for i, row in enumerate(rows):
+        scalar = analyze_finances(row)
+        for metric, value in scalar.items():
+            if metric == "recommended_investment_allocation":
+                for bucket in ALLOCATION_BUCKETS:
+                    assert batch[metric][bucket][i] == pytest.approx(value.get(bucket, 0.0)), (i, bucket)
+            else:
+                assert batch[metric][i] == pytest.approx(value), (i, metric)
+
+
+def test_unknown_risk_uses_medium_split():
+    row = make_rows(1)[0]
+    medium = analyze_finances(dict(row, risk_tolerance="Medium", income=100000, expenses=40000))
+    unknown = analyze_finances(dict(row, risk_tolerance="aggressive", income=100000, expenses=40000))
+    assert unknown["recommended_investment_allocation"] == medium["recommended_investment_allocation"]
+
+
+def test_zero_income_has_zero_ratios():
+    result = analyze_finances_batch({
+        "income": [0.0], "expenses": [5000.0], "debts": [1000.0], "existing_savings": [0.0], "risk_tolerance": ["Low"]
+    })
+    for metric in ("debt_to_income_ratio", "savings_ratio", "expense_ratio", "debt_to_savings_ratio"):
+        assert result[metric][0] == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from finance_analysis import analyze_finances
+from local_advice import build_local_advice, is_simple_profile
+from prompts import ADVICE_SECTIONS
+from tests.conftest import SAMPLE_USER
+from utils import iter_advice_sections, parse_advice_sections
+
+PROFILES = [
+    SAMPLE_USER,
+    {"profile": "Student", "income": 20000, "expenses": 15000, "debts": 0, "existing_savings": 10000,
+     "goals": [], "risk_tolerance": "Low"},
+    {"profile": "Retiree", "income": 40000, "expenses": 45000, "debts": 0, "existing_savings": 5000000,
+     "goals": ["Travel"], "risk_tolerance": "Low"},
+    {"profile": "Professional", "income": 60000, "expenses": 90000, "debts": 500000, "existing_savings": 0,
+     "goals": ["Buy a car"], "risk_tolerance": "High"}
+]
+
+
+@pytest.mark.parametrize("user_data", PROFILES, ids=lambda user_data: user_data["profile"])
+def test_every_section_parses(user_data):
+    advice = build_local_advice(user_data, analyze_finances(user_data))
+    sections = parse_advice_sections(advice)
+    expected = ["Current Financial Health"] + ADVICE_SECTIONS[user_data["profile"]].split(", ")
+    assert [title.rstrip(":") for title, _ in sections] == expected
+    assert all(items and all(item.strip() for item in items) for _, items in sections)
+
+
+def test_streamed_sections_match_the_parsed_ones():
+    advice = build_local_advice(SAMPLE_USER, analyze_finances(SAMPLE_USER))
+    chunks = [advice[i:i + 37] for i in range(0, len(advice), 37)]
+    streamed = [title for title, _ in iter_advice_sections(chunks)]
+    assert streamed == [title for title, _ in parse_advice_sections(advice)]
+
+
+def test_simple_profiles_skip_the_model(advisor):
+    student = PROFILES[1]
+    assert is_simple_profile(student) and not is_simple_profile(SAMPLE_USER)
+    analysis = analyze_finances(student)
+    assert advisor.generate_financial_advice(student, analysis) == build_local_advice(student, analysis)
+    assert advisor.model.calls == 0
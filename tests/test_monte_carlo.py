@@ -0,0 +1,20 @@
+from tests.conftest import SAMPLE_USER
+from finance_analysis import analyze_finances
+from monte_carlo import simulate_goal_success
+from tests.test_projection import RETIREE
+
+
+def test_existing_savings_count_without_a_monthly_surplus():
+    analysis = analyze_finances(RETIREE)
+    results = simulate_goal_success(analysis, {"Car": (1000000, 12)}, n_paths=2000, seed=0, user_data=RETIREE)
+    assert results[0]["probability"] > 0.99
+    assert results[0]["median"] > 0.9 * (RETIREE["existing_savings"] - analysis["emergency_fund"])
+
+
+def test_results_depend_on_the_seed_only():
+    analysis = analyze_finances(SAMPLE_USER)
+    goals = [{"name": "House", "amount": 2000000, "months": 60}]
+    first = simulate_goal_success(analysis, goals, n_paths=12000, seed=1)
+    assert simulate_goal_success(analysis, goals, n_paths=12000, seed=1, processes=2) == first
+    assert 0 <= first[0]["probability"] <= 1
+    assert first[0]["p10"] <= first[0]["median"] <= first[0]["p90"]
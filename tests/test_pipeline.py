@@ -0,0 +1,42 @@
+from pipeline import Pipeline, CACHED, COMPUTED
+from tests.conftest import SAMPLE_USER
+
+
+# Runs the three app stages in order, returning the ones that were recomputed
+def run_stages(pipeline, user_data, plan_inputs=None):
+    computed = []
+
+    def compute(name):
+        return lambda: computed.append(name) or f"{name} result"
+
+    pipeline.status.clear()
+    pipeline.run("analysis", dict(user_data, allocation_policy="v1"), compute("analysis"))
+    pipeline.run("advice", user_data, compute("advice"))
+    pipeline.run("goal_plan", dict(user_data, **(plan_inputs or {})), compute("goal_plan"))
+    return computed
+
+
+def test_unchanged_inputs_are_served_from_cache():
+    pipeline = Pipeline()
+    assert run_stages(pipeline, SAMPLE_USER) == ["analysis", "advice", "goal_plan"]
+    assert run_stages(pipeline, SAMPLE_USER) == []
+    assert set(pipeline.status.values()) == {CACHED}
+
+
+def test_goals_change_reruns_only_advice_and_goal_plan():
+    pipeline = Pipeline()
+    run_stages(pipeline, SAMPLE_USER)
+    assert run_stages(pipeline, dict(SAMPLE_USER, goals=["Retirement"])) == ["advice", "goal_plan"]
+    assert pipeline.status == {"analysis": CACHED, "advice": COMPUTED, "goal_plan": COMPUTED}
+
+
+def test_plan_instructions_rerun_only_the_goal_plan():
+    pipeline = Pipeline()
+    run_stages(pipeline, SAMPLE_USER, {"user_instructions": "Reach goal in 5 years"})
+    assert run_stages(pipeline, SAMPLE_USER, {"user_instructions": "Reach goal in 3 years"}) == ["goal_plan"]
+
+
+def test_analysis_change_reruns_downstream_stages():
+    pipeline = Pipeline()
+    run_stages(pipeline, SAMPLE_USER)
+    assert run_stages(pipeline, dict(SAMPLE_USER, income=150000)) == ["analysis", "advice", "goal_plan"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from tests.conftest import SAMPLE_USER
+from finance_analysis import analyze_finances
+from projection import MAX_YEARS, project_cash_flow
+
+RETIREE = {
+    "profile": "Retiree",
+    "income": 40000,
+    "expenses": 45000,
+    "debts": 0,
+    "existing_savings": 5000000,
+    "goals": [],
+    "risk_tolerance": "Low"
+}
+
+
+def test_savings_are_invested_and_the_deficit_is_drawn_from_the_emergency_fund():
+    analysis = analyze_finances(RETIREE)
+    assert sum(analysis["recommended_investment_allocation"].values()) == 0
+    projection = project_cash_flow(RETIREE, analysis, years=1)
+    deficit = RETIREE["expenses"] - RETIREE["income"]
+    assert projection["net_worth"][0] == pytest.approx(RETIREE["existing_savings"], rel=0.01)
+    assert projection["total_investments"][0] > 0.9 * (RETIREE["existing_savings"] - analysis["emergency_fund"])
+    assert projection["emergency_fund"] == pytest.approx(analysis["emergency_fund"] - deficit * projection["months"])
+    assert projection["debt"].max() == 0
+
+
+def test_deficit_draws_down_savings_then_borrows():
+    user_data = dict(RETIREE, income=30000, expenses=60000, existing_savings=500000)
+    projection = project_cash_flow(user_data, analyze_finances(user_data), years=5)
+    assert np.all(np.diff(projection["net_worth"]) < 0)
+    fund_empty = np.flatnonzero(projection["emergency_fund"] == 0)[0]
+    assert np.all(np.diff(projection["total_investments"][:fund_empty]) > 0)
+    invested_out = np.flatnonzero(projection["total_investments"] == 0)[0]
+    assert invested_out > fund_empty
+    assert projection["debt"][invested_out - 1] == 0
+    assert np.all(np.diff(projection["debt"][invested_out:]) > 0)
+    assert projection["debt_free_month"] is None
+
+
+def test_no_surplus_builds_no_savings():
+    user_data = dict(SAMPLE_USER, income=50000, expenses=50000, debts=300000, existing_savings=0)
+    projection = project_cash_flow(user_data, analyze_finances(user_data), years=5)
+    assert projection["emergency_fund"].max() == 0
+    assert projection["total_investments"].max() == 0
+    assert projection["cash"].max() == 0
+    assert np.all(np.diff(projection["net_worth"]) < 0)
+    assert projection["emergency_fund_complete_month"] is None
+
+
+def test_monthly_flows_never_exceed_the_surplus():
+    projection = project_cash_flow(SAMPLE_USER, analyze_finances(SAMPLE_USER), years=5)
+    surplus = SAMPLE_USER["income"] - SAMPLE_USER["expenses"]
+    saved = projection["emergency_fund"] + projection["cash"]
+    assert np.all(np.diff(saved) <= surplus + 1e-6)
+
+
+def test_savings_follow_the_contribution_split():
+    analysis = analyze_finances(SAMPLE_USER)
+    projection = project_cash_flow(SAMPLE_USER, analysis, years=1)
+    allocation = analysis["recommended_investment_allocation"]
+    first = {bucket: series[0] for bucket, series in projection["investments"].items() if series[0] > 0}
+    assert set(first) == {bucket for bucket, amount in allocation.items() if amount > 0}
+
+
+def test_debt_is_paid_off_and_series_have_one_value_per_month():
+    projection = project_cash_flow(SAMPLE_USER, analyze_finances(SAMPLE_USER), years=5)
+    assert len(projection["months"]) == 60
+    assert projection["debt_free_month"] is not None
+    assert np.all(np.diff(projection["debt"]) <= 0)
+
+
+def test_years_out_of_range():
+    with pytest.raises(ValueError):
+        project_cash_flow(SAMPLE_USER, analyze_finances(SAMPLE_USER), years=MAX_YEARS + 1)
@@ -0,0 +1,29 @@
+import pytest
+
+import prompts
+from tests.conftest import SAMPLE_USER
+from finance_analysis import analyze_finances
+
+USERS = [
+    SAMPLE_USER,
+    dict(SAMPLE_USER, profile="Student", income=15000, expenses=12000, debts=0, existing_savings=5000,
+         goals=["Buy a laptop"], risk_tolerance="Low"),
+    dict(SAMPLE_USER, profile="Retiree", income=40000, expenses=45000, debts=0, existing_savings=5000000,
+         goals=[], risk_tolerance="Low")
+]
+
+
+@pytest.mark.parametrize("user_data", USERS, ids=lambda user_data: user_data["profile"])
+def test_prompts_stay_under_token_budget(user_data):
+    analysis = analyze_finances(user_data)
+    report = prompts.prompt_token_report(user_data, analysis, "Reach goal in 5 years", "What is SIP?")
+    for name, budget in prompts.PROMPT_TOKEN_BUDGET.items():
+        assert report[name] <= budget, (name, report[name])
+
+
+def test_prompts_carry_the_profile_block():
+    analysis = analyze_finances(SAMPLE_USER)
+    block = prompts.build_profile_block(SAMPLE_USER, analysis)
+    assert block in prompts.build_advice_prompt(SAMPLE_USER, analysis)
+    assert block in prompts.build_goal_plan_prompt(SAMPLE_USER, analysis, "Reach goal in 5 years")
+    assert block in prompts.build_chat_prompt(SAMPLE_USER, analysis, "What is SIP?")
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from finance_analysis import analyze_finances, analyze_finances_batch
+from records import AnalysisRecord, ProfileBatch, ProfileRecord
+from tests.conftest import SAMPLE_USER
+
+ROWS = [
+    dict(SAMPLE_USER, income=120000.0, expenses=70000.0, debts=200000.0, existing_savings=300000.0),
+    {"profile": "Student", "income": 20000.0, "expenses": 15000.0, "debts": 0.0, "existing_savings": 10000.0,
+     "goals": [], "risk_tolerance": "Low"},
+    {"profile": "Retiree", "income": 40000.0, "expenses": 45000.0, "debts": 0.0, "existing_savings": 5000000.0,
+     "goals": ["Travel", "Retirement"], "risk_tolerance": "High"}
+]
+
+
+def test_profile_batch_round_trips_to_dicts():
+    batch = ProfileBatch.from_dicts(ROWS)
+    assert len(batch) == 3
+    assert batch.to_dicts() == ROWS
+    assert batch.goal_names == ["Buy a house", "Retirement", "Travel"]
+    assert [batch.record(i) for i in range(3)] == [ProfileRecord.from_dict(row) for row in ROWS]
+
+
+def test_profile_batch_normalises_labels_and_rejects_bad_rows():
+    assert ProfileBatch.from_dicts([dict(ROWS[0], risk_tolerance="medium")]).to_dicts() == ROWS[:1]
+    with pytest.raises(ValueError):
+        ProfileBatch.from_dicts([dict(ROWS[0], profile="Pensioner")])
+    with pytest.raises(ValueError):
+        ProfileBatch.from_dicts([dict(ROWS[0], income=-1)])
+
+
+def test_profile_batch_analysis_matches_the_columns():
+    batch = ProfileBatch.from_dicts(ROWS)
+    columns = {field: np.array([row[field] for row in ROWS]) for field in ROWS[0] if field != "goals"}
+    for metric, values in batch.analyze().items():
+        if metric != "recommended_investment_allocation":
+            np.testing.assert_allclose(values, analyze_finances_batch(columns)[metric])
+
+
+def test_analysis_record_round_trips_analyze_finances():
+    for row in ROWS:
+        analysis = analyze_finances(row)
+        assert AnalysisRecord.from_dict(analysis).to_dict() == analysis
+
+
+def test_analysis_record_rejects_unknown_buckets():
+    analysis = analyze_finances(SAMPLE_USER)
+    with pytest.raises(ValueError):
+        AnalysisRecord.from_dict(dict(analysis, recommended_investment_allocation={"Crypto": 1000.0}))
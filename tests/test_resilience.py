@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+import resilience
+from tests.conftest import FakeModel, FlakyModel, SAMPLE_USER
+from finance_analysis import analyze_finances
+
+
+def goal_plan(advisor):
+    return advisor.generate_goal_plan(SAMPLE_USER, analyze_finances(SAMPLE_USER), "Reach goal in 5 years")
+
+
+def test_transient_errors_are_retried(advisor):
+    advisor.model = FlakyModel([ConnectionError("reset"), ConnectionError("reset")])
+    advisor.caller = resilience.ResilientCaller(timeout=2, retries=2, base_delay=0.01)
+    assert not advisor.is_fallback(goal_plan(advisor))
+    assert advisor.model.calls == 3
+    assert advisor.caller.stats()["retried"] == 2
+
+
+def test_non_retryable_error_falls_back_at_once(advisor):
+    advisor.model = FlakyModel([ValueError("bad request")])
+    advisor.caller = resilience.ResilientCaller(timeout=2, retries=2, base_delay=0.01)
+    assert advisor.is_fallback(goal_plan(advisor))
+    assert advisor.model.calls == 1
+
+
+def test_hung_call_hits_the_deadline(advisor):
+    advisor.model = FlakyModel([5.0])
+    advisor.caller = resilience.ResilientCaller(timeout=0.2, retries=0)
+    start = time.monotonic()
+    text = goal_plan(advisor)
+    assert time.monotonic() - start < 1
+    assert advisor.is_fallback(text) and "timed out" in text
+    assert advisor.caller.stats()["timeouts"] == 1
+
+
+def test_slow_call_is_hedged(advisor):
+    advisor.model = FlakyModel([1.0], delay=0.02)
+    advisor.caller = resilience.ResilientCaller(timeout=2, retries=0, hedge_after=0.1)
+    start = time.monotonic()
+    assert not advisor.is_fallback(goal_plan(advisor))
+    assert time.monotonic() - start < 0.8
+    assert advisor.caller.stats()["hedged"] == 1
+
+
+def test_breaker_opens_and_fails_fast(advisor):
+    advisor.model = FlakyModel([ConnectionError("unreachable")] * 10)
+    advisor.caller = resilience.ResilientCaller(timeout=1, retries=0, breaker=resilience.CircuitBreaker(3, 60))
+    for _ in range(5):
+        advisor.response_cache.clear()
+        assert advisor.is_fallback(goal_plan(advisor))
+    assert advisor.model.calls == 3
+    assert advisor.caller.stats()["breaker"]["state"] == resilience.OPEN
+    assert advisor.caller.stats()["breaker"]["rejected"] == 2
+
+
+def test_bad_requests_do_not_open_the_breaker(advisor):
+    advisor.model = FlakyModel([ValueError("bad request")] * 10)
+    advisor.caller = resilience.ResilientCaller(timeout=1, retries=0, breaker=resilience.CircuitBreaker(3, 60))
+    for _ in range(5):
+        advisor.response_cache.clear()
+        assert advisor.is_fallback(goal_plan(advisor))
+    assert advisor.model.calls == 5
+    assert advisor.caller.stats()["breaker"]["state"] == resilience.CLOSED
+
+
+def test_hung_upstream_cannot_grow_the_thread_count(monkeypatch):
+    started = []
+    submit = resilience._submit
+    monkeypatch.setattr(resilience, "_submit", lambda release, fn, *args: started.append(fn) or submit(release, fn, *args))
+    caller = resilience.ResilientCaller(timeout=0.1, retries=0, hedge_after=0.02, max_threads=2,
+                                        breaker=resilience.CircuitBreaker(100, 60))
+    for _ in range(6):
+        with pytest.raises(resilience.DeadlineExceeded):
+            caller.call(lambda: time.sleep(1))
+        assert caller.stats()["busy_threads"] <= 2
+    assert len(started) == 2
+
+
+def test_stream_uses_one_reader_thread(monkeypatch):
+    started = []
+    submit = resilience._submit
+    monkeypatch.setattr(resilience, "_submit", lambda release, fn, *args: started.append(fn) or submit(release, fn, *args))
+    caller = resilience.ResilientCaller(timeout=1, retries=0)
+    chunks = list(caller.stream(lambda: iter(range(50))))
+    assert chunks == list(range(50))
+    assert len(started) == 2
+
+
+def test_stalled_stream_hits_the_deadline():
+    def stalled():
+        yield "first"
+        time.sleep(1)
+        yield "late"
+
+    caller = resilience.ResilientCaller(timeout=0.1, retries=0)
+    stream = caller.stream(stalled)
+    assert next(stream) == "first"
+    with pytest.raises(resilience.DeadlineExceeded):
+        next(stream)
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    clock = [0.0]
+    breaker = resilience.CircuitBreaker(1, 10, clock=lambda: clock[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock[0] = 10
+    assert breaker.allow()
+    assert breaker.state == resilience.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED
+
+
+def test_cancelled_async_trial_reopens_the_breaker(advisor):
+    advisor.model = FakeModel(delay=5)
+    advisor.caller = resilience.ResilientCaller(timeout=10, retries=0, breaker=resilience.CircuitBreaker(1, 0))
+    advisor.caller.breaker.record_failure()
+
+    async def cancel_trial():
+        task = asyncio.create_task(advisor._generate_async("prompt"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert advisor.caller.breaker.state == resilience.OPEN
+    assert advisor.caller.breaker.allow()
@@ -0,0 +1,61 @@
+import pytest
+
+import semantic_cache
+from tests.conftest import DISTINCT_QUESTIONS, NUMBER_PAIRS, PARAPHRASES, SAMPLE_USER
+from finance_analysis import analyze_finances
+from prompts import build_profile_block
+
+PROFILE = build_profile_block(SAMPLE_USER, analyze_finances(SAMPLE_USER))
+
+
+@pytest.fixture
+def cache():
+    cache = semantic_cache.SemanticCache(threshold=0.9)
+    for question, _ in PARAPHRASES + NUMBER_PAIRS:
+        cache.add(PROFILE, question, f"answer: {question}")
+    return cache
+
+
+@pytest.mark.parametrize("question,paraphrase", [(q, p) for q, paraphrases in PARAPHRASES for p in paraphrases])
+def test_paraphrases_hit(cache, question, paraphrase):
+    assert cache.lookup(PROFILE, paraphrase) == f"answer: {question}"
+
+
+@pytest.mark.parametrize("question", DISTINCT_QUESTIONS + [other for _, other in NUMBER_PAIRS])
+def test_distinct_questions_miss(cache, question):
+    assert cache.lookup(PROFILE, question) is None
+
+
+def test_numbers_are_tokens():
+    assert "5" in semantic_cache._tokens("Can I retire in 5 years?")
+    assert semantic_cache.embed("Is 1 crore enough?") @ semantic_cache.embed("Is 5 crore enough?") < 0.99
+
+
+def test_answers_stay_with_their_profile(cache):
+    for other in (dict(SAMPLE_USER, profile="Student"), dict(SAMPLE_USER, debts=900000), dict(SAMPLE_USER, income=125000)):
+        assert cache.lookup(build_profile_block(other, analyze_finances(other)), "explain SIP") is None
+
+
+def test_different_profiles_never_share_an_answer(advisor):
+    first = dict(SAMPLE_USER, debts=200000)
+    second = dict(SAMPLE_USER, debts=900000, income=110000)
+    advisor.finance_chatbot_response(first, analyze_finances(first), "how should I pay off my debt")
+    "".join(advisor.stream_chatbot_response(second, analyze_finances(second), "how do I pay off my debt"))
+    assert advisor.model.calls == 2
+    assert advisor.semantic_cache.stats()["buckets"] == 2
+
+
+def test_chatbot_reuses_answers_for_paraphrases(advisor):
+    analysis = analyze_finances(SAMPLE_USER)
+    first = advisor.finance_chatbot_response(SAMPLE_USER, analysis, "what is SIP")
+    assert advisor.finance_chatbot_response(SAMPLE_USER, analysis, "explain SIP") == first
+    assert advisor.model.calls == 1
+    advisor.finance_chatbot_response(SAMPLE_USER, analysis, "Can I retire in 5 years?")
+    advisor.finance_chatbot_response(SAMPLE_USER, analysis, "Can I retire in 9 years?")
+    assert advisor.model.calls == 3
+
+
+def test_clear_empties_the_cache(cache):
+    cache.clear()
+    assert cache.lookup(PROFILE, "what is SIP") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+import service
+from service import AdvisorService, FairQueue, ServiceBusy
+from tracing import Tracer
+
+
+def test_sessions_are_served_round_robin():
+    fair = FairQueue(max_per_session=10)
+    for i in range(3):
+        fair.put("hog", f"hog{i}")
+    fair.put("a", "a0")
+    fair.put("b", "b0")
+    fair.put("a", "a1")
+    assert [fair.get() for _ in range(6)] == ["hog0", "a0", "b0", "hog1", "a1", "hog2"]
+    assert fair.stats()["depth"] == 0
+
+
+def test_per_session_cap_rejects_only_that_session():
+    fair = FairQueue(max_per_session=2)
+    fair.put("a", 1)
+    fair.put("a", 2)
+    with pytest.raises(ServiceBusy):
+        fair.put("a", 3)
+    fair.put("b", 1)
+    assert fair.stats() == {"depth": 3, "max_depth": 3, "waiting_sessions": 2, "deepest_session": 2}
+
+
+def test_closed_queue_wakes_workers_and_rejects_puts():
+    fair = FairQueue()
+    fair.close()
+    assert fair.get() is None
+    with pytest.raises(ServiceBusy):
+        fair.put("a", 1)
+
+
+@pytest.fixture
+def advisor_service():
+    advisor = AdvisorService(workers=2, max_pending_per_session=2)
+    yield advisor
+    advisor.close()
+
+
+def test_submit_runs_on_a_worker(advisor_service):
+    assert advisor_service.submit("a", lambda x: x * 2, 21).result(timeout=2) == 42
+    with pytest.raises(ValueError):
+        advisor_service.submit("a", int, "not a number").result(timeout=2)
+    stats = advisor_service.stats()
+    assert (stats["submitted"], stats["completed"], stats["failed"]) == (2, 2, 1)
+
+
+def test_busy_session_is_rejected_and_falls_back(advisor_service):
+    gate = threading.Event()
+    running = threading.Barrier(3)
+
+    def hold():
+        running.wait()
+        gate.wait()
+
+    # Both workers busy, then session a fills its two queue slots
+    blocked = [advisor_service.submit("b", hold) for _ in range(2)]
+    running.wait(timeout=2)
+    blocked += [advisor_service.submit("a", gate.wait) for _ in range(2)]
+    try:
+        chunks = list(advisor_service.stream("a", lambda: iter(["never"]), lambda e: f"fallback: {e}"))
+        assert advisor_service.submit("c", lambda: "other sessions still queue")
+    finally:
+        gate.set()
+    assert len(chunks) == 1 and chunks[0].startswith("fallback:")
+    for future in blocked:
+        future.result(timeout=2)
+    assert advisor_service.stats()["rejected"] == 1
+
+
+def test_stream_relays_chunks_in_order(advisor_service):
+    assert list(advisor_service.stream("a", lambda: iter(["one", "two", "three"]))) == ["one", "two", "three"]
+
+
+def test_worker_spans_keep_the_callers_trace(advisor_service, monkeypatch):
+    spans = Tracer()
+    monkeypatch.setattr(service, "tracer", spans)
+    monkeypatch.setattr(service, "span", spans.span)
+
+    def work():
+        with spans.span("llm.generate"):
+            yield "chunk"
+
+    with spans.span("app.rerun") as rerun:
+        assert list(advisor_service.stream("a", work)) == ["chunk"]
+    by_name = {s.name: s for s in spans.spans}
+    assert by_name["service.stream"].parent_id == rerun.span_id
+    assert by_name["llm.generate"].parent_id == by_name["service.stream"].span_id
+    assert {s.trace_id for s in spans.spans} == {rerun.trace_id}
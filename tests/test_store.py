@@ -0,0 +1,73 @@
+import pytest
+
+from finance_analysis import analyze_finances
+from store import ADVICE, ANALYSIS, CHAT, PROFILE, SCHEMA, ResultStore
+from tests.conftest import SAMPLE_USER
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "store.db"), flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def test_session_round_trip(store):
+    store.save("s1", PROFILE, {"income": 1})
+    store.save("s1", PROFILE, {"income": 2})
+    store.save("s1", ADVICE, "advice")
+    store.save("s1", CHAT, {"question": "q1", "answer": "a1"})
+    store.save("s1", CHAT, {"question": "q2", "answer": "a2"})
+    store.save("s2", CHAT, {"question": "other", "answer": "a"})
+    session = store.load_session("s1")
+    assert session[PROFILE] == {"income": 2}
+    assert session[ADVICE] == "advice"
+    assert [turn["question"] for turn in session[CHAT]] == ["q1", "q2"]
+    assert store.load_session("missing") is None
+
+
+def test_only_the_last_chat_turns_are_restored(store):
+    store.save("s1", PROFILE, {"income": 1})
+    for i in range(50):
+        store.save("s1", CHAT, {"question": f"q{i}", "answer": "a"})
+    store.save("s1", ADVICE, "advice")
+    session = store.load_session("s1", chat_turns=5)
+    assert [turn["question"] for turn in session[CHAT]] == [f"q{i}" for i in range(45, 50)]
+    assert session[PROFILE] == {"income": 1}
+    assert session[ADVICE] == "advice"
+
+
+def test_write_error_is_logged_and_the_writer_keeps_going(store, capsys):
+    store.reader.execute("DROP TABLE records")
+    store.reader.commit()
+    store.save("s1", PROFILE, {"income": 1})
+    assert store.flush(timeout=2)
+    assert store.stats()["failed"] == 1
+    assert "dropped 1 records" in capsys.readouterr().err
+
+    for statement in SCHEMA:
+        store.reader.execute(statement)
+    store.reader.commit()
+    store.save("s1", PROFILE, {"income": 2})
+    assert store.load_session("s1")[PROFILE] == {"income": 2}
+    assert store.writer.is_alive()
+
+
+def test_flush_wait_is_bounded(store):
+    store.pending.put(("s1", PROFILE, 0.0, "{}"))
+    store.close()
+    store.pending.put(("s1", PROFILE, 0.0, "{}"))
+    assert not store.flush(timeout=0.05)
+
+
+def test_saved_analysis_is_validated_on_restore(store, capsys):
+    analysis = analyze_finances(SAMPLE_USER)
+    store.save("s1", ANALYSIS, analysis)
+    assert store.load_session("s1")[ANALYSIS] == analysis
+    stale = {key: value for key, value in analysis.items() if key != "savings"}
+    store.save("s2", PROFILE, SAMPLE_USER)
+    store.save("s2", ANALYSIS, stale)
+    session = store.load_session("s2")
+    assert session[ANALYSIS] is None
+    assert session[PROFILE] == SAMPLE_USER
+    assert "discarded saved analysis for s2" in capsys.readouterr().err
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from tracing import Tracer
+
+
+# Stand-in for streamlit's script-control exception raised by st.rerun
+class RerunException(BaseException):
+    pass
+
+
+def test_spans_are_exported_in_the_background(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(jsonl_path=str(path), flush_interval=0.01)
+    with tracer.span("app.rerun") as rerun:
+        for i in range(50):
+            with tracer.span("stage", index=i):
+                pass
+    assert tracer.flush()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(rows) == 51
+    assert rows[-1]["span_id"] == rerun.span_id
+    assert all(row["trace_id"] == rerun.trace_id for row in rows)
+    tracer.close()
+
+
+def test_failed_export_does_not_reach_the_caller(tmp_path, capsys):
+    tracer = Tracer(jsonl_path=str(tmp_path / "missing" / "spans.jsonl"), flush_interval=0.01)
+    with tracer.span("stage"):
+        pass
+    assert tracer.flush()
+    assert "dropped 1 spans" in capsys.readouterr().err
+    assert tracer.summary()["stage"]["count"] == 1
+    tracer.close()
+
+
+def test_rerun_is_not_an_error():
+    tracer = Tracer()
+    with pytest.raises(RerunException):
+        with tracer.span("app.rerun"):
+            raise RerunException()
+    with pytest.raises(ValueError):
+        with tracer.span("stage"):
+            raise ValueError("boom")
+    rerun, stage = tracer.spans
+    assert rerun.error is None and rerun.attributes["stopped_by"] == "RerunException"
+    assert stage.error == "ValueError: boom"
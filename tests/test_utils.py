@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import utils
+from tests.conftest import make_advice_text
+
+
+def goal_text():
+    lines = ["Here is your goal plan."]
+    for header in utils.GOAL_HEADERS:
+        lines.append(f"**{header}**")
+        lines.extend(f"- Step {i} for {header.lower()}" for i in range(3))
+    return "\n".join(lines)
+
+
+def chunked(text, seed):
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 40)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streamed_advice_sections_match_the_full_parse(seed):
+    text = make_advice_text(2, 3)
+    assert list(utils.iter_advice_sections(chunked(text, seed))) == utils.split_advice_sections(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streamed_goal_sections_match_the_full_parse(seed):
+    text = goal_text()
+    assert list(utils.iter_goal_sections(chunked(text, seed))) == utils.split_goal_sections(text)
+
+
+def test_header_split_across_chunks():
+    chunks = ["Intro\nDebt ", "Plan", ":", "\n- pay it\nRisk Management:\n- insure"]
+    titles = [title for title, _ in utils.iter_advice_sections(chunks)]
+    assert titles == ["Debt Plan:", "Risk Management:"]
+
+
+def test_sections_are_emitted_as_soon_as_the_next_header_arrives():
+    stream = utils.iter_advice_sections(iter(["Debt Plan:\n- pay it\n", "Risk Management:\n", "- insure\n"]))
+    assert next(stream)[0] == "Debt Plan:"
+
+
+def test_text_without_headers_yields_nothing():
+    assert list(utils.iter_advice_sections(["just ", "some text"])) == []
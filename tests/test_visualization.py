@@ -0,0 +1,29 @@
+import pytest
+
+import visualization
+from tests.conftest import SAMPLE_USER
+from finance_analysis import analyze_finances
+
+plt = pytest.importorskip("matplotlib.pyplot")
+pytest.importorskip("seaborn")
+
+
+def test_cached_reruns_keep_figure_count_flat():
+    analysis = analyze_finances(SAMPLE_USER)
+    visualization._figure_cache.clear()
+    first = visualization.render_advised_financial_overview(SAMPLE_USER, analysis)
+    figures = len(plt.get_fignums())
+    for _ in range(20):
+        assert visualization.render_advised_financial_overview(SAMPLE_USER, analysis) == first
+    assert len(plt.get_fignums()) == figures == 0
+    assert len(visualization._figure_cache) == 1
+
+
+def test_new_inputs_render_without_leaking_figures(monkeypatch):
+    monkeypatch.setattr(visualization, "FIGURE_CACHE_SIZE", 3)
+    visualization._figure_cache.clear()
+    for income in range(100000, 100005):
+        user_data = dict(SAMPLE_USER, income=income)
+        visualization.render_advised_financial_overview(user_data, analyze_finances(user_data))
+    assert len(plt.get_fignums()) == 0
+    assert len(visualization._figure_cache) == 3
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import what_if
+from finance_analysis import analyze_finances
+from tests.conftest import SAMPLE_USER
+
+RANGES = {
+    "income": what_if.sweep_range(SAMPLE_USER["income"], steps=5),
+    "expenses": what_if.sweep_range(SAMPLE_USER["expenses"], steps=7),
+    "debts": what_if.sweep_range(SAMPLE_USER["debts"], steps=3),
+    "risk_tolerance": what_if.RISK_LABELS
+}
+METRICS = what_if.GRID_METRICS + what_if.ALLOCATION_METRICS
+
+
+# Scalar analysis as a metric vector; buckets it leaves out of the allocation are 0 in the grid
+def expected(user_data):
+    analysis = analyze_finances(user_data)
+    allocation = analysis.pop("recommended_investment_allocation")
+    analysis.update({bucket: allocation.get(bucket, 0.0) for bucket in what_if.ALLOCATION_METRICS})
+    return np.array([float(analysis[metric]) for metric in METRICS])
+
+
+def cell(grid, index):
+    return grid["values"][(slice(None),) + tuple(index)]
+
+
+def test_base_cell_matches_analyze_finances():
+    grid = what_if.what_if_grid(SAMPLE_USER, RANGES, METRICS)
+    index = what_if.base_index(grid)
+    assert [grid["axes"][i][j] for i, j in enumerate(index[:-1])] == [120000, 70000, 200000, 300000]
+    assert grid["axes"][-1][index[-1]] == "Medium"
+    np.testing.assert_allclose(cell(grid, index), expected(SAMPLE_USER), rtol=1e-6, atol=1e-3)
+
+
+def test_every_cell_matches_analyze_finances():
+    grid = what_if.what_if_grid(SAMPLE_USER, RANGES, METRICS)
+    for index in np.ndindex(*grid["values"].shape[1:]):
+        user_data = dict(SAMPLE_USER)
+        for field, axis, i in zip(grid["fields"], grid["axes"], index):
+            user_data[field] = axis[i] if field == "risk_tolerance" else float(axis[i])
+        np.testing.assert_allclose(cell(grid, index), expected(user_data), rtol=1e-6, atol=1e-3)
+
+
+def test_chunking_does_not_change_the_grid(monkeypatch):
+    whole = what_if.what_if_grid(SAMPLE_USER, RANGES)
+    monkeypatch.setattr(what_if, "CHUNK_CELLS", 7)
+    np.testing.assert_array_equal(what_if.what_if_grid(SAMPLE_USER, RANGES)["values"], whole["values"])
+
+
+def test_plane_rows_follow_y_field():
+    grid = what_if.what_if_grid(SAMPLE_USER, RANGES, ["savings"])
+    plane = what_if.grid_plane(grid, "savings", "income", "expenses")
+    assert plane.shape == (7, 5)
+    assert plane[0, -1] == pytest.approx(RANGES["income"][-1] - RANGES["expenses"][0])
+
+
+def test_unknown_field_or_metric_is_rejected():
+    with pytest.raises(ValueError):
+        what_if.what_if_grid(SAMPLE_USER, {"salary": [1, 2]})
+    with pytest.raises(ValueError):
+        what_if.what_if_grid(SAMPLE_USER, RANGES, ["wealth"])
@@ -0,0 +1,242 @@
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+# Streamlit stops a script run early (st.rerun, st.stop) by raising these; a span they end is not an error
+CONTROL_FLOW_ERRORS = {"RerunException", "StopException"}
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# Tracer: spans per pipeline stage, recent durations per stage, optional JSONL export written in batches
+# by a background thread (a full export queue drops spans rather than slowing the request path)
+class Tracer:
+    def __init__(self, service_name="ai-financial-advisor", max_samples=1000, max_spans=5000, jsonl_path=None,
+                 flush_interval=1.0):
+        self.service_name = service_name
+        self.max_samples = max_samples
+        self.samples = {}
+        self.spans = deque(maxlen=max_spans)
+        self.jsonl_path = jsonl_path
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=max_spans)
+        self.dropped = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        if jsonl_path:
+            self.writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self.writer.start()
+            atexit.register(self.close)
+
+    def _stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    # Innermost open span on this thread, to hand to work that runs on another thread
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    # Spans started inside the block are children of parent (an open span from another thread)
+    @contextmanager
+    def attach(self, parent):
+        stack = self._stack()
+        if parent is not None:
+            stack.append(parent)
+        try:
+            yield
+        finally:
+            if parent is not None:
+                stack.pop()
+
+    # Detached span for work that outlives a single block (e.g. a streamed response); call end() when done
+    def start(self, name, **attributes):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        return Span(name, parent.trace_id if parent else os.urandom(16).hex(), parent.span_id if parent else None, attributes)
+
+    def end(self, span, error=None):
+        span.error = error
+        span.end_ns = time.time_ns()
+        self._record(span)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        stack = self._stack()
+        current = self.start(name, **attributes)
+        stack.append(current)
+        try:
+            yield current
+        except BaseException as e:
+            if type(e).__name__ in CONTROL_FLOW_ERRORS:
+                current.set("stopped_by", type(e).__name__)
+            else:
+                current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            current.end_ns = time.time_ns()
+            self._record(current)
+
+    def _record(self, span):
+        with self.lock:
+            samples = self.samples.get(span.name)
+            if samples is None:
+                samples = self.samples[span.name] = deque(maxlen=self.max_samples)
+            samples.append(span.duration_ms)
+            self.spans.append(span)
+        if self.jsonl_path and not self.closed:
+            try:
+                self.pending.put_nowait(span)
+            except queue.Full:
+                with self.lock:
+                    self.dropped += 1
+
+    def _next_batch(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not None:
+            try:
+                batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    # One append per batch; a failed write is logged and its spans dropped
+    def _write_loop(self):
+        while True:
+            batch = self._next_batch()
+            spans = [span for span in batch if span is not None]
+            try:
+                if spans:
+                    lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(lines)
+            except Exception as e:
+                print(f"Trace export {self.jsonl_path}: dropped {len(spans)} spans: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+            if batch[-1] is None:
+                return
+
+    # Wait until every ended span is written (or dropped); False if that took longer than timeout seconds
+    def flush(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        with self.pending.all_tasks_done:
+            while self.pending.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.pending.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        if self.closed or not self.jsonl_path:
+            return
+        self.closed = True
+        self.pending.put(None)
+        self.writer.join(timeout)
+
+    # Per-stage latency histogram summary (milliseconds)
+    def summary(self):
+        with self.lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+        result = {}
+        for name, values in snapshot.items():
+            if not values:
+                continue
+            result[name] = {
+                "count": len(values),
+                "p50": values[int(0.50 * (len(values) - 1))],
+                "p95": values[int(0.95 * (len(values) - 1))],
+                "max": values[-1]
+            }
+        return result
+
+    # OpenTelemetry OTLP/JSON export of the buffered spans (one ExportTraceServiceRequest per line)
+    def export_otlp_json(self, path):
+        with self.lock:
+            spans = list(self.spans)
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+                } for s in spans]
+            }]
+        }]}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request) + "\n")
+        return len(spans)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.spans.clear()
+
+
+# Process-wide tracer (set ADVISOR_TRACE_JSONL to also append every span to a JSONL file)
+tracer = Tracer(jsonl_path=os.environ.get("ADVISOR_TRACE_JSONL"))
+
+
+def span(name, **attributes):
+    return tracer.span(name, **attributes)
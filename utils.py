@@ -1,48 +1,145 @@
 import re
+from functools import lru_cache
+
+from tracing import span
+
+ADVICE_HEADERS = [
+    "Current Financial Health:",
+    "Existing Savings Utilization:",
+    "Monthly Savings Strategy:",
+    "Debt Plan:",
+    "Investment Advice:",
+    "Investment Allocation:",
+    "Goal Guidance:",
+    "Budgeting & Expense Optimization:",
+    "Risk Management:"
+]
+GOAL_HEADERS = [
+    "Financial Impact Analysis:",
+    "Revised Goal Timeline:",
+    "Monthly Action Plan:",
+    "Resource Allocation Strategy:",
+    "Risk Assessment & Mitigation:",
+    "Progress Tracking Framework:",
+    "Contingency Planning:",
+    "Key Success Metrics:",
+    "Next Immediate Actions:"
+]
+
+# Compiled once: a header is only recognised when it ends its line
+ADVICE_PATTERN = re.compile("(" + "|".join(re.escape(h) for h in ADVICE_HEADERS) + ")\n")
+GOAL_PATTERN = re.compile("(" + "|".join(re.escape(h) for h in GOAL_HEADERS) + ")\n")
+
+# Character clean-up done in a single translate pass
+ADVICE_CLEANUP = str.maketrans({"*": None, "{": " ", "}": " "})
+GOAL_CLEANUP = str.maketrans({"*": None})
+
+PARAGRAPH_SECTIONS = ("Current Financial Health",)
+SECTION_CACHE_SIZE = 64
+
+
+# Single-pass tokenizer: returns ((title, items), ...) where items are bullet texts
+# (or the raw lines of a paragraph section)
+def _parse_sections(text, pattern, cleanup):
+    text = text.translate(cleanup)
+    sections = []
+    matches = list(pattern.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        title = match.group(1).strip()
+        content = text[match.end():end].strip()
+        if any(name in title for name in PARAGRAPH_SECTIONS):
+            items = tuple(content.split("\n"))
+        else:
+            items = []
+            for line in content.split("\n"):
+                line = line.strip()
+                if line.startswith("-"):
+                    items.append(line[1:].strip())
+                elif line:
+                    items.append(line)
+            items = tuple(items)
+        sections.append((title, items))
+    return tuple(sections)
+
+
+# HTML rendering of structured sections
+def _render_section(title, items, line_height):
+    if any(name in title for name in PARAGRAPH_SECTIONS):
+        return "".join(["<p style='margin:0; line-height:", line_height, "'>", "<br>".join(items), "</p>"])
+    parts = ["<ul style='margin:0; padding-left:18px; line-height:", line_height, "'>"]
+    for item in items:
+        parts.append(f"<li>{item}</li>")
+    parts.append("</ul>")
+    return "".join(parts)
+
+
+def render_sections_html(sections, line_height="1.4em"):
+    return [(title, _render_section(title, items, line_height)) for title, items in sections]
+
+
+# Structured advice / goal sections, cached per input text
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def parse_advice_sections(advice_text):
+    return _parse_sections(advice_text, ADVICE_PATTERN, ADVICE_CLEANUP)
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def parse_goal_sections(goal_text):
+    return _parse_sections(goal_text, GOAL_PATTERN, GOAL_CLEANUP)
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _advice_sections_html(advice_text):
+    return tuple(render_sections_html(parse_advice_sections(advice_text), "1.4em"))
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _goal_sections_html(goal_text):
+    return tuple(render_sections_html(parse_goal_sections(goal_text), "1.5em"))
+
 
 # Split advice sections
 def split_advice_sections(advice_text):
-                advice_text = advice_text.replace("*", "").replace("{", " ").replace("}", " ")  
-                pattern = r'(Current Financial Health:|Existing Savings Utilization:|Monthly Savings Strategy:|Debt Plan:|Investment Advice:|Investment Allocation:|Goal Guidance:|Budgeting & Expense Optimization:|Risk Management:)\n'
-                splits = re.split(pattern, advice_text)
-                sections = []
-                for i in range(1, len(splits), 2):
-                    title = splits[i].strip()
-                    content = splits[i+1].strip()
-
-                    if "Current Financial Health" in title:
-                        content_html = "<p style='margin:0; line-height:1.4em'>" + content.replace("\n", "<br>") + "</p>"
-                    else:
-                        content_html = "<ul style='margin:0; padding-left:18px; line-height:1.4em'>"
-                        for line in content.split("\n"):
-                            line = line.strip()
-                            if line.startswith("-"):
-                                content_html += f"<li>{line[1:].strip()}</li>"
-                            elif line:
-                                content_html += f"<li>{line}</li>"
-                        content_html += "</ul>"
-                    sections.append((title, content_html))
-                return sections
+    with span("parse.advice_sections", text_chars=len(advice_text)) as current:
+        hits = _advice_sections_html.cache_info().hits
+        sections = list(_advice_sections_html(advice_text))
+        current.set("cache_hit", _advice_sections_html.cache_info().hits > hits)
+        return sections
 
 # Split goal sections
 def split_goal_sections(goal_text):
-                goal_text = goal_text.replace("*", "")
-                pattern = r'(Financial Impact Analysis:|Revised Goal Timeline:|Monthly Action Plan:|Resource Allocation Strategy:|Risk Assessment & Mitigation:|Progress Tracking Framework:|Contingency Planning:|Key Success Metrics:|Next Immediate Actions:)\n'
-                splits = re.split(pattern, goal_text)
-                sections = []
-                for i in range(1, len(splits), 2):
-                    title = splits[i].strip()
-                    content = splits[i+1].strip()
-                    
-                    content_html = "<ul style='margin:0; padding-left:18px; line-height:1.5em'>"
-                    for line in content.split("\n"):
-                        line = line.strip()
-                        if line.startswith("-"):
-                            content_html += f"<li>{line[1:].strip()}</li>"
-                        elif line:
-                            content_html += f"<li>{line}</li>"
-
-                    content_html += "</ul>"
-
-                    sections.append((title, content_html))
-                return sections
+    with span("parse.goal_sections", text_chars=len(goal_text)) as current:
+        hits = _goal_sections_html.cache_info().hits
+        sections = list(_goal_sections_html(goal_text))
+        current.set("cache_hit", _goal_sections_html.cache_info().hits > hits)
+        return sections
+
+
+# Longest header match, so a header split across two chunks is still found
+HEADER_SPAN = max(len(header) for header in ADVICE_HEADERS + GOAL_HEADERS) + 1
+
+
+# Incremental section splitting over streamed chunks: a section is emitted once the next header arrives.
+# Only the unfinished section is kept, and each chunk is scanned once (plus a header's length of overlap).
+def _iter_sections(chunks, pattern, cleanup, line_height):
+    text = ""
+    started = False
+    scan_from = 0
+    for chunk in chunks:
+        scan_from = max(scan_from, len(text) - HEADER_SPAN)
+        text += chunk.translate(cleanup)
+        match = pattern.search(text, scan_from)
+        while match is not None:
+            if started:
+                yield render_sections_html(_parse_sections(text[:match.start()], pattern, cleanup), line_height)[0]
+            started = True
+            text = text[match.start():]
+            scan_from = match.end() - match.start()
+            match = pattern.search(text, scan_from)
+    if started:
+        yield from render_sections_html(_parse_sections(text, pattern, cleanup), line_height)
+
+def iter_advice_sections(chunks):
+    return _iter_sections(chunks, ADVICE_PATTERN, ADVICE_CLEANUP, "1.4em")
+
+def iter_goal_sections(chunks):
+    return _iter_sections(chunks, GOAL_PATTERN, GOAL_CLEANUP, "1.5em")
@@ -1,8 +1,28 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
+import threading
+from collections import OrderedDict
+
+from tracing import span
+from what_if import FIELD_LABELS, METRIC_LABELS, base_index, grid_plane
+
+# Rendered chart cache: plot inputs -> image bytes
+FIGURE_CACHE_SIZE = 32
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+
+# Plotting stack is imported on first use to keep app start-up fast
+def _plotting():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
 
 # Visualization: Current Financial Health
 def plot_current_financial_overview(user_data, analysis_data):
+    plt, _ = _plotting()
     expenses = user_data["expenses"]
     savings = analysis_data["savings"]
 
@@ -31,9 +51,8 @@ def plot_current_financial_overview(user_data, analysis_data):
     return fig
 
 
-# Visualization: Detailed Advised Financial Health
-def plot_advised_financial_overview(user_data, analysis_data):
-
+# Plot inputs for the advised overview: the only numbers the chart depends on
+def advised_overview_values(user_data, analysis_data):
     expenses = user_data["expenses"]
     savings = analysis_data["savings"]
     emergency_fund_monthly = analysis_data["emergency_fund_monthly"]
@@ -47,16 +66,7 @@ def plot_advised_financial_overview(user_data, analysis_data):
     total_investments = high_interest + stocks + etfs + risk_free
     remaining_savings = max(0, savings - (emergency_fund_monthly + total_investments))
 
-    labels = [
-        "Expenses",
-        "Emergency Fund (Monthly)",
-        "High-Interest Savings",
-        "Stocks",
-        "Balanced Funds",
-        "Risk-Free Investments",
-        "Remaining Savings"
-    ]
-    values = [
+    return [
         expenses,
         emergency_fund_monthly,
         high_interest,
@@ -66,6 +76,25 @@ def plot_advised_financial_overview(user_data, analysis_data):
         remaining_savings
     ]
 
+
+ADVISED_OVERVIEW_LABELS = [
+    "Expenses",
+    "Emergency Fund (Monthly)",
+    "High-Interest Savings",
+    "Stocks",
+    "Balanced Funds",
+    "Risk-Free Investments",
+    "Remaining Savings"
+]
+
+
+# Visualization: Detailed Advised Financial Health
+def plot_advised_financial_overview(user_data, analysis_data):
+    plt, sns = _plotting()
+
+    labels = ADVISED_OVERVIEW_LABELS
+    values = advised_overview_values(user_data, analysis_data)
+
     colors = sns.color_palette("pastel", len(values))
 
     fig, ax = plt.subplots(1, 2, figsize=(14, 6))
@@ -94,7 +123,9 @@ def plot_advised_financial_overview(user_data, analysis_data):
     sns.barplot(
         x=labels,
         y=values,
+        hue=labels,
         palette=colors,
+        legend=False,
         ax=ax[1]
     )
     ax[1].set_facecolor("#FFFFFF")
@@ -118,4 +149,153 @@ def plot_advised_financial_overview(user_data, analysis_data):
     plt.tight_layout(rect=[0.05, 0.1, 0.95, 0.95])
     plt.subplots_adjust(wspace=0.4)
 
-    return fig
\ No newline at end of file
+    return fig
+
+
+# Render a figure to image bytes and close it so pyplot does not keep it alive
+def figure_to_bytes(fig, fmt="png", dpi=200):
+    plt, _ = _plotting()
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+# Memoized advised overview: cached as PNG/SVG bytes keyed on the plotted values
+def render_advised_financial_overview(user_data, analysis_data, fmt="png"):
+    key = (fmt, *(float(v) for v in advised_overview_values(user_data, analysis_data)))
+    with span("plot.advised_overview", format=fmt) as current:
+        with _figure_cache_lock:
+            image = _figure_cache.get(key)
+            if image is not None:
+                _figure_cache.move_to_end(key)
+        current.set("cache_hit", image is not None)
+        if image is not None:
+            return image
+
+        image = figure_to_bytes(plot_advised_financial_overview(user_data, analysis_data), fmt)
+        current.set("image_bytes", len(image))
+
+    with _figure_cache_lock:
+        _figure_cache[key] = image
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return image
+
+
+# Client-side chart: Vega-Lite spec of the advised overview, drawn in the browser (no server-side rendering)
+PASTEL_COLORS = ["#a1c9f4", "#ffb482", "#8de5a1", "#ff9f9b", "#d0bbff", "#debb9b", "#fab0e4"]
+
+
+def advised_overview_spec(user_data, analysis_data):
+    values = advised_overview_values(user_data, analysis_data)
+    total = sum(values) or 1
+    data = [
+        {"index": i, "component": label, "amount": round(float(value), 2), "share": round(float(value) / total, 4)}
+        for i, (label, value) in enumerate(zip(ADVISED_OVERVIEW_LABELS, values))
+    ]
+    color = {
+        "field": "component", "type": "nominal",
+        "scale": {"domain": ADVISED_OVERVIEW_LABELS, "range": PASTEL_COLORS}, "legend": None
+    }
+    tooltip = [
+        {"field": "component", "title": "Component"},
+        {"field": "amount", "title": "Amount (₹)", "format": ",.0f"},
+        {"field": "share", "title": "Share", "format": ".1%"}
+    ]
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data": {"values": data},
+        "background": "#F9FAFB",
+        "hconcat": [
+            {
+                "title": "Savings & Investment Distribution",
+                "width": 260, "height": 260,
+                "layer": [
+                    {"mark": {"type": "arc", "outerRadius": 120, "stroke": "white", "strokeWidth": 2}},
+                    {"mark": {"type": "text", "radius": 140, "fontSize": 10}, "encoding": {"text": {"field": "component"}}},
+                    {"mark": {"type": "text", "radius": 95, "fontSize": 10, "fontWeight": "bold", "color": "white"},
+                     "encoding": {"text": {"field": "share", "format": ".1%"}}}
+                ],
+                "encoding": {
+                    "theta": {"field": "amount", "type": "quantitative", "stack": True},
+                    "order": {"field": "index", "type": "quantitative"},
+                    "color": color,
+                    "tooltip": tooltip
+                }
+            },
+            {
+                "title": "Component-wise Financial Impact",
+                "width": 320, "height": 260,
+                "encoding": {
+                    "x": {"field": "component", "type": "nominal", "sort": ADVISED_OVERVIEW_LABELS, "title": None,
+                          "axis": {"labelAngle": -90}},
+                    "y": {"field": "amount", "type": "quantitative", "title": "Amount (₹)"},
+                    "color": color,
+                    "tooltip": tooltip
+                },
+                "layer": [
+                    {"mark": "bar"},
+                    {"mark": {"type": "text", "dy": -6, "fontSize": 9, "fontWeight": "bold"},
+                     "encoding": {"text": {"field": "amount", "format": ",.0f"}}}
+                ]
+            }
+        ]
+    }
+
+
+# Client-side heatmap of one what-if metric over two swept fields; the user's own profile is marked
+def what_if_spec(grid, metric, x_field, y_field):
+    plane = grid_plane(grid, metric, x_field, y_field)
+    xs = grid["axes"][grid["fields"].index(x_field)]
+    ys = grid["axes"][grid["fields"].index(y_field)]
+    index = base_index(grid)
+    current = (index[grid["fields"].index(x_field)], index[grid["fields"].index(y_field)])
+    title, fmt = METRIC_LABELS.get(metric, (f"{metric} (₹)", ",.0f"))
+    data = [
+        {"x": _axis_value(x), "y": _axis_value(y), "value": round(float(plane[j, i]), 4), "current": (i, j) == current}
+        for j, y in enumerate(ys) for i, x in enumerate(xs)
+    ]
+
+    def axis(field, values):
+        encoding = {"field": "x" if field == x_field else "y", "type": "ordinal", "title": FIELD_LABELS[field],
+                    "sort": [_axis_value(value) for value in values]}
+        if field == y_field:
+            encoding["sort"] = encoding["sort"][::-1]
+        if field != "risk_tolerance":
+            encoding["axis"] = {"format": ",.0f", "formatType": "number", "labelOverlap": True}
+        return encoding
+
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data": {"values": data},
+        "background": "#F9FAFB",
+        "title": f"What-if: {title}",
+        "width": 480, "height": 360,
+        "encoding": {"x": axis(x_field, xs), "y": axis(y_field, ys)},
+        "layer": [
+            {
+                "mark": "rect",
+                "encoding": {
+                    "color": {"field": "value", "type": "quantitative", "title": title,
+                              "scale": {"scheme": "viridis"}, "legend": {"format": fmt}},
+                    "tooltip": [
+                        {"field": "x", "title": FIELD_LABELS[x_field]},
+                        {"field": "y", "title": FIELD_LABELS[y_field]},
+                        {"field": "value", "title": title, "format": fmt}
+                    ]
+                }
+            },
+            {
+                "transform": [{"filter": "datum.current"}],
+                "mark": {"type": "point", "shape": "diamond", "size": 140, "filled": True, "color": "white",
+                         "stroke": "#333333", "strokeWidth": 1}
+            }
+        ]
+    }
+
+
+def _axis_value(value):
+    return value if isinstance(value, str) else round(float(value), 2)
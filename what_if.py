@@ -0,0 +1,113 @@
+import numpy as np
+
+from finance_analysis import analyze_finances_batch, ALLOCATION_BUCKETS, RISK_LEVELS
+
+# Grid axes in output order; numeric fields take value ranges, risk_tolerance takes labels
+GRID_FIELDS = ["income", "expenses", "debts", "existing_savings", "risk_tolerance"]
+NUMERIC_FIELDS = GRID_FIELDS[:-1]
+RISK_LABELS = [level.title() for level in RISK_LEVELS]
+
+# Metrics stored per cell by default: (title, Vega/d3 number format)
+METRIC_LABELS = {
+    "savings": ("Monthly Savings (₹)", ",.0f"),
+    "savings_ratio": ("Savings Ratio", ".0%"),
+    "expense_ratio": ("Expense Ratio", ".0%"),
+    "debt_to_income_ratio": ("Debt-to-Income Ratio", ".0%"),
+    "debt_to_savings_ratio": ("Debt-to-Savings Ratio", ".1f"),
+    "investment_capacity": ("Investment Capacity (₹)", ",.0f"),
+    "emergency_fund": ("Emergency Fund Target (₹)", ",.0f"),
+    "emergency_fund_shortfall": ("Emergency Fund Shortfall (₹)", ",.0f"),
+    "emergency_fund_monthly": ("Emergency Fund / Month (₹)", ",.0f"),
+    "total_net_worth": ("Total Net Worth (₹)", ",.0f"),
+    "high_debt_alert": ("High Debt Alert", ".0f")
+}
+GRID_METRICS = list(METRIC_LABELS)
+# Per-bucket monthly allocation amounts can be requested as metrics too
+ALLOCATION_METRICS = list(ALLOCATION_BUCKETS)
+FIELD_LABELS = {
+    "income": "Monthly Income (₹)",
+    "expenses": "Monthly Expenses (₹)",
+    "debts": "Total Debts (₹)",
+    "existing_savings": "Existing Savings (₹)",
+    "risk_tolerance": "Risk Tolerance"
+}
+# Cells evaluated per batch, bounds the float64 temporaries of analyze_finances_batch
+CHUNK_CELLS = 1 << 18
+
+
+# Evenly spaced values around a base value (never negative); a zero base spreads over `scale` instead
+def sweep_range(value, spread=0.5, steps=21, scale=None):
+    width = (value or scale or 1) * spread
+    return np.linspace(max(0.0, value - width), value + width, steps)
+
+
+def _axis(field, user_data, ranges):
+    if field == "risk_tolerance":
+        labels = ranges.get(field, [user_data.get(field, "Medium")])
+        return [label.title() for label in ([labels] if isinstance(labels, str) else labels)]
+    values = ranges.get(field)
+    if values is None:
+        values = [user_data.get(field, 0)]
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+# What-if grid: every analyze_finances metric over the Cartesian product of the given field ranges.
+# Fields without a range keep their user_data value (an axis of length 1). The result holds one
+# float32 array of shape (metrics, *axis lengths), filled by broadcasting instead of materialising
+# the product, in chunks along the first axis so memory stays bounded for large grids.
+def what_if_grid(user_data, ranges, metrics=None):
+    unknown = [field for field in ranges if field not in GRID_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown what-if fields: {', '.join(unknown)}")
+    metrics = list(metrics or GRID_METRICS)
+    unknown = [metric for metric in metrics if metric not in METRIC_LABELS and metric not in ALLOCATION_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown what-if metrics: {', '.join(unknown)}")
+    axes = [_axis(field, user_data, ranges) for field in GRID_FIELDS]
+    shape = tuple(len(axis) for axis in axes)
+    values = np.empty((len(metrics),) + shape, dtype=np.float32)
+
+    def column(i, axis):
+        return np.asarray(axis).reshape([-1 if j == i else 1 for j in range(len(axes))])
+
+    columns = {field: column(i, axis) for i, (field, axis) in enumerate(zip(GRID_FIELDS, axes))}
+    columns["profile"] = user_data.get("profile")
+    step = max(1, CHUNK_CELLS // max(1, int(np.prod(shape[1:]))))
+    first = GRID_FIELDS[0]
+    for start in range(0, shape[0], step):
+        chunk = dict(columns, **{first: columns[first][start:start + step]})
+        result = analyze_finances_batch(chunk)
+        allocation = result.pop("recommended_investment_allocation")
+        result.update(allocation)
+        for m, metric in enumerate(metrics):
+            values[m, start:start + step] = result[metric]
+
+    return {
+        "fields": list(GRID_FIELDS),
+        "axes": axes,
+        "metrics": metrics,
+        "values": values,
+        "base": {field: user_data.get(field) for field in GRID_FIELDS}
+    }
+
+
+# Grid index of the user's own profile on each axis (nearest value)
+def base_index(grid):
+    index = []
+    for field, axis in zip(grid["fields"], grid["axes"]):
+        base = grid["base"][field]
+        if field == "risk_tolerance":
+            base = str(base).title()
+            index.append(axis.index(base) if base in axis else 0)
+        else:
+            index.append(int(np.abs(axis - float(base or 0)).argmin()))
+    return index
+
+
+# 2-D slice of one metric (rows follow y_field, columns x_field), other fields fixed at the base profile
+def grid_plane(grid, metric, x_field, y_field):
+    x, y = grid["fields"].index(x_field), grid["fields"].index(y_field)
+    index = base_index(grid)
+    selector = tuple(slice(None) if i in (x, y) else index[i] for i in range(len(index)))
+    plane = grid["values"][grid["metrics"].index(metric)][selector]
+    return plane.T if x < y else plane